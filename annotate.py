@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Annotate a raw genotype file (23andMe, AncestryDNA) against the database.
+
+The file is streamed in batches. Each batch is intersected with the set of
+SNP keys in the database, and only the matches are looked up, so a whole
+genome costs a handful of queries per batch rather than one per line.
+
+Usage:
+    python annotate.py genome_23andme.txt                    # writes genome_23andme.annotated.tsv
+    python annotate.py genome.txt -o out.jsonl --min-magnitude 2
+    python annotate.py sample1.txt sample2.txt --jobs 4      # batch mode, one process per file
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import snpdb  # noqa: E402
+
+DEFAULT_BATCH_SIZE = 20000
+COMPLEMENT = str.maketrans('ACGT', 'TGCA')
+NO_CALL = {'--', '00', '0', '', 'II', 'DD', 'DI', 'ID'}
+GENOTYPE_FIELD_RE = re.compile(r'\|\s*(magnitude|repute|summary)\s*=\s*([^|\n}]*)', re.IGNORECASE)
+MINUS_ORIENTATION_RE = re.compile(r'\|\s*orientation\s*=\s*minus', re.IGNORECASE)
+
+OUTPUT_FIELDS = [
+    'rsid', 'chromosome', 'position', 'genotype',
+    'page', 'genotype_page', 'magnitude', 'repute', 'summary'
+]
+
+
+def iter_raw_genotypes(path):
+    """Yield (id, chromosome, position, genotype) from a raw data file.
+
+    Handles 23andMe (rsid, chromosome, position, genotype) and AncestryDNA
+    (rsid, chromosome, position, allele1, allele2), tab or comma separated.
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not line or line[0] == '#':
+                continue
+            fields = line.rstrip('\r\n').replace('"', '').split('\t' if '\t' in line else ',')
+            if len(fields) < 4 or fields[0].lower() == 'rsid':
+                continue
+            if len(fields) >= 5:
+                genotype = fields[3] + fields[4]
+            else:
+                genotype = fields[3]
+            yield fields[0], fields[1], fields[2], genotype.strip().upper()
+
+
+def iter_batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_known_keys(conn):
+    """All (namespace, number) keys in the database, as a set."""
+    if snpdb.get_progress(conn, 'snp_keys_backfilled') != '1':
+        raise RuntimeError("SNP keys are not built yet - run: python migrate_db.py")
+    return set(conn.execute('SELECT ns, num FROM snp_keys'))
+
+
+def genotype_titles(rsid, genotype, minus):
+    """Candidate genotype page titles for a called genotype, e.g. Rs53576(A;G)."""
+    if minus:
+        genotype = genotype.translate(COMPLEMENT)
+    if len(genotype) == 1:
+        return [f'{rsid}({genotype})', f'{rsid}({genotype};{genotype})']
+    a, b = genotype[0], genotype[1]
+    titles = [f'{rsid}({a};{b})']
+    if a != b:
+        titles.append(f'{rsid}({b};{a})')
+    return titles
+
+
+def parse_genotype_page(content):
+    """Pull magnitude, repute and summary out of a {{Genotype}} template."""
+    fields = {}
+    for name, value in GENOTYPE_FIELD_RE.findall(content or ''):
+        fields.setdefault(name.lower(), value.strip())
+    magnitude = fields.get('magnitude')
+    try:
+        magnitude = float(magnitude) if magnitude else None
+    except ValueError:
+        magnitude = None
+    return magnitude, fields.get('repute') or None, fields.get('summary') or None
+
+
+def fetch_contents(conn, titles):
+    """Return {title: content} for the titles that exist in snps."""
+    titles = list(titles)
+    found = {}
+    for i in range(0, len(titles), snpdb.MAX_SQL_VARIABLES):
+        chunk = titles[i:i + snpdb.MAX_SQL_VARIABLES]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f'SELECT rsid, content FROM snps WHERE rsid IN ({placeholders})', chunk)
+        found.update(rows)
+    return found
+
+
+def annotate_batch(conn, batch, known_keys, include_all=False):
+    """Annotate one batch of raw genotype rows. Returns a list of result dicts."""
+    keyed = {}
+    for row in batch:
+        key = snpdb.parse_snp_id(row[0])
+        if key is not None:
+            keyed.setdefault(key, row)
+
+    matched = keyed.keys() & known_keys
+    if not matched:
+        return []
+
+    pages = snpdb.lookup_keys(conn, matched)
+    # SNP pages are only read to learn the strand their genotype pages use
+    snp_contents = fetch_contents(conn, pages.values())
+
+    candidates = {}
+    for key, page in pages.items():
+        genotype = keyed[key][3]
+        if genotype in NO_CALL or not genotype.isalpha():
+            continue
+        minus = bool(MINUS_ORIENTATION_RE.search(snp_contents.get(page) or ''))
+        candidates[key] = genotype_titles(page, genotype, minus)
+
+    genotype_contents = fetch_contents(
+        conn, (title for titles in candidates.values() for title in titles)
+    )
+
+    results = []
+    for key, page in pages.items():
+        rsid, chromosome, position, genotype = keyed[key]
+        genotype_page = next(
+            (title for title in candidates.get(key, []) if title in genotype_contents), None
+        )
+        if genotype_page is None and not include_all:
+            continue
+        magnitude = repute = summary = None
+        if genotype_page:
+            magnitude, repute, summary = parse_genotype_page(genotype_contents[genotype_page])
+        results.append({
+            'rsid': rsid,
+            'chromosome': chromosome,
+            'position': position,
+            'genotype': genotype,
+            'page': page,
+            'genotype_page': genotype_page,
+            'magnitude': magnitude,
+            'repute': repute,
+            'summary': summary,
+        })
+    return results
+
+
+def write_result(f, result, fmt):
+    if fmt == 'jsonl':
+        f.write(json.dumps(result) + '\n')
+    else:
+        f.write('\t'.join('' if result[k] is None else str(result[k]) for k in OUTPUT_FIELDS) + '\n')
+
+
+def annotate_file(path, output=None, db_path=DB_PATH, min_magnitude=None,
+                  include_all=False, batch_size=DEFAULT_BATCH_SIZE, top=10):
+    """Annotate one raw genotype file. Returns a summary dict."""
+    output = output or os.path.splitext(path)[0] + '.annotated.tsv'
+    fmt = 'jsonl' if output.endswith('.jsonl') else 'tsv'
+
+    conn = snpdb.connect(db_path, readonly=True)
+    known_keys = load_known_keys(conn)
+
+    lines = matches = 0
+    top_hits = []  # min-heap of (magnitude, rsid, genotype_page, repute)
+    with open(output, 'w', encoding='utf-8') as out:
+        if fmt == 'tsv':
+            out.write('\t'.join(OUTPUT_FIELDS) + '\n')
+        for batch in iter_batches(iter_raw_genotypes(path), batch_size):
+            lines += len(batch)
+            for result in annotate_batch(conn, batch, known_keys, include_all):
+                magnitude = result['magnitude']
+                if min_magnitude is not None and (magnitude is None or magnitude < min_magnitude):
+                    continue
+                write_result(out, result, fmt)
+                matches += 1
+                if magnitude is not None:
+                    item = (magnitude, result['rsid'], result['genotype_page'], result['repute'])
+                    if len(top_hits) < top:
+                        heapq.heappush(top_hits, item)
+                    else:
+                        heapq.heappushpop(top_hits, item)
+    conn.close()
+
+    return {
+        'input': path,
+        'output': output,
+        'lines': lines,
+        'matches': matches,
+        'top': sorted(top_hits, reverse=True),
+    }
+
+
+def _annotate_job(kwargs):
+    return annotate_file(**kwargs)
+
+
+def print_summary(summary, elapsed=None):
+    timing = f" in {elapsed:.1f}s" if elapsed is not None else ""
+    print(f"✓ {summary['input']}: {summary['lines']:,} genotypes, "
+          f"{summary['matches']:,} annotated{timing} → {summary['output']}")
+    for magnitude, rsid, page, repute in summary['top']:
+        print(f"    {magnitude:>4.1f}  {page or rsid}  {repute or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate raw genotype files against the SNPedia database.")
+    parser.add_argument('inputs', nargs='+', help="Raw data file(s) from 23andMe or AncestryDNA")
+    parser.add_argument('-o', '--output', help="Output file (.tsv or .jsonl); single input only")
+    parser.add_argument('--db', default=DB_PATH, help="Database path")
+    parser.add_argument('--min-magnitude', type=float, help="Only report genotypes with at least this magnitude")
+    parser.add_argument('--all', action='store_true', help="Also report SNPs without a matching genotype page")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Lines per lookup batch")
+    parser.add_argument('--jobs', type=int, default=1, help="Annotate several files in parallel processes")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"✗ Database not found: {args.db}")
+        sys.exit(1)
+    if args.output and len(args.inputs) > 1:
+        print("✗ --output can only be used with a single input file")
+        sys.exit(1)
+
+    jobs = [
+        {
+            'path': path,
+            'output': args.output,
+            'db_path': args.db,
+            'min_magnitude': args.min_magnitude,
+            'include_all': args.all,
+            'batch_size': args.batch_size,
+        }
+        for path in args.inputs
+    ]
+
+    start = time.time()
+    try:
+        _run(jobs, args.jobs, start)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+
+def _run(jobs, workers, start):
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for summary in pool.map(_annotate_job, jobs):
+                print_summary(summary)
+        print(f"\n✓ Annotated {len(jobs)} files in {time.time() - start:.1f}s")
+    else:
+        for job in jobs:
+            job_start = time.time()
+            print_summary(annotate_file(**job), time.time() - job_start)
+
+
+if __name__ == "__main__":
+    main()
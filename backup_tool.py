@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Verify backups and restore one over the live database.
+
+`verify` checks every backup in backups/ in parallel (SHA-256 against the
+manifest, PRAGMA integrity_check, row count against the manifest) and
+records the results in backups/manifest.json. Backups made before the
+manifest existed are recorded on their first verification.
+
+`restore` copies (or decompresses) a backup into a temporary file next to
+the database, validates it, and renames it over the database in one step.
+The replaced file is kept as snpedia.db.pre-restore. A running CLI
+scraper holds the database's writer lock, and the restore is refused
+until it is stopped. (The dashboard's restore endpoint stops and
+restarts a hosted scraper itself.)
+
+Usage:
+    python backup_tool.py list
+    python backup_tool.py verify --jobs 4
+    python backup_tool.py verify --quick backups/snpedia_backup_5000_snps_20250701_120000.db
+    python backup_tool.py restore snpedia_backup_5000_snps_20250701_120000.db
+"""
+
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
+BACKUP_DIR = os.path.join(PROJECT_ROOT, 'backups')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import backups  # noqa: E402
+
+STATUS_MARKS = {'ok': '✓', 'unrecorded': '✓', 'corrupt': '✗', 'mismatch': '✗'}
+
+
+def resolve(backup_dir, name):
+    """A backup given as a path or as a file name in backup_dir."""
+    if os.path.exists(name):
+        return name
+    return os.path.join(backup_dir, name)
+
+
+def print_list(backup_dir):
+    manifest = backups.load_manifest(backup_dir)
+    paths = backups.backup_files(backup_dir)
+    for path in paths:
+        name = os.path.basename(path)
+        entry = manifest.get(name, {})
+        status = entry.get('status') or ('unverified' if entry else 'not in manifest')
+        mark = STATUS_MARKS.get(status, ' ')
+        rows = f"{entry['rows']:,} rows" if entry.get('rows') is not None else "rows unknown"
+        checked = f", checked {entry['verified_at'][:16]}" if entry.get('verified_at') else ""
+        print(f"  {mark} {name}  {os.path.getsize(path) / (1024 * 1024):.1f} MB, {rows}: {status}{checked}")
+    print(f"{len(paths)} backups in {backup_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify and restore database backups.")
+    parser.add_argument('--backup-dir', default=BACKUP_DIR, help="Backup directory")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('list', help="Backups and their last verification")
+
+    verify_parser = sub.add_parser('verify', help="Check backups in parallel and record the results")
+    verify_parser.add_argument('files', nargs='*', help="Backups to check (default: all)")
+    verify_parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    verify_parser.add_argument('--quick', action='store_true', help="PRAGMA quick_check instead of integrity_check")
+
+    restore_parser = sub.add_parser('restore', help="Validate a backup and swap it in for the database")
+    restore_parser.add_argument('backup', help="Backup file (path or name in the backup directory)")
+    restore_parser.add_argument('--db', default=DB_PATH, help="Database to replace")
+    restore_parser.add_argument('--no-keep', action='store_true', help="Don't keep the replaced database")
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        print_list(args.backup_dir)
+        return
+
+    if args.command == 'verify':
+        files = [resolve(args.backup_dir, name) for name in args.files]
+        missing = [path for path in files if not os.path.exists(path)]
+        if missing:
+            print(f"✗ Backup not found: {missing[0]}")
+            sys.exit(1)
+
+        def show(result):
+            mark = STATUS_MARKS[result['status']]
+            detail = f" - {result['error']}" if result['error'] else ""
+            rows = f"{result['rows']:,} rows" if result['rows'] is not None else "unreadable"
+            print(f"  {mark} {result['file']}: {result['status']} ({rows}, {result['seconds']}s){detail}")
+
+        print("=== Verifying Backups ===")
+        start = time.time()
+        results = backups.verify_backups(args.backup_dir, args.jobs, files or None, args.quick,
+                                         progress_callback=show)
+        if not results:
+            print(f"✗ No backups found in {args.backup_dir}")
+            sys.exit(1)
+        bad = [r for r in results if r['status'] not in ('ok', 'unrecorded')]
+        print(f"{'✗' if bad else '✓'} {len(results) - len(bad)} of {len(results)} backups good "
+              f"in {time.time() - start:.1f}s (recorded in {backups.manifest_path(args.backup_dir)})")
+        sys.exit(1 if bad else 0)
+
+    backup_path = resolve(args.backup_dir, args.backup)
+    if not os.path.exists(backup_path):
+        print(f"✗ Backup not found: {backup_path}")
+        sys.exit(1)
+    print(f"=== Restoring {os.path.basename(backup_path)} ===")
+    try:
+        result = backups.restore_backup(backup_path, args.db, keep_old=not args.no_keep)
+    except backups.BackupError as e:
+        print(f"✗ Restore aborted, database untouched: {e}")
+        sys.exit(1)
+    print(f"✓ Restored {result['rows']:,} rows into {args.db} in {result['seconds']}s")
+    if result['previous']:
+        print(f"  Previous database kept as {result['previous']}")
+
+
+if __name__ == "__main__":
+    main()
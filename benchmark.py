@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Synthetic-scale benchmarks for the dashboard and backups.
+
+`generate` builds a database with the real schema and a realistic mix of
+pages: Rs and I SNPs plus genotype pages, log-normal content sizes around
+the live database's ~1KB, and scrape timestamps at crawl pace. `run` loads
+the dashboard in-process against it, hammers /status, /stats,
+/backup/status and /snp/<id> from concurrent reader threads while a
+simulated scraper writes batches in parallel, then times backups. Results
+are written as JSON, and `compare` checks a new run against a saved
+baseline and exits non-zero on a regression.
+
+Usage:
+    python benchmark.py generate --rows 1M                  # bench/synthetic_1M.db
+    python benchmark.py run bench/synthetic_1M.db --readers 8 --duration 30 -o bench/baseline_1M.json
+    python benchmark.py compare bench/baseline_1M.json bench/current_1M.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+BENCH_DIR = os.path.join(PROJECT_ROOT, 'bench')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import snpdb  # noqa: E402
+import storage  # noqa: E402
+
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000 ** 2}
+# Share of each page type, roughly as in a full multi-category crawl
+PAGE_MIX = (('rs', 0.72), ('i', 0.08), ('genotype', 0.20))
+# Requests per endpoint, weighted like the UI's polling pattern
+ENDPOINT_WEIGHTS = (('/status', 0.55), ('/stats', 0.10), ('/backup/status', 0.10), ('/snp', 0.25))
+GENES = ['OXTR', 'APOE', 'MTHFR', 'BRCA1', 'BRCA2', 'CYP2C19', 'FTO', 'COMT', 'HLA-B', 'ACE', 'TCF7L2', 'LCT']
+WORDS = ('risk associated with increased decreased allele carriers study population odds ratio '
+         'disease response drug metabolism variant common rare effect gene expression patients').split()
+
+
+def parse_rows(value):
+    """'110k' -> 110000, '5M' -> 5000000."""
+    value = value.strip().lower()
+    if value and value[-1] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def format_rows(rows):
+    for suffix, size in (('M', 1000 ** 2), ('k', 1000)):
+        if rows >= size and rows % size == 0:
+            return f'{rows // size}{suffix}'
+    return str(rows)
+
+
+class PageGenerator:
+    """Deterministic synthetic SNPedia pages."""
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        # Slicing one shared pool of prose is much faster than building text per page
+        words = [self.random.choice(WORDS) for _ in range(200000)]
+        for i in range(0, len(words), 40):
+            words[i] = f'[[{self.random.choice(GENES)}]]'
+        self.filler = ' '.join(words)
+        self.next_num = {'rs': 1000, 'i': 3000000}
+        self.last_rs = 1000
+
+    def content_size(self, kind):
+        if kind == 'i':
+            return int(self.random.uniform(40, 100))  # 23andMe mappings are tiny
+        return int(min(60000, max(120, self.random.lognormvariate(6.7, 0.9))))
+
+    def text(self, size):
+        start = self.random.randrange(0, len(self.filler) - size - 1)
+        return self.filler[start:start + size]
+
+    def page(self):
+        r = self.random
+        kind = r.choices([k for k, _ in PAGE_MIX], [w for _, w in PAGE_MIX])[0]
+        size = self.content_size(kind)
+        if kind == 'i':
+            num = self.next_num['i']
+            self.next_num['i'] += 1
+            return f'I{num}', f'{{{{Rsnum|rsid=i{num}|23andMe SNP}}}} {self.text(size)}'[:size]
+
+        if kind == 'rs':
+            num = self.last_rs = self.next_num['rs']
+            self.next_num['rs'] += r.randint(1, 40)
+            head = (f"{{{{Rsnum\n|rsid={num}\n|Gene={r.choice(GENES)}\n|Chromosome={r.randint(1, 22)}\n"
+                    f"|position={r.randint(10000, 240000000)}\n|Orientation={r.choice(['plus', 'minus'])}\n"
+                    f"|geno1=(A;A)\n|geno2=(A;G)\n|geno3=(G;G)\n}}}}\n")
+            return f'Rs{num}', head + self.text(max(0, size - len(head)))
+
+        # Genotype pages belong to a recent SNP; a repeated title is skipped on insert
+        num = self.last_rs
+        a, b = r.choice('ACGT'), r.choice('ACGT')
+        head = (f"{{{{Genotype\n|rsid={num}\n|allele1={a}\n|allele2={b}\n"
+                f"|magnitude={r.choice([0, 0, 0.5, 1, 1.5, 2, 2.5, 3, 4])}\n"
+                f"|repute={r.choice(['Good', 'Bad', ''])}\n|summary={self.text(40)}\n}}}}\n")
+        return f'Rs{num}({a};{b})', head + self.text(max(0, size - len(head)))
+
+
+def generate(path, rows, seed=0, batch_size=10000, pages_per_hour=1200):
+    """Write a synthetic database of `rows` pages. Returns the file size."""
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    snpdb.create_tables(conn)
+    # Nothing else reads the file while it is built
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+
+    gen = PageGenerator(seed)
+    start_time = datetime.now() - timedelta(hours=rows / pages_per_hour)
+    step = timedelta(hours=1 / pages_per_hour)
+    written = 0
+    while written < rows:
+        batch = []
+        for i in range(min(batch_size, rows - written)):
+            title, content = gen.page()
+            batch.append((title, content, start_time + step * (written + i)))
+        with conn:
+            written += snpdb.save_snps(conn, batch, replace=False)
+        print(f"\r  Generated {written:,} / {rows:,} pages", end='', flush=True)
+
+    with conn:
+        snpdb.set_progress(conn, 'snp_count', written)
+        snpdb.set_progress(conn, 'synthetic_seed', seed)
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.close()
+    print()
+    return os.path.getsize(path)
+
+
+def attach_dashboard(db_path, backup_dir):
+    """Import the dashboard and point its module state at db_path."""
+    import dashboard
+    dashboard.DB_PATH = db_path
+    dashboard.BACKUP_DIR = backup_dir
+    dashboard.db_pool = dashboard.ConnectionPool(db_path)
+    dashboard.backup_manager = dashboard.BackupManager()
+    dashboard.backup_manager.config = {'strategy': 'rolling', 'keep_count': 1, 'interval': 1000}
+    return dashboard
+
+
+def percentiles(samples):
+    """Latency summary in milliseconds."""
+    if not samples:
+        return {'count': 0}
+    samples = sorted(samples)
+
+    def pct(p):
+        return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000, 3)
+
+    return {
+        'count': len(samples),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'p50_ms': pct(50),
+        'p90_ms': pct(90),
+        'p99_ms': pct(99),
+        'max_ms': round(samples[-1] * 1000, 3),
+    }
+
+
+def simulated_scraper(db_path, stop, rate, batch_size, seed, stats):
+    """Write new pages at `rate` pages/second in batches, like the scraper."""
+    gen = PageGenerator(seed + 1)
+    gen.next_num = {'rs': 900000000, 'i': 9000000}
+    interval = batch_size / rate
+    with storage.open_store(db_path) as store:
+        while not stop.is_set():
+            batch = [gen.page() for _ in range(batch_size)]
+            start = time.perf_counter()
+            store.put_many(batch)
+            stats['write_latencies'].append(time.perf_counter() - start)
+            stats['pages_written'] += len(batch)
+            stop.wait(max(0.0, interval - (time.perf_counter() - start)))
+
+
+def reader(client, stop, seed, snp_ids, results, errors):
+    r = random.Random(seed)
+    endpoints = [e for e, _ in ENDPOINT_WEIGHTS]
+    weights = [w for _, w in ENDPOINT_WEIGHTS]
+    while not stop.is_set():
+        endpoint = r.choices(endpoints, weights)[0]
+        path = f'/snp/{r.choice(snp_ids)}' if endpoint == '/snp' else endpoint
+        start = time.perf_counter()
+        response = client.get(path)
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 500:
+            errors[endpoint] = errors.get(endpoint, 0) + 1
+        results[endpoint].append(elapsed)
+
+
+def run_benchmark(db_path, readers=8, duration=30, writer_rate=50, writer_batch=50,
+                  backups=3, seed=0):
+    """Run the concurrent endpoint and backup benchmark. Returns the result dict."""
+    backup_dir = tempfile.mkdtemp(prefix='snpedia_bench_backups_')
+    dashboard = attach_dashboard(db_path, backup_dir)
+
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    rows = conn.execute('SELECT COUNT(*) FROM snps').fetchone()[0]
+    sample = [row[0] for row in conn.execute(
+        'SELECT rsid FROM snps WHERE rowid IN (SELECT abs(random()) % (SELECT MAX(rowid) FROM snps) FROM snps LIMIT 2000)'
+    )]
+    conn.close()
+    # A few ids that don't exist, as real clients send
+    snp_ids = [s.lower() for s in sample if snpdb.parse_snp_id(s)] + ['rs1', 'rs999999999']
+
+    results = {endpoint: [] for endpoint, _ in ENDPOINT_WEIGHTS}
+    errors = {}
+    writer_stats = {'write_latencies': [], 'pages_written': 0}
+    stop = threading.Event()
+
+    threads = []
+    if writer_rate > 0:
+        threads.append(threading.Thread(
+            target=simulated_scraper, args=(db_path, stop, writer_rate, writer_batch, seed, writer_stats)
+        ))
+    for i in range(readers):
+        threads.append(threading.Thread(
+            target=reader, args=(dashboard.app.test_client(), stop, seed + i, snp_ids, results, errors)
+        ))
+
+    print(f"  {readers} readers, scraper writing {writer_rate} pages/s, {duration}s...")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    # Backups are timed while the scraper is still writing, as in production
+    backup_runs = []
+    for _ in range(backups):
+        start = time.perf_counter()
+        path = dashboard.backup_manager.create_backup()
+        backup_runs.append({
+            'seconds': round(time.perf_counter() - start, 3),
+            'size_mb': round(os.path.getsize(path) / (1024 * 1024), 2) if path else None,
+            'ok': path is not None,
+        })
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    shutil.rmtree(backup_dir, ignore_errors=True)
+
+    total_requests = sum(len(samples) for samples in results.values())
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'database': os.path.basename(db_path),
+            'rows': rows,
+            'db_size_mb': round(os.path.getsize(db_path) / (1024 * 1024), 1),
+            'readers': readers,
+            'duration_s': duration,
+            'writer_rate': writer_rate,
+            'writer_batch': writer_batch,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'throughput_rps': round(total_requests / elapsed, 1),
+        'endpoints': {
+            endpoint: dict(percentiles(samples), errors=errors.get(endpoint, 0))
+            for endpoint, samples in results.items()
+        },
+        'writer': dict(percentiles(writer_stats['write_latencies']), pages=writer_stats['pages_written']),
+        'backup': {
+            'runs': backup_runs,
+            'mean_seconds': round(sum(b['seconds'] for b in backup_runs) / len(backup_runs), 3)
+            if backup_runs else None,
+        },
+    }
+
+
+def compare(baseline, current, tolerance=0.25, min_delta_ms=2.0):
+    """List regressions of current against baseline: (metric, old, new)."""
+    regressions = []
+    for endpoint, old in baseline['endpoints'].items():
+        new = current['endpoints'].get(endpoint)
+        if not new or not old.get('count') or not new.get('count'):
+            continue
+        for metric in ('p50_ms', 'p90_ms', 'p99_ms'):
+            if new[metric] > old[metric] * (1 + tolerance) and new[metric] - old[metric] > min_delta_ms:
+                regressions.append((f'{endpoint} {metric}', old[metric], new[metric]))
+        if new.get('errors', 0) > old.get('errors', 0):
+            regressions.append((f'{endpoint} errors', old.get('errors', 0), new['errors']))
+
+    old_backup = baseline['backup'].get('mean_seconds')
+    new_backup = current['backup'].get('mean_seconds')
+    if old_backup and new_backup and new_backup > old_backup * (1 + tolerance) \
+            and (new_backup - old_backup) * 1000 > min_delta_ms:
+        regressions.append(('backup mean_seconds', old_backup, new_backup))
+    return regressions
+
+
+def print_result(result):
+    meta = result['meta']
+    print(f"\n{meta['database']}: {meta['rows']:,} rows, {meta['db_size_mb']} MB, "
+          f"{result['throughput_rps']} requests/s")
+    print(f"  {'endpoint':<16}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+    for endpoint, s in result['endpoints'].items():
+        if s['count']:
+            print(f"  {endpoint:<16}{s['count']:>8}{s['p50_ms']:>10}{s['p90_ms']:>10}"
+                  f"{s['p99_ms']:>10}{s['max_ms']:>10}{s['errors']:>8}")
+    w = result['writer']
+    if w['count']:
+        print(f"  writer: {w['pages']:,} pages, batch p50 {w['p50_ms']} ms, p99 {w['p99_ms']} ms")
+    for run in result['backup']['runs']:
+        mark = '✓' if run['ok'] else '✗'
+        print(f"  {mark} backup: {run['seconds']}s, {run['size_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic-scale dashboard and backup benchmarks.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen_parser = sub.add_parser('generate', help="Build a synthetic database")
+    gen_parser.add_argument('--rows', default='110k', help="Pages to generate, e.g. 10k, 110k, 1M, 5M")
+    gen_parser.add_argument('-o', '--output', help="Database path (default: bench/synthetic_<rows>.db)")
+    gen_parser.add_argument('--seed', type=int, default=0, help="Random seed")
+
+    run_parser = sub.add_parser('run', help="Benchmark endpoints and backups against a database")
+    run_parser.add_argument('db', help="Database to benchmark (use a synthetic copy, not the live one)")
+    run_parser.add_argument('--readers', type=int, default=8, help="Concurrent reader threads")
+    run_parser.add_argument('--duration', type=float, default=30, help="Seconds of load")
+    run_parser.add_argument('--writer-rate', type=float, default=50,
+                            help="Pages/second written by the simulated scraper (0 to disable)")
+    run_parser.add_argument('--writer-batch', type=int, default=50, help="Pages per simulated write")
+    run_parser.add_argument('--backups', type=int, default=3, help="Backups to time")
+    run_parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    run_parser.add_argument('-o', '--output', help="Write results as JSON here")
+
+    cmp_parser = sub.add_parser('compare', help="Check a result against a baseline")
+    cmp_parser.add_argument('baseline')
+    cmp_parser.add_argument('current')
+    cmp_parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative slowdown")
+    cmp_parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                            help="Ignore slowdowns smaller than this, to absorb noise")
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        rows = parse_rows(args.rows)
+        output = args.output or os.path.join(BENCH_DIR, f'synthetic_{format_rows(rows)}.db')
+        start = time.time()
+        size = generate(output, rows, args.seed)
+        print(f"✓ {output}: {rows:,} pages, {size / (1024 * 1024):.1f} MB in {time.time() - start:.1f}s")
+
+    elif args.command == 'run':
+        if not os.path.exists(args.db):
+            print(f"✗ Database not found: {args.db}")
+            sys.exit(1)
+        result = run_benchmark(args.db, args.readers, args.duration, args.writer_rate,
+                               args.writer_batch, args.backups, args.seed)
+        print_result(result)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, 'w') as f:
+                json.dump(result, f, indent=2)
+            print(f"\n✓ Results written to {args.output}")
+
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        if baseline['meta']['rows'] != current['meta']['rows']:
+            print(f"⚠ Row counts differ: {baseline['meta']['rows']:,} vs {current['meta']['rows']:,}")
+        regressions = compare(baseline, current, args.tolerance, args.min_delta_ms)
+        for metric, old, new in regressions:
+            print(f"✗ {metric}: {old} → {new}")
+        if regressions:
+            sys.exit(1)
+        print(f"✓ No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Bootstrap a fresh database from a published release or a MediaWiki XML dump.
+
+Instead of running the full ~90 hour crawl, import an existing scrape (the
+snpedia.db from the Zenodo/GitHub releases) or a MediaWiki XML export, then
+let the scraper pick up only what is new. Both sources are streamed and
+written in batched transactions, so memory use stays constant.
+
+Usage:
+    python bootstrap_import.py release.db
+    python bootstrap_import.py release.db.gz
+    python bootstrap_import.py snpedia-pages.xml.bz2
+"""
+
+import argparse
+import bz2
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import snpdb  # noqa: E402
+
+DEFAULT_BATCH_SIZE = 2000
+# Pages in Category:Is_a_snp are titled Rs<number> or I<number>
+DEFAULT_TITLE_PATTERN = r'^(Rs|I)\d+$'
+
+
+def open_maybe_compressed(path):
+    """Open a plain, .gz or .bz2 file for binary reading."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def write_batch(conn, batch, replace):
+    """Insert one batch of (rsid, content, scraped_at) rows in a transaction."""
+    with conn:
+        return snpdb.save_snps(conn, batch, replace)
+
+
+def iter_release_db(path, batch_size):
+    """Yield (rsid, content, scraped_at) rows from a release database.
+
+    scraped_at is None, so rows are stamped with the import time (see bootstrap()).
+    """
+    temp_path = None
+    if path.endswith('.gz'):
+        # SQLite can't read a compressed file, so inflate it next to the target
+        fd, temp_path = tempfile.mkstemp(suffix='.db', dir=PROJECT_ROOT)
+        with os.fdopen(fd, 'wb') as out, gzip.open(path, 'rb') as src:
+            shutil.copyfileobj(src, out, 1024 * 1024)
+        path = temp_path
+
+    try:
+        src = snpdb.connect(path, readonly=True)
+        try:
+            last_rowid = 0
+            while True:
+                rows = src.execute(
+                    'SELECT rowid, rsid, content FROM snps WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                    (last_rowid, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                last_rowid = rows[-1][0]
+                for row in rows:
+                    yield row[1], row[2], None
+        finally:
+            src.close()
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+
+def _local(tag):
+    """Strip the XML namespace from a tag name."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_mediawiki_xml(path, title_pattern):
+    """Yield (rsid, content, scraped_at) rows from a MediaWiki XML export.
+
+    Uses iterparse and clears each <page> after reading it, so the tree never
+    grows beyond a single page. Revision times are not kept: scraped_at is
+    None, so rows are stamped with the import time (see bootstrap()).
+    """
+    title_re = re.compile(title_pattern) if title_pattern else None
+
+    with open_maybe_compressed(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+
+        for event, elem in context:
+            if event != 'end' or _local(elem.tag) != 'page':
+                continue
+
+            title = ns = text = None
+            is_redirect = False
+            for child in elem.iter():
+                name = _local(child.tag)
+                if name == 'title':
+                    title = child.text
+                elif name == 'ns':
+                    ns = child.text
+                elif name == 'redirect':
+                    is_redirect = True
+                elif name == 'text':
+                    text = child.text
+
+            elem.clear()
+            root.clear()
+
+            if not title or text is None or is_redirect or ns not in (None, '0'):
+                continue
+
+            rsid = title.replace(' ', '_')  # Same normalisation as the scraper
+            if title_re and not title_re.match(rsid):
+                continue
+
+            yield rsid, text, None
+
+
+def mark_bootstrapped(conn, source):
+    """Reset the crawl cursors so the scraper walks every listing from the start.
+
+    The listing is cheap (500 titles per request) and titles already in the
+    database are skipped without fetching, so only new pages cost a request.
+
+    The per-category page counts are set from the titles: Rs/I pages count
+    for Is_a_snp (snp_count) and Rs123(A;G)-style pages for Is_a_genotype.
+    Gene and medicine pages can't be told apart by title, so their counts
+    are reset. Returns the Is_a_snp count.
+    """
+    snp_count = genotype_count = 0
+    for (title,) in conn.execute('SELECT rsid FROM snps'):
+        kind = snpdb.classify_title(title)
+        if kind == snpdb.LINK_SNP:
+            snp_count += 1
+        elif kind == snpdb.LINK_GENOTYPE:
+            genotype_count += 1
+    with conn:
+        conn.execute(
+            "DELETE FROM progress WHERE key = 'cmcontinue' OR key LIKE 'cursor:%' OR key LIKE 'done:%' "
+            "OR key LIKE 'count:%'"
+        )
+        snpdb.set_progress(conn, 'snp_count', snp_count)
+        snpdb.set_progress(conn, 'count:Is_a_genotype', genotype_count)
+        snpdb.set_progress(conn, 'bootstrap_source', os.path.basename(source))
+        snpdb.set_progress(conn, 'bootstrap_at', datetime.now())
+    return snp_count
+
+
+def bootstrap(source, db_path=DB_PATH, batch_size=DEFAULT_BATCH_SIZE,
+              title_pattern=DEFAULT_TITLE_PATTERN, replace=False):
+    """Import a release DB or XML dump. Returns (rows_read, rows_written, snp_count).
+
+    Imported rows get the import time as scraped_at, not the source's scrape
+    or revision time. /status rates, export --since deltas and the analytics
+    refresh all read scraped_at as "written to this database at", and
+    years-old times would hide the import from each of them.
+    """
+    name = source.lower()
+    if name.endswith(('.xml', '.xml.gz', '.xml.bz2')):
+        rows = iter_mediawiki_xml(source, title_pattern)
+    else:
+        rows = iter_release_db(source, batch_size)
+
+    conn = sqlite3.connect(db_path)
+    snpdb.create_tables(conn)
+
+    read = written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            written += write_batch(conn, batch, replace)
+            read += len(batch)
+            batch = []
+            print(f"\r  Imported {written:,} of {read:,} pages read...", end='', flush=True)
+    if batch:
+        written += write_batch(conn, batch, replace)
+        read += len(batch)
+
+    snp_count = mark_bootstrapped(conn, source)
+    conn.close()
+    return read, written, snp_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap snpedia.db from a release DB or MediaWiki XML dump.")
+    parser.add_argument('source', help="Release .db(.gz) or MediaWiki .xml(.gz/.bz2) file")
+    parser.add_argument('--db', default=DB_PATH, help="Target database path")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows per transaction")
+    parser.add_argument('--titles', default=DEFAULT_TITLE_PATTERN,
+                        help="Regex of page titles to import from XML (default: SNP pages only)")
+    parser.add_argument('--all-pages', action='store_true', help="Import every main-namespace page from XML")
+    parser.add_argument('--replace', action='store_true', help="Overwrite rows that already exist")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"✗ Source not found: {args.source}")
+        sys.exit(1)
+
+    print("=== SNPedia Bootstrap Import ===")
+    print(f"Source: {args.source}")
+    print(f"Target: {args.db}\n")
+
+    start = time.time()
+    read, written, snp_count = bootstrap(
+        args.source, args.db, args.batch_size,
+        None if args.all_pages else args.titles, args.replace
+    )
+
+    print(f"\n\n✓ Read {read:,} pages, wrote {written:,} rows in {time.time() - start:.1f}s")
+    print(f"  Database now holds {snp_count:,} SNP pages")
+    print("  Run the scraper to fetch anything newer than the import.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Publish and apply compact changesets between two scrapes.
+
+`diff` compares two databases row by row (both sides are walked in rsid
+order, so memory stays constant) and writes only the added, changed and
+removed pages to a gzip-compressed JSONL file. `apply` patches a downstream
+database in place in a single transaction, checking each changed or removed
+row against the content hash the publisher saw.
+
+Usage:
+    python changeset.py diff old.db new.db changes.jsonl.gz
+    python changeset.py apply changes.jsonl.gz [--db snpedia.db]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import snpdb  # noqa: E402
+
+FORMAT = 'snpedia-changeset'
+FORMAT_VERSION = 1
+
+
+class ChangesetConflict(Exception):
+    """The target database doesn't match the changeset's base state."""
+
+
+def content_sha1(content):
+    return snpdb.content_hash(content).hex()
+
+
+def iter_rows(path):
+    """Yield (rsid, sha1, conn) in rsid order from a database.
+
+    Uses the stored content_hash when there is one. Content is only loaded
+    through load_content() when a row differs, so unchanged rows are
+    compared by hash alone.
+    """
+    conn = snpdb.connect(path, readonly=True)
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(snps)')}
+    hash_column = 'content_hash' if 'content_hash' in columns else 'NULL'
+    try:
+        cursor = conn.execute(f'SELECT rsid, {hash_column} FROM snps ORDER BY rsid')
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for rsid, digest in rows:
+                if digest is None:
+                    yield rsid, content_sha1(load_content(conn, rsid)[0]), conn
+                else:
+                    yield rsid, digest.hex(), conn
+    finally:
+        conn.close()
+
+
+def load_content(conn, rsid):
+    return conn.execute('SELECT content, scraped_at FROM snps WHERE rsid = ?', (rsid,)).fetchone()
+
+
+def iter_changes(old_path, new_path):
+    """Merge-join two databases on rsid and yield change records."""
+    old_rows = iter_rows(old_path)
+    new_rows = iter_rows(new_path)
+    old = next(old_rows, None)
+    new = next(new_rows, None)
+
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            yield {'op': 'remove', 'rsid': old[0], 'base_sha1': old[1]}
+            old = next(old_rows, None)
+        elif old is None or new[0] < old[0]:
+            content, scraped_at = load_content(new[2], new[0])
+            yield {'op': 'add', 'rsid': new[0], 'content': content,
+                   'scraped_at': scraped_at, 'sha1': new[1]}
+            new = next(new_rows, None)
+        else:
+            if old[1] != new[1]:
+                content, scraped_at = load_content(new[2], new[0])
+                yield {'op': 'change', 'rsid': new[0], 'content': content,
+                       'scraped_at': scraped_at, 'sha1': new[1], 'base_sha1': old[1]}
+            old = next(old_rows, None)
+            new = next(new_rows, None)
+
+
+def write_changeset(old_path, new_path, out_path):
+    """Write a changeset file. Returns the counts per operation."""
+    counts = {'add': 0, 'change': 0, 'remove': 0}
+    # Records go to a temp file first so the header can carry the counts
+    body_path = out_path + '.part'
+    with gzip.open(body_path, 'wt', encoding='utf-8') as body:
+        for record in iter_changes(old_path, new_path):
+            counts[record['op']] += 1
+            body.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    conn = snpdb.connect(new_path, readonly=True)
+    target_count = conn.execute('SELECT COUNT(*) FROM snps').fetchone()[0]
+    conn.close()
+
+    header = {
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'created': datetime.now().isoformat(),
+        'base': os.path.basename(old_path),
+        'target': os.path.basename(new_path),
+        'target_count': target_count,
+        'counts': counts,
+    }
+    with gzip.open(out_path, 'wt', encoding='utf-8') as out, \
+            gzip.open(body_path, 'rt', encoding='utf-8') as body:
+        out.write(json.dumps(header) + '\n')
+        for line in body:
+            out.write(line)
+    os.remove(body_path)
+    return header
+
+
+def apply_changeset(path, db_path=DB_PATH, force=False):
+    """Apply a changeset to db_path in one transaction. Returns the header.
+
+    Raises ChangesetConflict (and leaves the database untouched) if a row
+    doesn't match the base state, unless force is set.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    snpdb.create_tables(conn)
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != FORMAT or header.get('version') != FORMAT_VERSION:
+            conn.close()
+            raise ValueError(f"Not a version {FORMAT_VERSION} changeset: {path}")
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for line in f:
+                record = json.loads(line)
+                op = record['op']
+                rsid = record['rsid']
+
+                if not force:
+                    row = conn.execute('SELECT content_hash FROM snps WHERE rsid = ?', (rsid,)).fetchone()
+                    if row is None:
+                        current = None
+                    elif row[0] is not None:
+                        current = row[0].hex()
+                    else:
+                        current = content_sha1(load_content(conn, rsid)[0])
+                    # Rows already in their target state are accepted, so
+                    # re-applying the same changeset is harmless.
+                    if op == 'add':
+                        expected = (None, record['sha1'])
+                    elif op == 'change':
+                        expected = (record['base_sha1'], record['sha1'])
+                    else:
+                        expected = (record['base_sha1'], None)
+                    if current not in expected:
+                        raise ChangesetConflict(f"{rsid}: row does not match the changeset base ({op})")
+
+                if op == 'remove':
+                    conn.execute('DELETE FROM snps WHERE rsid = ?', (rsid,))
+                else:
+                    snpdb.save_snp(conn, rsid, record['content'], record['scraped_at'])
+
+            count = conn.execute('SELECT COUNT(*) FROM snps').fetchone()[0]
+            if not force and count != header['target_count']:
+                raise ChangesetConflict(
+                    f"Row count after apply is {count}, expected {header['target_count']}"
+                )
+            snpdb.set_progress(conn, 'snp_count', count)
+            snpdb.set_progress(conn, 'changeset_applied', header['target'])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    return header
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish or apply SNPedia changesets.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    diff_parser = sub.add_parser('diff', help="Write the changes between two databases")
+    diff_parser.add_argument('old', help="Previous database")
+    diff_parser.add_argument('new', help="Current database")
+    diff_parser.add_argument('output', help="Changeset file (.jsonl.gz)")
+
+    apply_parser = sub.add_parser('apply', help="Apply a changeset to a database")
+    apply_parser.add_argument('changeset', help="Changeset file (.jsonl.gz)")
+    apply_parser.add_argument('--db', default=DB_PATH, help="Database to patch")
+    apply_parser.add_argument('--force', action='store_true', help="Skip base-state checks")
+
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        for path in (args.old, args.new):
+            if not os.path.exists(path):
+                print(f"✗ Database not found: {path}")
+                sys.exit(1)
+        header = write_changeset(args.old, args.new, args.output)
+        counts = header['counts']
+        size_kb = os.path.getsize(args.output) / 1024
+        print(f"✓ Changeset written: {args.output} ({size_kb:.1f} KB)")
+        print(f"  Added: {counts['add']}  Changed: {counts['change']}  Removed: {counts['remove']}")
+    else:
+        try:
+            header = apply_changeset(args.changeset, args.db, args.force)
+        except (ChangesetConflict, ValueError) as e:
+            print(f"✗ Changeset not applied: {e}")
+            sys.exit(1)
+        counts = header['counts']
+        print(f"✓ Applied {args.changeset} ({header['base']} → {header['target']})")
+        print(f"  Added: {counts['add']}  Changed: {counts['change']}  Removed: {counts['remove']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,15 +13,32 @@ import shutil
 import sys
 import threading
 import time
+import gzip
+import hashlib
+import multiprocessing
+import queue
+from collections import OrderedDict, deque
 
 # --- Path Setup ---
 # Use an absolute path to ensure we always find the correct files.
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
 DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
 BACKUP_DIR = os.path.join(PROJECT_ROOT, 'backups')
+PROFILE_DIR = os.path.join(PROJECT_ROOT, 'profiles')
 BACKUP_CONFIG_PATH = os.path.join(PROJECT_ROOT, 'backup_config.json')
+FRONTEND_DIR = os.path.join(PROJECT_ROOT, 'frontend')
+DIST_DIR = os.path.join(PROJECT_ROOT, 'static', 'dist')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
 
-app = Flask(__name__)
+import analytics
+import backups
+import profiler
+import snpdb
+import storage
+from snpedia_scraper import CATEGORIES as SCRAPER_CATEGORIES, SNPediaScraper
+
+# Static files are served by the routes below, with their own cache policy
+app = Flask(__name__, static_folder=None)
 # Configure CORS more restrictively
 CORS(app, origins=['http://localhost:5000', 'http://127.0.0.1:5000'])
 
@@ -31,9 +48,11 @@ def set_security_headers(response):
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'DENY'
     response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    # Responses with an ETag set their own (revalidating) cache policy
+    if 'ETag' not in response.headers:
+        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '0'
     return response
 
 # Backup Manager Class
@@ -67,10 +86,8 @@ class BackupManager:
         if not os.path.exists(DB_PATH):
             return 0
         try:
-            conn = sqlite3.connect(DB_PATH)
-            count = conn.execute('SELECT COUNT(*) FROM snps').fetchone()[0]
-            conn.close()
-            return count
+            with storage.open_store(DB_PATH, readonly=True) as store:
+                return store.count()
         except:
             return 0
     
@@ -91,7 +108,12 @@ class BackupManager:
         try:
             shutil.copy2(DB_PATH, backup_path)
             self.last_backup_time = datetime.now()
-            print(f"✓ Backup created: {backup_name}")
+            # Checksum and row count for later verification
+            entry = backups.record_backup(backup_path)
+            if entry.get('status') == 'corrupt':
+                print(f"✗ Backup {backup_name} failed its integrity check: {entry['error']}")
+            else:
+                print(f"✓ Backup created: {backup_name}")
             
             # Cleanup based on strategy
             if self.config['strategy'] == 'rolling':
@@ -225,19 +247,686 @@ class BackupManager:
 # Initialize backup manager
 backup_manager = BackupManager()
 
+class BackupVerifier:
+    """Verifies every backup in a process pool from a background thread (POST /backup/verify)."""
+
+    def __init__(self):
+        self.thread = None
+        self.checked = 0
+        self.total = 0
+        self.last_run = None
+        self.last_error = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, jobs=None, quick=False):
+        if self.running:
+            return False
+        self.checked, self.total = 0, len(backups.backup_files(BACKUP_DIR))
+        self.thread = threading.Thread(target=self._run, args=(jobs, quick), daemon=True)
+        self.thread.start()
+        return True
+
+    def _run(self, jobs, quick):
+        start = time.time()
+        try:
+            # spawn: forking a threaded server can copy locks held by other threads
+            results = backups.verify_backups(BACKUP_DIR, jobs, quick=quick,
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             progress_callback=self._on_result)
+            counts = {}
+            for result in results:
+                counts[result['status']] = counts.get(result['status'], 0) + 1
+            self.last_run = {"finished": datetime.now().isoformat(), "seconds": round(time.time() - start, 1),
+                             "quick": quick, "results": counts}
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Backup verification error: {e}")
+
+    def _on_result(self, result):
+        self.checked += 1
+        if result['status'] not in ('ok', 'unrecorded'):
+            print(f"✗ Backup {result['file']}: {result['status']} ({result['error']})")
+
+    def status(self):
+        return {
+            "running": self.running,
+            "checked": self.checked,
+            "total": self.total,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
+
+backup_verifier = BackupVerifier()
+
+# Hosted Scraper
+class ScraperHost:
+    """Runs SNPediaScraper inside the dashboard process (--with-scraper).
+
+    The scraper's callbacks feed a ring buffer of recent events and a live
+    state snapshot, so the dashboard reports exactly what the scraper is
+    doing instead of guessing from the age of the last row.
+    """
+
+    def __init__(self, max_events=200):
+        self.scraper = None
+        self.events = deque(maxlen=max_events)
+        self.state = {
+            "phase": "idle",
+            "current": None,
+            "count": 0,
+            "total": 0,
+            "last_error": None,
+            "wait_until": None,
+            "wait_reason": None,
+        }
+        # Bumped on every change; part of the /status ETag
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    @property
+    def hosted(self):
+        return self.scraper is not None
+
+    def enable(self, categories=None):
+        """Create the scraper (idle until started)."""
+        if self.scraper is None:
+            self.scraper = SNPediaScraper(
+                db_path=DB_PATH,
+                status_callback=self._on_status,
+                log_callback=self._on_log,
+                state_callback=self._on_state,
+                categories=categories
+            )
+            count, total = self.scraper.get_current_progress()
+            with self.lock:
+                self.state['count'] = count
+                self.state['total'] = total
+
+    def halt(self, timeout=45):
+        """Stop the scraper and wait for its thread. Returns False if it didn't stop."""
+        self.scraper.stop()
+        if self.scraper._thread is not None:
+            self.scraper._thread.join(timeout)
+            return not self.scraper._thread.is_alive()
+        return True
+
+    def reopen_store(self):
+        """Point the scraper at the database file as it is now (after a restore)."""
+        old_store = self.scraper.store
+        self.scraper.store = storage.open_store(DB_PATH)
+        old_store.close()
+
+    def _on_status(self, count, total, current):
+        with self.lock:
+            self.state['count'] = count
+            self.state['total'] = total
+            self.state['current'] = current
+            self.generation += 1
+
+    def _on_log(self, message):
+        with self.lock:
+            self.events.append({"time": datetime.now().strftime('%H:%M:%S'), "message": message})
+            self.generation += 1
+
+    def _on_state(self, phase, details):
+        with self.lock:
+            self.state['phase'] = phase
+            if phase == 'waiting':
+                self.state['wait_until'] = time.time() + details['seconds']
+                self.state['wait_reason'] = details['reason']
+            else:
+                self.state['wait_until'] = None
+                self.state['wait_reason'] = None
+            if phase == 'error':
+                self.state['last_error'] = {
+                    "time": datetime.now().isoformat(),
+                    "rsid": details.get('rsid'),
+                    "error": details.get('error'),
+                }
+            if phase not in ('waiting', 'fetching'):
+                # Waits and fetches happen every few seconds; keep the buffer for the rest
+                self.events.append({
+                    "time": datetime.now().strftime('%H:%M:%S'),
+                    "message": f"Phase: {phase}",
+                    **{k: v for k, v in details.items() if v is not None}
+                })
+            self.generation += 1
+
+    def status(self):
+        """active / paused / stopping / stopped / idle, straight from the scraper's flags."""
+        if self.scraper.running:
+            return "paused" if self.scraper.paused else "active"
+        if self.scraper.stopping:
+            return "stopping"
+        return "stopped" if self.state['phase'] == 'stopped' else "idle"
+
+    def snapshot(self, max_events=50):
+        with self.lock:
+            state = dict(self.state)
+            events = list(self.events)[-max_events:]
+        wait_until = state.pop('wait_until')
+        state['wait_seconds'] = round(max(0, wait_until - time.time()), 1) if wait_until else None
+        state.update({
+            "hosted": True,
+            "status": self.status(),
+            "running": self.scraper.running,
+            "paused": self.scraper.paused,
+            "categories": self.scraper.category_progress(),
+            "events": events,
+        })
+        return state
+
+    def start(self):
+        if self.scraper.running or self.scraper.stopping:
+            return False
+        self.scraper.start()
+        return True
+
+    def pause(self):
+        if not self.scraper.running or self.scraper.paused:
+            return False
+        self.scraper.pause()
+        return True
+
+    def resume(self):
+        if not self.scraper.running or not self.scraper.paused:
+            return False
+        self.scraper.resume()
+        return True
+
+    def stop(self):
+        if not self.scraper.running:
+            return False
+        self.scraper.stop()
+        return True
+
+scraper_host = ScraperHost()
+
+# Background Migrations
+class MigrationRunner:
+    """Runs pending schema backfills in a background thread (POST /migrations/run).
+
+    Uses its own write connection. Every batch is a short transaction, so a
+    hosted or separate scraper keeps writing while the backfills run.
+    """
+
+    def __init__(self):
+        self.thread = None
+        self.current = None
+        self.last_result = None
+        self.last_error = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, batch_size=5000, pause=0.05):
+        if self.running:
+            return False
+        self.thread = threading.Thread(target=self._run, args=(batch_size, pause), daemon=True)
+        self.thread.start()
+        return True
+
+    def _run(self, batch_size, pause):
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        try:
+            snpdb.create_tables(conn)
+            self.last_result = snpdb.run_backfills(conn, batch_size, pause, self._on_progress)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Migration error: {e}")
+        finally:
+            conn.close()
+            self.current = None
+
+    def _on_progress(self, name, done, total):
+        self.current = {"backfill": name, "rowid": done, "max_rowid": total}
+
+    def status(self):
+        return {
+            "running": self.running,
+            "current": self.current,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+migration_runner = MigrationRunner()
+
+# Sampling profiler for this process (hosted scraper and request threads)
+sampling_profiler = profiler.SamplingProfiler(PROFILE_DIR)
+
+# Read-only Connection Pool
+class ConnectionPool:
+    """Thread-safe pool of read-only SQLite connections.
+
+    Connections are opened with mode=ro and reused across requests instead
+    of being opened and configured on every call. A separate probe
+    connection reads PRAGMA data_version, which only changes when another
+    connection (the scraper) commits, so callers can tell whether anything
+    changed without running a query.
+    """
+
+    def __init__(self, db_path, size=8):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._probe = None
+        self._inode = None
+        # Connections handed out before a reset are closed when returned
+        self._generation = 0
+        self._checked_out = {}
+
+    def _connect(self):
+        conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Enable read-only mode for safety
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA mmap_size = 268435456")  # 256 MB
+        conn.execute("PRAGMA cache_size = -16000")    # 16 MB page cache
+        return conn
+
+    def acquire(self, timeout=10):
+        """Take a connection from the pool, or None if there's no database."""
+        if not os.path.exists(self.db_path):
+            return None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        if conn is None:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    try:
+                        conn = self._connect()
+                    except sqlite3.Error:
+                        self._created -= 1
+                        raise
+        if conn is None:
+            conn = self._idle.get(timeout=timeout)
+        with self._lock:
+            self._checked_out[id(conn)] = self._generation
+        return conn
+
+    def release(self, conn):
+        if conn is None:
+            return
+        with self._lock:
+            generation = self._checked_out.pop(id(conn), None)
+            if generation != self._generation:
+                conn.close()
+                self._created -= 1
+                return
+        self._idle.put(conn)
+
+    def data_version(self):
+        """(inode, data_version) of the database, or None if it doesn't exist.
+
+        The inode changes if the file is replaced (e.g. a restore), in which
+        case every pooled connection still points at the old file and is
+        dropped.
+        """
+        try:
+            inode = os.stat(self.db_path).st_ino
+        except OSError:
+            return None
+        with self._lock:
+            if self._inode != inode:
+                self._reset_locked()
+                self._inode = inode
+            if self._probe is None:
+                self._probe = sqlite3.connect(
+                    f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False
+                )
+            return inode, self._probe.execute('PRAGMA data_version').fetchone()[0]
+
+    def reset(self):
+        """Close all idle connections; they are reopened on demand."""
+        with self._lock:
+            self._reset_locked()
+
+    def _reset_locked(self):
+        self._generation += 1
+        if self._probe is not None:
+            self._probe.close()
+            self._probe = None
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            self._created -= 1
+
+db_pool = ConnectionPool(DB_PATH)
+
 def get_db_connection():
-    """Establishes a connection to the SQLite database."""
-    if not os.path.exists(DB_PATH):
+    """Gets a read-only connection from the pool (release with release_db_connection)."""
+    return db_pool.acquire()
+
+def release_db_connection(conn):
+    db_pool.release(conn)
+
+def db_etag(name, max_age=None):
+    """ETag for a response derived only from the database state.
+
+    max_age adds a time bucket for responses that also depend on the clock
+    (e.g. "active" vs "paused").
+    """
+    version = db_pool.data_version()
+    if version is None:
         return None
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    # Enable read-only mode for safety
-    conn.execute("PRAGMA query_only = ON")
-    return conn
+    etag = f'{name}-{version[0]}-{version[1]}'
+    if max_age:
+        etag += f'-{int(time.time() // max_age)}'
+    return etag
+
+# Analytics Cache
+class AnalyticsRefresher:
+    """Keeps the analytics cache current from a background thread.
+
+    A refresh is started whenever PRAGMA data_version has moved since the
+    last one. Requests wait briefly for it, so a few new pages are included
+    at once, but a large (first) build never holds up a request: until it
+    finishes they are answered from the rows parsed so far.
+    """
+
+    def __init__(self, wait=1.0):
+        self.wait = wait
+        self.cache = None
+        self.thread = None
+        self.version = None
+        self.progress = None
+        self.last_error = None
+        self.lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def get(self):
+        """The cache, refreshed if the database changed. Raises RuntimeError without NumPy."""
+        with self.lock:
+            if self.cache is None:
+                self.cache = analytics.AnalyticsCache(DB_PATH)
+            version = db_pool.data_version()
+            if version is not None and version != self.version and not self.running:
+                # The file was replaced (or this is the first refresh): check the cached rows
+                verify = self.version is None or self.version[0] != version[0]
+                self.thread = threading.Thread(target=self._run, args=(version, verify), daemon=True)
+                self.thread.start()
+            thread = self.thread
+        if thread is not None:
+            thread.join(self.wait)
+        return self.cache
+
+    def _run(self, version, verify):
+        try:
+            conn = snpdb.connect(DB_PATH, readonly=True)
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+            return
+        try:
+            self.cache.refresh(conn, verify=verify, progress_callback=self._on_progress)
+            self.version = version
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Analytics refresh error: {e}")
+        finally:
+            conn.close()
+            self.progress = None
+
+    def _on_progress(self, rowid, max_rowid):
+        self.progress = {"rowid": rowid, "max_rowid": max_rowid}
+
+    def status(self):
+        status = self.cache.status() if self.cache else {}
+        status.update(refreshing=self.running, progress=self.progress, last_error=self.last_error)
+        return status
+
+analytics_refresher = AnalyticsRefresher()
+
+# SNP Lookup Cache
+class SNPCache:
+    """Size-bounded LRU cache of SNP records for the lookup API.
+
+    Entries are tagged with the PRAGMA data_version they were read under.
+    When another connection commits (e.g. the scraper), data_version moves
+    and stale entries are revalidated against their content hash, a
+    fixed-size index read, before being served again.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (data_version, record or None, size)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version, record):
+        size = 200 + (len(record['content'] or '') if record else 0)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            self.entries[key] = (version, record, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted[2]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "size_mb": round(self.size / (1024 * 1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def count(self, hits, misses):
+        # += on shared ints isn't atomic across request threads
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+
+snp_cache = SNPCache()
+
+MAX_BULK_IDS = 10000
+GZIP_MIN_SIZE = 1024
+
+def snp_cache_key(snp_id):
+    """Rs/I ids share a key regardless of case; other titles are exact."""
+    key = snpdb.parse_snp_id(snp_id)
+    return key if key is not None else snp_id
+
+def fetch_snp_records(conn, snp_ids):
+    """Read records for the given ids. Returns {id: record or None}."""
+    # Several spellings of one id (rs53576, Rs53576) share a key and a title,
+    # so both map to the list of requested ids they answer
+    keyed = {}
+    titles = {}
+    for snp_id in snp_ids:
+        key = snpdb.parse_snp_id(snp_id)
+        if key is not None:
+            keyed.setdefault(key, []).append(snp_id)
+        else:
+            titles.setdefault(snp_id, []).append(snp_id)
+
+    for key, title in snpdb.lookup_keys(conn, keyed).items():
+        titles.setdefault(title, []).extend(keyed[key])
+
+    records = dict.fromkeys(snp_ids)
+    title_list = list(titles)
+    for i in range(0, len(title_list), snpdb.MAX_SQL_VARIABLES):
+        chunk = title_list[i:i + snpdb.MAX_SQL_VARIABLES]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f'''
+            SELECT rsid, content, scraped_at, version, content_hash
+            FROM snps WHERE rsid IN ({placeholders})
+        ''', chunk).fetchall()
+        for row in rows:
+            digest = row['content_hash'] or snpdb.content_hash(row['content'])
+            record = {
+                "rsid": row['rsid'],
+                "content": row['content'],
+                "scraped_at": row['scraped_at'],
+                "version": row['version'],
+                "content_hash": digest.hex(),
+            }
+            for snp_id in titles[row['rsid']]:
+                records[snp_id] = record
+    return records
+
+def lookup_snps(conn, snp_ids):
+    """Look up SNP records through the cache. Returns {id: record or None}."""
+    version = db_pool.data_version()
+    results = {}
+    stale = {}
+    missing = []
+
+    for snp_id in snp_ids:
+        entry = snp_cache.get(snp_cache_key(snp_id))
+        if entry is None:
+            missing.append(snp_id)
+        elif entry[0] == version:
+            results[snp_id] = entry[1]
+        else:
+            stale[snp_id] = entry[1]
+
+    # Stale hits are still good if the stored hash hasn't changed
+    stale_titles = {record['rsid']: snp_id for snp_id, record in stale.items() if record}
+    title_list = list(stale_titles)
+    current = {}
+    for i in range(0, len(title_list), snpdb.MAX_SQL_VARIABLES):
+        chunk = title_list[i:i + snpdb.MAX_SQL_VARIABLES]
+        placeholders = ','.join('?' * len(chunk))
+        current.update(conn.execute(
+            f'SELECT rsid, content_hash FROM snps WHERE rsid IN ({placeholders})', chunk
+        ).fetchall())
+    for snp_id, record in stale.items():
+        digest = current.get(record['rsid']) if record else None
+        if digest is not None and digest.hex() == record['content_hash']:
+            snp_cache.put(snp_cache_key(snp_id), version, record)
+            results[snp_id] = record
+        else:
+            missing.append(snp_id)
+
+    snp_cache.count(len(results), len(missing))
+    if missing:
+        for snp_id, record in fetch_snp_records(conn, missing).items():
+            snp_cache.put(snp_cache_key(snp_id), version, record)
+            results[snp_id] = record
+    return results
+
+def not_modified(etag):
+    """A 304 response if the client already has this ETag, else None."""
+    if etag is None:
+        return None
+    if not (request.if_none_match.contains(etag) or request.if_none_match.contains(etag + '-gz')):
+        return None
+    use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    response = app.response_class(status=304)
+    response.set_etag(etag + '-gz' if use_gzip else etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def etag_json(payload, etag):
+    """JSON response carrying an ETag, gzipped when the client accepts it."""
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    response = app.response_class(body, mimetype='application/json')
+    if etag is None:
+        return response
+    if 'gzip' in request.headers.get('Accept-Encoding', '') and len(body) >= GZIP_MIN_SIZE:
+        response.set_data(gzip.compress(body, 5))
+        response.headers['Content-Encoding'] = 'gzip'
+        etag += '-gz'
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/snp/<rsid>')
+def get_snp(rsid):
+    """Look up a single SNP or genotype page, e.g. /snp/rs53576."""
+    conn = get_db_connection()
+    if conn is None:
+        return jsonify({"error": "Database not found"}), 404
+
+    try:
+        record = lookup_snps(conn, [rsid])[rsid]
+    finally:
+        release_db_connection(conn)
+
+    if record is None:
+        return jsonify({"error": f"{rsid} not found"}), 404
+    cached = not_modified(record['content_hash'])
+    if cached is not None:
+        return cached
+    return etag_json(record, record['content_hash'])
+
+@app.route('/snps', methods=['POST'])
+def get_snps_bulk():
+    """Bulk lookup. Body: {"rsids": ["rs53576", ...]} (up to MAX_BULK_IDS)."""
+    data = request.get_json(silent=True)
+    snp_ids = data.get('rsids') if isinstance(data, dict) else data
+    if not isinstance(snp_ids, list) or not all(isinstance(i, str) for i in snp_ids):
+        return jsonify({"error": "Expected a JSON list of rsids"}), 400
+    if len(snp_ids) > MAX_BULK_IDS:
+        return jsonify({"error": f"At most {MAX_BULK_IDS} rsids per request"}), 400
+
+    conn = get_db_connection()
+    if conn is None:
+        return jsonify({"error": "Database not found"}), 404
+
+    try:
+        records = lookup_snps(conn, list(dict.fromkeys(snp_ids)))
+    finally:
+        release_db_connection(conn)
+
+    digest = hashlib.sha1()
+    for snp_id in sorted(records):
+        record = records[snp_id]
+        digest.update(f"{snp_id}:{record['content_hash'] if record else '-'};".encode('utf-8'))
+
+    etag = digest.hexdigest()
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    return etag_json({
+        "results": {snp_id: record for snp_id, record in records.items() if record},
+        "missing": [snp_id for snp_id, record in records.items() if record is None],
+    }, etag)
 
 @app.route('/status')
 def get_status():
     """Reads the latest progress from the database and returns it."""
+    # Unchanged database: answer from the client's copy without a query
+    etag = db_etag('status', max_age=10)
+    if etag and scraper_host.hosted:
+        etag += f'-h{scraper_host.generation}'
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     conn = get_db_connection()
     
     if conn is None:
@@ -321,6 +1010,19 @@ def get_status():
             "eta_hours": round(eta_hours, 1) if eta_hours else None,
             "last_update": stats['latest_time'] if stats['latest_time'] else None
         }
+
+        if scraper_host.hosted:
+            # Exact state from the hosted scraper replaces the timestamp heuristic
+            live = scraper_host.snapshot(max_events=0)
+            status.update({
+                "status": live['status'],
+                "hosted": True,
+                "phase": live['phase'],
+                "wait_seconds": live['wait_seconds'],
+                "last_error": live['last_error'],
+            })
+            if live['current']:
+                status['current'] = live['current']
         
     except Exception as e:
         app.logger.error(f"Database error: {e}")
@@ -334,14 +1036,87 @@ def get_status():
             "eta_hours": None
         }), 500
     finally:
-        if conn:
-            conn.close()
-            
+        release_db_connection(conn)
+
+    return etag_json(status, etag)
+
+@app.route('/scraper/state')
+def get_scraper_state():
+    """Live state of the hosted scraper plus its recent events."""
+    if not scraper_host.hosted:
+        return jsonify({"hosted": False})
+    return jsonify(scraper_host.snapshot())
+
+def scraper_control(action, error):
+    if not scraper_host.hosted:
+        return jsonify({"error": "Scraper is not hosted here. Run: python dashboard.py --with-scraper"}), 400
+    try:
+        if getattr(scraper_host, action)():
+            return jsonify({"success": True, "state": scraper_host.snapshot(max_events=0)})
+        return jsonify({"error": error}), 400
+    except Exception as e:
+        app.logger.error(f"Scraper {action} error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/scraper/start', methods=['POST'])
+def start_scraper():
+    """Start the hosted scraper."""
+    return scraper_control('start', "Scraper already running or still stopping")
+
+@app.route('/scraper/pause', methods=['POST'])
+def pause_scraper():
+    """Pause the hosted scraper."""
+    return scraper_control('pause', "Scraper not running or already paused")
+
+@app.route('/scraper/resume', methods=['POST'])
+def resume_scraper():
+    """Resume the hosted scraper."""
+    return scraper_control('resume', "Scraper not paused")
+
+@app.route('/scraper/stop', methods=['POST'])
+def stop_scraper():
+    """Stop the hosted scraper."""
+    return scraper_control('stop', "Scraper not running")
+
+@app.route('/migrations')
+def get_migrations():
+    """Schema version, per-migration backfill progress and runner state."""
+    conn = get_db_connection()
+    if conn is None:
+        return jsonify({"error": "Database not found"}), 404
+    try:
+        status = snpdb.migration_status(conn)
+    except Exception as e:
+        app.logger.error(f"Migration status error: {e}")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        release_db_connection(conn)
+    status['runner'] = migration_runner.status()
     return jsonify(status)
 
+@app.route('/migrations/run', methods=['POST'])
+def run_migrations():
+    """Apply pending migrations and run their backfills in the background."""
+    if not os.path.exists(DB_PATH):
+        return jsonify({"error": "Database not found"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        batch_size = max(100, int(data.get('batch_size', 5000)))
+        pause = max(0.0, float(data.get('pause', 0.05)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "batch_size and pause must be numbers"}), 400
+    if not migration_runner.start(batch_size, pause):
+        return jsonify({"error": "Migrations already running"}), 400
+    return jsonify({"success": True, "runner": migration_runner.status()})
+
 @app.route('/stats')
 def get_detailed_stats():
     """Get detailed statistics about the scraping progress."""
+    etag = db_etag('stats', max_age=60)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     conn = get_db_connection()
     
     if conn is None:
@@ -396,6 +1171,7 @@ def get_detailed_stats():
                 "last_scrape": stats['last_scrape']
             },
             "database_size_mb": round(db_size_mb, 1),
+            "lookup_cache": snp_cache.stats(),
             "hourly_progress": [
                 {"hour": row['hour'], "count": row['count']} 
                 for row in hourly_stats
@@ -406,19 +1182,85 @@ def get_detailed_stats():
         app.logger.error(f"Stats error: {e}")
         return jsonify({"error": "Failed to get statistics"}), 500
     finally:
-        if conn:
-            conn.close()
-    
-    return jsonify(result)
+        release_db_connection(conn)
+
+    return etag_json(result, etag)
+
+@app.route('/analytics')
+def get_analytics():
+    """Grouped counts and magnitude statistics from the analytics cache.
+
+    e.g. /analytics?group_by=gene&kind=genotype&repute=bad&limit=20
+    group_by: chromosome, gene, magnitude, repute or kind. Filters: kind
+    (genotype, snp, other, all), min_magnitude, repute, chromosome, gene.
+    """
+    if not os.path.exists(DB_PATH):
+        return jsonify({"error": "Database not found"}), 404
+    try:
+        cache = analytics_refresher.get()
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 501
+
+    args = request.args
+    try:
+        min_magnitude = args.get('min_magnitude', type=float)
+        limit = args.get('limit', type=int)
+        result = cache.aggregate(
+            args.get('group_by', 'chromosome'), args.get('kind', 'genotype'),
+            min_magnitude, args.get('repute'), args.get('chromosome'), args.get('gene'), limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result['cache'] = analytics_refresher.status()
+    # 202 while a refresh is still parsing pages, so the counts may lag
+    return jsonify(result), 202 if result['cache']['refreshing'] else 200
+
+@app.route('/profile')
+def get_profile_status():
+    """Running profile, the last result's hottest frames, and saved profiles."""
+    status = sampling_profiler.status()
+    status['profiles'] = sampling_profiler.profiles()
+    return jsonify(status)
+
+@app.route('/profile/start', methods=['POST'])
+def start_profile():
+    """Sample every thread for a fixed window (JSON body: duration, interval)."""
+    data = request.get_json(silent=True) or {}
+    try:
+        duration = float(data.get('duration', 30))
+        interval = float(data.get('interval', 0.01))
+    except (TypeError, ValueError):
+        return jsonify({"error": "duration and interval must be numbers"}), 400
+    if not sampling_profiler.start(duration, interval, label='dashboard'):
+        return jsonify({"error": "A profile is already running"}), 400
+    return jsonify({"success": True, "profile": sampling_profiler.status()})
+
+@app.route('/profile/stop', methods=['POST'])
+def stop_profile():
+    """End the running profile early; it is still written out."""
+    if not sampling_profiler.running:
+        return jsonify({"error": "No profile running"}), 400
+    sampling_profiler.stop()
+    return jsonify({"success": True})
+
+@app.route('/profile/<filename>')
+def download_profile(filename):
+    """A saved profile in collapsed-stack form (for flamegraph.pl or speedscope)."""
+    if '..' in filename or '/' in filename or '\\' in filename or not filename.endswith('.folded'):
+        return jsonify({"error": "Invalid filename"}), 400
+    if not os.path.exists(os.path.join(PROFILE_DIR, filename)):
+        return jsonify({"error": "Profile not found"}), 404
+    return send_from_directory(PROFILE_DIR, filename, mimetype='text/plain')
 
 @app.route('/backup/status')
 def get_backup_status():
     """Get current backup system status."""
     try:
         # Get backup list
-        backups = []
+        backup_list = []
         if os.path.exists(BACKUP_DIR):
-            for backup_file in sorted(glob.glob(os.path.join(BACKUP_DIR, 'snpedia_backup_*.db')), reverse=True):
+            manifest = backups.load_manifest(BACKUP_DIR)
+            for backup_file in reversed(backups.backup_files(BACKUP_DIR)):
                 stat = os.stat(backup_file)
                 basename = os.path.basename(backup_file)
                 # Extract SNP count from filename
@@ -428,22 +1270,27 @@ def get_backup_status():
                 except:
                     snp_count = 0
                 
-                backups.append({
+                entry = manifest.get(basename, {})
+                backup_list.append({
                     "filename": basename,
                     "size_mb": round(stat.st_size / (1024 * 1024), 1),
                     "created": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    "snp_count": snp_count
+                    "snp_count": snp_count,
+                    "verification": entry.get('status'),
+                    "verified_at": entry.get('verified_at'),
+                    "verification_error": entry.get('error'),
                 })
         
         # Calculate total backup size
-        total_size_mb = sum(b['size_mb'] for b in backups)
+        total_size_mb = sum(b['size_mb'] for b in backup_list)
         
         return jsonify({
             "monitor_running": backup_manager.is_running(),
             "config": backup_manager.config,
-            "backups": backups[:10],  # Last 10 backups
-            "total_backups": len(backups),
-            "total_size_mb": round(total_size_mb, 1)
+            "backups": backup_list[:10],  # Last 10 backups
+            "total_backups": len(backup_list),
+            "total_size_mb": round(total_size_mb, 1),
+            "verifier": backup_verifier.status()
         })
         
     except Exception as e:
@@ -474,6 +1321,59 @@ def create_backup():
         app.logger.error(f"Backup creation error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/backup/verify', methods=['POST'])
+def verify_backups():
+    """Check every backup (checksum, integrity_check, row count) in the background.
+
+    Optional JSON body: {"jobs": 4, "quick": false}. Results are recorded in
+    backups/manifest.json and reported by /backup/status.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        jobs = int(data['jobs']) if data.get('jobs') else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "jobs must be a number"}), 400
+    if not backups.backup_files(BACKUP_DIR):
+        return jsonify({"error": "No backups found"}), 404
+    if not backup_verifier.start(jobs, bool(data.get('quick'))):
+        return jsonify({"error": "Verification already running"}), 400
+    return jsonify({"success": True, "verifier": backup_verifier.status()})
+
+@app.route('/backup/restore/<filename>', methods=['POST'])
+def restore_backup(filename):
+    """Validate a backup and swap it in for the live database.
+
+    A hosted scraper is stopped for the swap and restarted afterwards on
+    the restored file, resuming from the cursors saved in it. A scraper
+    running from the command line holds the writer lock, and the restore
+    is refused (409) until it is stopped.
+    """
+    if '..' in filename or '/' in filename or '\\' in filename:
+        return jsonify({"error": "Invalid filename"}), 400
+    backup_path = os.path.join(BACKUP_DIR, filename)
+    if not os.path.exists(backup_path):
+        return jsonify({"error": "Backup not found"}), 404
+    if migration_runner.running:
+        return jsonify({"error": "Migrations are running"}), 409
+
+    was_running = scraper_host.hosted and scraper_host.scraper.running
+    if was_running and not scraper_host.halt():
+        return jsonify({"error": "Scraper didn't stop in time; try again"}), 409
+    try:
+        result = backups.restore_backup(backup_path, DB_PATH)
+    except backups.DatabaseBusy as e:
+        return jsonify({"error": str(e)}), 409
+    except backups.BackupError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        db_pool.reset()
+        if scraper_host.hosted:
+            scraper_host.reopen_store()
+            if was_running:
+                scraper_host.start()
+    print(f"✓ Restored {filename} in {result['seconds']}s")
+    return jsonify({"success": True, "restore": result})
+
 @app.route('/backup/config', methods=['POST'])
 def update_backup_config():
     """Update backup configuration."""
@@ -550,8 +1450,32 @@ def stop_backup_monitor():
 
 @app.route('/')
 def index():
-    """Serves the main dashboard page."""
-    return send_from_directory(PROJECT_ROOT, 'index.html')
+    """Serves the main dashboard page.
+
+    Uses the prebuilt bundle from static/dist/ when it exists, otherwise the
+    development page that transpiles the UI in the browser.
+    """
+    if os.path.exists(os.path.join(DIST_DIR, 'index.html')):
+        response = send_from_directory(DIST_DIR, 'index.html')
+    else:
+        response = send_from_directory(FRONTEND_DIR, 'index.html')
+    # Always revalidate, so a rebuild is picked up on the next load
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/static/dist/<path:filename>')
+def dist_asset(filename):
+    """Serves bundle files. Names carry a content hash, so they never change."""
+    response = send_from_directory(DIST_DIR, filename)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@app.route('/frontend/src/<path:filename>')
+def frontend_source(filename):
+    """Serves UI sources to the development page."""
+    response = send_from_directory(os.path.join(FRONTEND_DIR, 'src'), filename)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.errorhandler(404)
 def not_found(e):
@@ -587,7 +1511,31 @@ if __name__ == '__main__':
     print("📊 Updates every 3 seconds to match scraper timing")
     print("💾 Backup monitor integrated - configure in dashboard")
     print("❌ Press Ctrl+C to stop\n")
+
+    if not os.path.exists(os.path.join(DIST_DIR, 'index.html')):
+        print("⚠️  No UI bundle in static/dist/ - serving the development page, which loads")
+        print("   React and Babel from unpkg.com and needs internet access. Rebuild the bundle:")
+        print("   cd frontend && npm install && npm run build\n")
     
+    # Check for --with-scraper flag
+    if '--with-scraper' in sys.argv:
+        # --categories=snp,genotype,gene,medicine (default: snp)
+        categories = None
+        for arg in sys.argv:
+            if arg.startswith('--categories='):
+                names = arg.split('=', 1)[1].split(',')
+                unknown = [name for name in names if name not in SCRAPER_CATEGORIES]
+                if unknown:
+                    print(f"✗ Unknown category: {', '.join(unknown)}. "
+                          f"Choose from: {', '.join(sorted(SCRAPER_CATEGORIES))}")
+                    sys.exit(1)
+                categories = [SCRAPER_CATEGORIES[name] for name in names]
+        scraper_host.enable(categories)
+        print("🕷️  Scraper hosted in this process - start/pause/stop it from the dashboard\n")
+
+    if sampling_profiler.install_signal(label='dashboard'):
+        print(f"🔥 Profile for 30s: POST /profile/start or kill -USR1 {os.getpid()}\n")
+
     if not verbose:
         print("💡 Tip: Run with --verbose to see request logs\n")
     
@@ -599,4 +1547,9 @@ if __name__ == '__main__':
         if config.get('strategy') != 'off':
             backup_manager.start()
     
-    app.run(host='127.0.0.1', port=5000, debug=False, use_reloader=False)
+    try:
+        app.run(host='127.0.0.1', port=5000, debug=False, use_reloader=False)
+    finally:
+        if scraper_host.hosted and scraper_host.scraper.running:
+            print("\nStopping hosted scraper...")
+            scraper_host.stop()
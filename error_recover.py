@@ -3,16 +3,21 @@
 Recover SNPs from the scraper error log.
 """
 
-import sqlite3
+import argparse
 import requests
 import time
 from datetime import datetime
 import os
 import re
+import sys
 
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
 DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
 ERROR_LOG_PATH = os.path.join(PROJECT_ROOT, 'scraper_errors.log')
+SAVE_BATCH = 50  # recovered pages written per transaction
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import storage  # noqa: E402
 
 def parse_error_log():
     """Parse the error log to extract unique SNPs that had errors."""
@@ -45,12 +50,8 @@ def parse_error_log():
     
     return error_snps
 
-def check_missing_snps(error_snps):
+def check_missing_snps(store, error_snps):
     """Check which error SNPs are actually missing from the database."""
-    conn = sqlite3.connect(DB_PATH)
-    
-    missing = []
-    found = []
     
     print("=== Checking Error Log SNPs ===")
     print(f"Total unique SNPs with errors: {len(error_snps)}")
@@ -67,15 +68,10 @@ def check_missing_snps(error_snps):
         print(f"  {error_type}: {count}")
     print()
     
-    # Check which are missing
-    for rsid in error_snps.keys():
-        cursor = conn.execute("SELECT 1 FROM snps WHERE rsid = ?", (rsid,))
-        if cursor.fetchone():
-            found.append(rsid)
-        else:
-            missing.append(rsid)
-    
-    conn.close()
+    # Check which are missing, in one batched lookup
+    stored = store.contains_many(error_snps)
+    found = [rsid for rsid in error_snps if rsid in stored]
+    missing = [rsid for rsid in error_snps if rsid not in stored]
     
     print(f"✓ Found in database: {len(found)}")
     print(f"✗ Missing from database: {len(missing)}")
@@ -91,7 +87,7 @@ def check_missing_snps(error_snps):
     
     return missing
 
-def recover_missing_snps(missing_list):
+def recover_missing_snps(store, missing_list):
     """Attempt to recover the missing SNPs."""
     
     if not missing_list:
@@ -104,60 +100,67 @@ def recover_missing_snps(missing_list):
     recovered = 0
     failed = []
     
-    for i, rsid in enumerate(missing_list):
-        print(f"\r[{i+1}/{len(missing_list)}] Recovering {rsid}...", end='', flush=True)
+    pending = []
+    
+    try:
+        for i, rsid in enumerate(missing_list):
+            print(f"\r[{i+1}/{len(missing_list)}] Recovering {rsid}...", end='', flush=True)
         
-        try:
-            params = {
-                'action': 'query',
-                'prop': 'revisions',
-                'rvprop': 'content',
-                'format': 'json',
-                'titles': rsid
-            }
+            try:
+                params = {
+                    'action': 'query',
+                    'prop': 'revisions',
+                    'rvprop': 'content',
+                    'format': 'json',
+                    'titles': rsid
+                }
             
-            response = requests.get(api_url, params=params, headers={
-                'User-Agent': 'Mozilla/5.0 (Error Log Recovery Script)'
-            })
+                response = requests.get(api_url, params=params, headers={
+                    'User-Agent': 'Mozilla/5.0 (Error Log Recovery Script)'
+                })
             
-            # Try to get data regardless of status code
-            try:
-                data = response.json()
+                # Try to get data regardless of status code
+                try:
+                    data = response.json()
                 
-                if 'query' in data and 'pages' in data['query']:
-                    page_id = list(data['query']['pages'].keys())[0]
+                    if 'query' in data and 'pages' in data['query']:
+                        page_id = list(data['query']['pages'].keys())[0]
                     
-                    if page_id != '-1':  # Page exists
-                        content = data['query']['pages'][page_id]['revisions'][0]['*']
+                        if page_id != '-1':  # Page exists
+                            content = data['query']['pages'][page_id]['revisions'][0]['*']
                         
-                        # Save to database
-                        conn = sqlite3.connect(DB_PATH)
-                        conn.execute(
-                            'INSERT INTO snps (rsid, content, scraped_at) VALUES (?, ?, ?)',
-                            (rsid, content, datetime.now())
-                        )
-                        conn.commit()
-                        conn.close()
+                            # Saved in batches of SAVE_BATCH, below
+                            pending.append((rsid, content))
                         
-                        recovered += 1
-                        print(f"\r[{i+1}/{len(missing_list)}] ✓ Recovered {rsid}    ")
+                            recovered += 1
+                            print(f"\r[{i+1}/{len(missing_list)}] ✓ Recovered {rsid}    ")
+                        else:
+                            failed.append((rsid, "Page does not exist in SNPedia"))
+                            print(f"\r[{i+1}/{len(missing_list)}] ✗ {rsid} - Page not found    ")
                     else:
-                        failed.append((rsid, "Page does not exist in SNPedia"))
-                        print(f"\r[{i+1}/{len(missing_list)}] ✗ {rsid} - Page not found    ")
-                else:
-                    failed.append((rsid, "Invalid API response"))
-                    print(f"\r[{i+1}/{len(missing_list)}] ✗ {rsid} - Invalid response    ")
+                        failed.append((rsid, "Invalid API response"))
+                        print(f"\r[{i+1}/{len(missing_list)}] ✗ {rsid} - Invalid response    ")
                     
-            except Exception as e:
-                failed.append((rsid, f"Parse error: {str(e)}"))
-                print(f"\r[{i+1}/{len(missing_list)}] ✗ {rsid} - Parse error    ")
+                except Exception as e:
+                    failed.append((rsid, f"Parse error: {str(e)}"))
+                    print(f"\r[{i+1}/{len(missing_list)}] ✗ {rsid} - Parse error    ")
                 
-        except Exception as e:
-            failed.append((rsid, f"Request error: {str(e)}"))
-            print(f"\r[{i+1}/{len(missing_list)}] ✗ {rsid} - Request failed    ")
+            except Exception as e:
+                failed.append((rsid, f"Request error: {str(e)}"))
+                print(f"\r[{i+1}/{len(missing_list)}] ✗ {rsid} - Request failed    ")
+
+            # Outside the per-page try, so a store error stops the run as one
+            # instead of being logged as a parse failure of this page
+            if len(pending) >= SAVE_BATCH:
+                batch, pending = pending, []
+                store.put_many(batch)
         
-        # Respect rate limit
-        time.sleep(3)
+            # Respect rate limit
+            time.sleep(3)
+    finally:
+        # Pages fetched before an error or Ctrl+C are still saved
+        if pending:
+            store.put_many(pending)
     
     print(f"\n\n=== Recovery Summary ===")
     print(f"✓ Successfully recovered: {recovered}")
@@ -197,6 +200,11 @@ def archive_error_log():
             print("Error log cleared.")
 
 def main():
+    parser = argparse.ArgumentParser(description="Recover SNPs from the scraper error log.")
+    parser.add_argument('--store', default=DB_PATH,
+                        help="Page store: a SQLite file (default) or an LMDB directory (*.lmdb)")
+    args = parser.parse_args()
+
     print("=== SNPedia Error Log Recovery Tool ===")
     print("\nThis tool will recover SNPs from the scraper error log.")
     
@@ -212,41 +220,37 @@ def main():
         print("\nNo errors found in the log!")
         return
     
-    # Check which SNPs are missing
-    missing = check_missing_snps(error_snps)
+    with storage.open_store(args.store) as store:
+        # Check which SNPs are missing
+        missing = check_missing_snps(store, error_snps)
     
-    if missing:
-        print(f"\nFound {len(missing)} SNPs that need recovery.")
-        response = input("Attempt to recover these SNPs? (y/N): ")
+        if missing:
+            print(f"\nFound {len(missing)} SNPs that need recovery.")
+            response = input("Attempt to recover these SNPs? (y/N): ")
         
-        if response.lower() == 'y':
-            recovered, failed = recover_missing_snps(missing)
+            if response.lower() == 'y':
+                recovered, failed = recover_missing_snps(store, missing)
             
-            # Final check
-            print("\n=== Final Verification ===")
-            still_missing = []
-            conn = sqlite3.connect(DB_PATH)
-            for rsid in missing:
-                cursor = conn.execute("SELECT 1 FROM snps WHERE rsid = ?", (rsid,))
-                if not cursor.fetchone():
-                    still_missing.append(rsid)
-            conn.close()
+                # Final check
+                print("\n=== Final Verification ===")
+                stored = store.contains_many(missing)
+                still_missing = [rsid for rsid in missing if rsid not in stored]
             
-            if still_missing:
-                print(f"Still missing after recovery: {len(still_missing)}")
-            else:
-                print("All error log SNPs successfully recovered!")
+                if still_missing:
+                    print(f"Still missing after recovery: {len(still_missing)}")
+                else:
+                    print("All error log SNPs successfully recovered!")
             
-            # Offer to archive the log
-            archive_error_log()
-    else:
-        print("\nGreat news! All error log SNPs are already in the database.")
-        print("No recovery needed.")
+                # Offer to archive the log
+                archive_error_log()
+        else:
+            print("\nGreat news! All error log SNPs are already in the database.")
+            print("No recovery needed.")
         
-        # Still offer to archive
-        response = input("\nArchive the error log? (y/N): ")
-        if response.lower() == 'y':
-            archive_error_log()
+            # Still offer to archive
+            response = input("\nArchive the error log? (y/N): ")
+            if response.lower() == 'y':
+                archive_error_log()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Export the scraped database to JSONL, CSV, Parquet or Arrow files.
+
+Rows are read in fixed-size chunks keyed on rowid, so memory use is bounded
+by the chunk size and each chunk is its own short read transaction (the
+scraper can keep writing while an export runs). Text formats are compressed
+chunk-by-chunk in a thread pool; every chunk becomes one gzip member, and
+concatenated members are a valid gzip file.
+
+Usage:
+    python export_data.py snps.jsonl.gz
+    python export_data.py snps.csv --format csv --since 2025-07-01
+    python export_data.py snps.parquet --since 104233
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
+
+FORMATS = ['jsonl', 'csv', 'parquet', 'arrow']
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def parse_since(value):
+    """Interpret --since as either a rowid high-water mark or a timestamp."""
+    if value is None:
+        return None
+    if value.isdigit():
+        return ('rowid', int(value))
+    return ('time', value.replace('T', ' '))
+
+
+def guess_format(path):
+    """Guess the export format from the output file name."""
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    for fmt in FORMATS:
+        if name.endswith('.' + fmt):
+            return fmt
+    if name.endswith('.feather') or name.endswith('.arrows'):
+        return 'arrow'
+    return 'jsonl'
+
+
+def get_columns(conn, table):
+    """Return [(name, declared_type), ...] for a table."""
+    rows = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+    return [(row[1], (row[2] or '').upper()) for row in rows]
+
+
+def has_rowid(conn, table):
+    """WITHOUT ROWID tables can't be paged by rowid."""
+    try:
+        conn.execute(f'SELECT rowid FROM "{table}" LIMIT 0')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def build_select(conn, table, fmt, since):
+    """Build the SELECT used to page through a table.
+
+    For JSONL the row is serialised by SQLite's json_object(), so no Python
+    objects are created per column.
+    """
+    columns = get_columns(conn, table)
+    if not columns:
+        raise ValueError(f"Table not found: {table}")
+    names = [name for name, _ in columns]
+
+    # Text formats get BLOB columns (e.g. content_hash) as hex strings
+    text = fmt in ('jsonl', 'csv')
+    exprs = [
+        f'hex("{name}")' if text and 'BLOB' in decl else f'"{name}"'
+        for name, decl in columns
+    ]
+
+    if fmt == 'jsonl':
+        parts = [f"'{name}', {expr}" for name, expr in zip(names, exprs)]
+        select_list = f"json_object({', '.join(parts)})"
+    else:
+        select_list = ', '.join(exprs)
+
+    where = []
+    params = []
+    if since and since[0] == 'time':
+        if 'scraped_at' not in names:
+            raise ValueError(f"--since <timestamp> needs a scraped_at column; {table} has none")
+        where.append('scraped_at > ?')
+        params.append(since[1])
+
+    return columns, select_list, where, params
+
+
+def iter_chunks(conn, table, fmt, since, chunk_size):
+    """Yield (rows, last_rowid) chunks from a table.
+
+    Paging is keyset-based (rowid > last), so each chunk is a short,
+    independent read and a concurrent writer is never blocked for long.
+    """
+    for rows, offset, last_rowid in iter_raw_chunks(conn, table, fmt, since, chunk_size):
+        yield (rows if not offset else [row[offset:] for row in rows]), last_rowid
+
+
+def iter_raw_chunks(conn, table, fmt, since, chunk_size):
+    """Yield (rows, offset, last_rowid) chunks, rows as fetched from SQLite.
+
+    The table's columns start at index offset of each row (a leading rowid
+    is there for paging), so columnar writers can slice the columns out of
+    a chunk without copying it row by row first.
+    """
+    columns, select_list, where, params = build_select(conn, table, fmt, since)
+
+    if not has_rowid(conn, table):
+        # No rowid to page on - fall back to a single streaming cursor.
+        sql = f'SELECT {select_list} FROM "{table}"'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows, 0, None
+        return
+
+    last_rowid = since[1] if since and since[0] == 'rowid' else 0
+    sql = f'SELECT rowid, {select_list} FROM "{table}" WHERE rowid > ?'
+    if where:
+        sql += ' AND ' + ' AND '.join(where)
+    sql += ' ORDER BY rowid LIMIT ?'
+
+    while True:
+        rows = conn.execute(sql, [last_rowid] + params + [chunk_size]).fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        yield rows, 1, last_rowid
+
+
+class ChunkWriter:
+    """Writes encoded chunks to a file, compressing them in a thread pool.
+
+    zlib releases the GIL, so chunks compress in parallel while the main
+    thread keeps reading. At most 2 * jobs chunks are in flight at once.
+    """
+
+    def __init__(self, path, compress, jobs, level=6):
+        self.f = open(path, 'wb')
+        self.compress = compress
+        self.level = level
+        self.jobs = max(1, jobs)
+        self.pool = ThreadPoolExecutor(max_workers=self.jobs) if compress else None
+        self.pending = deque()
+        self.bytes_written = 0
+
+    def write(self, data):
+        if not self.compress:
+            self._emit(data)
+            return
+        self.pending.append(self.pool.submit(gzip.compress, data, self.level, mtime=0))
+        while len(self.pending) > self.jobs * 2:
+            self._emit(self.pending.popleft().result())
+
+    def _emit(self, data):
+        self.f.write(data)
+        self.bytes_written += len(data)
+
+    def close(self):
+        while self.pending:
+            self._emit(self.pending.popleft().result())
+        if self.pool:
+            self.pool.shutdown()
+        self.f.close()
+
+
+def export_text(conn, table, path, fmt, since, chunk_size, compress, jobs, progress_callback=None):
+    """Export a table as JSONL or CSV. progress_callback(rows_so_far) runs per chunk."""
+    writer = ChunkWriter(path, compress, jobs)
+    columns = [name for name, _ in get_columns(conn, table)]
+    total = 0
+    last_rowid = None
+    try:
+        first = True
+        for rows, chunk_last in iter_chunks(conn, table, fmt, since, chunk_size):
+            if fmt == 'jsonl':
+                data = ('\n'.join(row[0] for row in rows) + '\n').encode('utf-8')
+            else:
+                buf = io.StringIO()
+                csv_writer = csv.writer(buf)
+                if first:
+                    csv_writer.writerow(columns)
+                csv_writer.writerows(rows)
+                data = buf.getvalue().encode('utf-8')
+            first = False
+            writer.write(data)
+            total += len(rows)
+            last_rowid = chunk_last if chunk_last is not None else last_rowid
+            if progress_callback:
+                progress_callback(total)
+        if first and fmt == 'csv':
+            # Empty export still gets a header row
+            buf = io.StringIO()
+            csv.writer(buf).writerow(columns)
+            writer.write(buf.getvalue().encode('utf-8'))
+    finally:
+        writer.close()
+    return total, last_rowid, writer.bytes_written
+
+
+ARROW_TYPES = {
+    'INTEGER': 'int64',
+    'INT': 'int64',
+    'REAL': 'float64',
+    'BLOB': 'binary',
+}
+
+
+def arrow_schema(pa, columns):
+    """Map SQLite declared column types onto an Arrow schema."""
+    fields = []
+    for name, decl in columns:
+        type_name = ARROW_TYPES.get(decl, 'string')
+        fields.append(pa.field(name, getattr(pa, type_name)()))
+    return pa.schema(fields)
+
+
+def export_columnar(conn, table, path, fmt, since, chunk_size, jobs, progress_callback=None):
+    """Export a table as Parquet (one row group per chunk) or Arrow IPC.
+
+    Each chunk is transposed once into column tuples (zip(*rows) runs in C)
+    and handed to pa.array as is, so no Python lists are built per row.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet/Arrow export needs pyarrow: pip install pyarrow")
+
+    pa.set_cpu_count(max(1, jobs))
+    columns = get_columns(conn, table)
+    schema = arrow_schema(pa, columns)
+
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+
+    total = 0
+    last_rowid = None
+    try:
+        for rows, offset, chunk_last in iter_raw_chunks(conn, table, fmt, since, chunk_size):
+            values = list(zip(*rows))
+            arrays = [
+                pa.array(values[offset + i], type=field.type)
+                for i, field in enumerate(schema)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            total += len(rows)
+            last_rowid = chunk_last if chunk_last is not None else last_rowid
+            if progress_callback:
+                progress_callback(total)
+    finally:
+        writer.close()
+    return total, last_rowid, os.path.getsize(path)
+
+
+def high_water_mark(db_path, table):
+    """Latest scraped_at in a table, or None if it has no such column.
+
+    Upserts rewrite a changed page in place, keeping its rowid, so only a
+    scraped_at mark catches updated rows in the next incremental export.
+    Taken before the export starts: rows written while it runs are exported
+    again next time rather than missed.
+    """
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        if 'scraped_at' not in [name for name, _ in get_columns(conn, table)]:
+            return None
+        return conn.execute(f'SELECT MAX(scraped_at) FROM "{table}"').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def export_table(db_path, table, path, fmt=None, since=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 compress=None, jobs=None, progress_callback=None):
+    """Export one table. Returns (row_count, last_rowid, bytes_written).
+
+    progress_callback(rows_so_far) is called after each chunk.
+    """
+    fmt = fmt or guess_format(path)
+    if compress is None:
+        compress = path.lower().endswith('.gz')
+    jobs = jobs or os.cpu_count() or 1
+
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        if fmt in ('jsonl', 'csv'):
+            return export_text(conn, table, path, fmt, parse_since(since), chunk_size, compress, jobs,
+                               progress_callback)
+        return export_columnar(conn, table, path, fmt, parse_since(since), chunk_size, jobs,
+                               progress_callback)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export SNPedia data to JSONL, CSV, Parquet or Arrow.")
+    parser.add_argument('output', help="Output file (format is guessed from the extension)")
+    parser.add_argument('--format', choices=FORMATS, help="Output format")
+    parser.add_argument('--table', default='snps', help="Table to export (default: snps)")
+    parser.add_argument('--since', help="Only export rows scraped after this timestamp (new and updated rows) "
+                                        "or after this rowid (new rows only)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument('--gzip', action='store_true', help="Gzip-compress text output")
+    parser.add_argument('--jobs', type=int, default=None, help="Compression threads (default: CPU count)")
+    parser.add_argument('--db', default=DB_PATH, help="Database path")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"✗ Database not found: {args.db}")
+        sys.exit(1)
+
+    fmt = args.format or guess_format(args.output)
+    compress = args.gzip or args.output.lower().endswith('.gz')
+
+    print(f"=== Exporting {args.table} to {args.output} ({fmt}{', gzip' if compress else ''}) ===")
+    start = time.time()
+    try:
+        mark = high_water_mark(args.db, args.table)
+        total, last_rowid, size = export_table(
+            args.db, args.table, args.output, fmt, args.since,
+            args.chunk_size, compress, args.jobs,
+            progress_callback=lambda total: print(f"\r  Exported {total:,} rows...", end='', flush=True)
+        )
+    except (ValueError, RuntimeError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    elapsed = time.time() - start
+    print(f"\n✓ Exported {total:,} rows ({size / (1024 * 1024):.1f} MB) in {elapsed:.1f}s")
+    if mark is not None:
+        print(f'  Next incremental export: --since "{mark}"')
+    elif last_rowid is not None:
+        print(f"  Next incremental export: --since {last_rowid} (new rows only; updated rows keep their rowid)")
+
+
+if __name__ == "__main__":
+    main()
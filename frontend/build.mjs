@@ -0,0 +1,65 @@
+// Builds the dashboard UI into ../static/dist/.
+//
+// Output file names carry a content hash (app.3F2A1C9B.js), so dashboard.py
+// can serve them with a one-year immutable Cache-Control. index.html is
+// regenerated on every build to point at the current files.
+//
+// Usage: npm install && npm run build
+
+import * as esbuild from 'esbuild';
+import fs from 'node:fs';
+import path from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const root = path.dirname(fileURLToPath(import.meta.url));
+const outdir = path.join(root, '..', 'static', 'dist');
+
+fs.rmSync(outdir, { recursive: true, force: true });
+
+const result = await esbuild.build({
+    entryPoints: {
+        app: path.join(root, 'src', 'app.jsx'),
+        styles: path.join(root, 'src', 'styles.css'),
+    },
+    inject: [path.join(root, 'src', 'react-shim.js')],
+    bundle: true,
+    minify: true,
+    format: 'iife',
+    target: ['es2018'],
+    define: { 'process.env.NODE_ENV': '"production"' },
+    entryNames: '[name].[hash]',
+    legalComments: 'none',
+    outdir,
+    metafile: true,
+});
+
+const files = {};
+for (const [output, info] of Object.entries(result.metafile.outputs)) {
+    if (info.entryPoint) {
+        const name = path.basename(info.entryPoint).replace(/\.jsx?$/, '.js');
+        files[name] = path.basename(output);
+    }
+}
+
+const html = `<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>SNPedia Scraper Dashboard</title>
+<link rel="stylesheet" href="/static/dist/${files['styles.css']}">
+</head>
+<body>
+<div id="root"></div>
+<script src="/static/dist/${files['app.js']}"></script>
+</body>
+</html>
+`;
+
+fs.writeFileSync(path.join(outdir, 'index.html'), html);
+fs.writeFileSync(path.join(outdir, 'manifest.json'), JSON.stringify(files, null, 2) + '\n');
+
+for (const [name, file] of Object.entries(files)) {
+    const size = fs.statSync(path.join(outdir, file)).size;
+    console.log(`✓ ${name} → static/dist/${file} (${(size / 1024).toFixed(1)} KB)`);
+}
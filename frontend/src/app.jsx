@@ -0,0 +1,508 @@
+// SNPedia Scraper dashboard UI.
+//
+// Written against the React/ReactDOM globals so the same file runs in two
+// ways: bundled and minified by build.mjs (react-shim.js supplies the
+// globals), or transpiled in the browser by frontend/index.html during
+// development.
+
+const { useState, useEffect } = React;
+
+function App() {
+    const [status, setStatus] = useState({
+        count: 0,
+        current: 'N/A',
+        total: 110000,
+        logs: [],
+        status: 'idle',
+        rate: 0,
+        eta_hours: null,
+        last_update: null
+    });
+    const [detailedStats, setDetailedStats] = useState(null);
+    const [showStats, setShowStats] = useState(false);
+    const [backupStatus, setBackupStatus] = useState(null);
+    const [backupConfig, setBackupConfig] = useState({
+        strategy: 'rolling',
+        keep_count: 5,
+        interval: 1000
+    });
+    const [error, setError] = useState(null);
+
+    const fetchStatus = () => {
+        fetch('/status')
+            .then(res => {
+                if (!res.ok) throw new Error('Network response was not ok');
+                return res.json();
+            })
+            .then(data => {
+                setStatus(data);
+                setError(null);
+            })
+            .catch(err => setError(err.message));
+    };
+
+    const fetchDetailedStats = () => {
+        fetch('/stats')
+            .then(res => {
+                if (!res.ok) throw new Error('Stats not available');
+                return res.json();
+            })
+            .then(data => setDetailedStats(data))
+            .catch(() => {}); // Silently fail if stats endpoint doesn't work
+    };
+
+    const fetchBackupStatus = () => {
+        fetch('/backup/status')
+            .then(res => {
+                if (!res.ok) throw new Error('Backup status not available');
+                return res.json();
+            })
+            .then(data => {
+                setBackupStatus(data);
+                setBackupConfig(data.config);
+            })
+            .catch(() => {}); // Silently fail
+    };
+
+    const createBackup = () => {
+        fetch('/backup/create', { method: 'POST' })
+            .then(res => res.json())
+            .then(data => {
+                if (data.success) {
+                    alert(`Backup created: ${data.backup_name} (${data.size_mb} MB)`);
+                    fetchBackupStatus();
+                } else {
+                    alert(`Error: ${data.error}`);
+                }
+            })
+            .catch(err => alert(`Error creating backup: ${err.message}`));
+    };
+
+    const toggleBackupMonitor = () => {
+        const endpoint = backupStatus?.monitor_running 
+            ? '/backup/monitor/stop' 
+            : '/backup/monitor/start';
+
+        fetch(endpoint, { method: 'POST' })
+            .then(res => res.json())
+            .then(data => {
+                if (data.success) {
+                    fetchBackupStatus();
+                } else {
+                    alert(`Error: ${data.error}`);
+                }
+            })
+            .catch(err => alert(`Error: ${err.message}`));
+    };
+
+    const updateBackupConfig = (newConfig) => {
+        fetch('/backup/config', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(newConfig)
+        })
+            .then(res => res.json())
+            .then(data => {
+                if (data.success) {
+                    setBackupConfig(data.config);
+                    fetchBackupStatus();
+                } else {
+                    alert(`Error: ${data.error}`);
+                }
+            })
+            .catch(err => alert(`Error updating config: ${err.message}`));
+    };
+
+    const controlScraper = (action) => {
+        fetch(`/scraper/${action}`, { method: 'POST' })
+            .then(res => res.json())
+            .then(data => {
+                if (data.success) {
+                    fetchStatus();
+                } else {
+                    alert(`Error: ${data.error}`);
+                }
+            })
+            .catch(err => alert(`Error: ${err.message}`));
+    };
+
+    const deleteBackup = (filename) => {
+        if (confirm(`Delete backup ${filename}?`)) {
+            fetch(`/backup/delete/${filename}`, { method: 'DELETE' })
+                .then(res => res.json())
+                .then(data => {
+                    if (data.success) {
+                        fetchBackupStatus();
+                    } else {
+                        alert(`Error: ${data.error}`);
+                    }
+                })
+                .catch(err => alert(`Error deleting backup: ${err.message}`));
+        }
+    };
+
+    useEffect(() => {
+        fetchStatus(); // Initial fetch
+        fetchDetailedStats(); // Initial stats fetch
+        fetchBackupStatus(); // Initial backup status
+
+        const statusInterval = setInterval(fetchStatus, 3000); // Poll every 3 seconds to match scraper
+        const statsInterval = setInterval(fetchDetailedStats, 30000); // Update stats every 30 seconds
+        const backupInterval = setInterval(fetchBackupStatus, 10000); // Update backup status every 10 seconds
+
+        return () => {
+            clearInterval(statusInterval);
+            clearInterval(statsInterval);
+            clearInterval(backupInterval);
+        };
+    }, []);
+
+    const progress = (status.count / status.total) * 100;
+
+    // Format ETA nicely
+    const formatETA = (hours) => {
+        if (!hours) return 'N/A';
+        if (hours < 1) return `${Math.round(hours * 60)}m`;
+        if (hours < 24) return `${hours.toFixed(1)}h`;
+        const days = Math.floor(hours / 24);
+        const remainingHours = Math.round(hours % 24);
+        return `${days}d ${remainingHours}h`;
+    };
+
+    // Format status nicely
+    const statusLabels = {
+        active: 'Active',
+        paused: 'Paused',
+        stopping: 'Stopping',
+        stopped: 'Stopped',
+        idle: 'Idle',
+        not_started: 'Not Started',
+        error: 'Error'
+    };
+
+    const statusColors = {
+        active: '#4ade80',
+        paused: '#fbbf24',
+        stopping: '#fbbf24',
+        stopped: '#ef4444',
+        idle: '#6b7280',
+        not_started: '#6b7280',
+        error: '#ef4444'
+    };
+
+    if (error) {
+        return (
+            <div className="container">
+                <h2>Connection Error</h2>
+                <p>{error}</p>
+                <p style={{marginTop: '20px'}}>Make sure the dashboard is running on port 5000.</p>
+            </div>
+        );
+    }
+
+    return (
+        <div className="container">
+            <h1>🧬 SNPedia Scraper Dashboard</h1>
+            <p className="subtitle">Real-time monitoring of scraper progress</p>
+
+            <div className="status-indicator">
+                <span className={`status-dot ${status.status}`}></span>
+                <span>Status: <strong>{statusLabels[status.status] || status.status}</strong></span>
+                {status.rate > 0 && (
+                    <span style={{marginLeft: '20px'}}>
+                        ({status.rate} SNPs/hour)
+                    </span>
+                )}
+            </div>
+
+            <div className="stats">
+                <div className="stat-box">
+                    <div className="stat-value">{status.count.toLocaleString()}</div>
+                    <div className="stat-label">SNPs Scraped</div>
+                </div>
+                <div className="stat-box">
+                    <div className="stat-value">{progress.toFixed(2)}%</div>
+                    <div className="stat-label">Progress</div>
+                </div>
+                <div className="stat-box">
+                    <div className="stat-value">{formatETA(status.eta_hours)}</div>
+                    <div className="stat-label">Est. Time Remaining</div>
+                </div>
+            </div>
+
+            <div className="progress-container">
+                <div className="progress-bar">
+                    <div 
+                        className={`progress-fill ${status.status === 'active' ? 'active' : ''}`} 
+                        style={{ width: `${progress}%` }}
+                    >
+                        {progress > 5 && `${progress.toFixed(2)}%`}
+                    </div>
+                </div>
+                {status.current && (
+                    <div className="current-snp">
+                        Last Scraped: {status.current}
+                    </div>
+                )}
+            </div>
+
+            {status.hosted ? (
+                <div className="info-box">
+                    <h3>🕷️ Scraper Control</h3>
+                    <div className="backup-controls">
+                        <button onClick={() => controlScraper('start')} disabled={status.status === 'active' || status.status === 'paused' || status.status === 'stopping'}>
+                            ▶️ Start
+                        </button>
+                        {status.status === 'paused' ? (
+                            <button onClick={() => controlScraper('resume')}>⏯️ Resume</button>
+                        ) : (
+                            <button onClick={() => controlScraper('pause')} disabled={status.status !== 'active'}>⏸️ Pause</button>
+                        )}
+                        <button onClick={() => controlScraper('stop')} disabled={status.status !== 'active' && status.status !== 'paused'}>
+                            ⏹️ Stop
+                        </button>
+                    </div>
+                    <p>
+                        Phase: <strong>{status.phase}</strong>
+                        {status.wait_seconds > 0 && ` (next request in ${status.wait_seconds}s)`}
+                    </p>
+                    {status.last_error && (
+                        <p style={{color: '#ef4444'}}>
+                            Last error: {status.last_error.rsid && `${status.last_error.rsid} - `}{status.last_error.error}
+                        </p>
+                    )}
+                </div>
+            ) : (
+                <div className="info-box">
+                    <h3>ℹ️ How to Use</h3>
+                    <p>
+                        This is a <strong>read-only dashboard</strong>. To start scraping, run the following command in a separate terminal:
+                    </p>
+                    <p><code>python3 src/snpedia_scraper.py</code></p>
+                    <p>Or run <code>python3 dashboard.py --with-scraper</code> to control the scraper from this page.</p>
+                    <p>This page updates every 3 seconds to show real-time progress.</p>
+                </div>
+            )}
+
+            <div className="stats-toggle">
+                <button onClick={() => setShowStats(!showStats)}>
+                    {showStats ? '🔧 Hide Debug Info' : '🔧 Show Debug Info'}
+                </button>
+                {showStats && (
+                    <button 
+                        onClick={() => fetchDetailedStats()} 
+                        style={{marginLeft: '10px'}}
+                    >
+                        🔄 Refresh Stats
+                    </button>
+                )}
+            </div>
+
+            {showStats && detailedStats && (
+                <div className="stats-container" style={{marginTop: '30px'}}>
+                    <h3 style={{marginBottom: '20px', textAlign: 'center'}}>🔧 Debug Information</h3>
+
+                    <div className="stats" style={{marginBottom: '20px'}}>
+                        <div className="stat-box">
+                            <div className="stat-value" style={{fontSize: '28px'}}>
+                                {detailedStats.breakdown.rs_snps.toLocaleString()}
+                            </div>
+                            <div className="stat-label">Standard SNPs (Rs)</div>
+                        </div>
+                        <div className="stat-box">
+                            <div className="stat-value" style={{fontSize: '28px'}}>
+                                {detailedStats.breakdown.i_snps.toLocaleString()}
+                            </div>
+                            <div className="stat-label">23andMe SNPs (I)</div>
+                        </div>
+                        <div className="stat-box">
+                            <div className="stat-value" style={{fontSize: '28px'}}>
+                                {detailedStats.breakdown.other_snps.toLocaleString()}
+                            </div>
+                            <div className="stat-label">Other Types</div>
+                        </div>
+                    </div>
+
+                    <div className="info-box" style={{marginBottom: '20px'}}>
+                        <h4>⚠️ Data Quality Check</h4>
+                        <p>Small entries (&lt;100 chars): <strong style={{
+                            color: detailedStats.content_stats.small_entries > 5000 ? '#fbbf24' : '#4ade80'
+                        }}>{detailedStats.content_stats.small_entries.toLocaleString()}</strong>
+                        {detailedStats.content_stats.small_entries > 5000 && ' (Higher than expected)'}</p>
+
+                        <p>Average content size: <strong style={{
+                            color: detailedStats.content_stats.average_size < 500 ? '#fbbf24' : '#4ade80'
+                        }}>{Math.round(detailedStats.content_stats.average_size).toLocaleString()} chars</strong>
+                        {detailedStats.content_stats.average_size < 500 && ' (Lower than expected)'}</p>
+
+                        <p>Content range: <strong>{detailedStats.content_stats.min_size} - {detailedStats.content_stats.max_size.toLocaleString()} chars</strong></p>
+
+                        {detailedStats.content_stats.min_size === 0 && (
+                            <p style={{color: '#ef4444'}}>⚠️ Found empty content entries!</p>
+                        )}
+                    </div>
+
+                    <div className="info-box" style={{marginBottom: '20px'}}>
+                        <h4>💾 Storage Information</h4>
+                        <p>Database size: <strong>{detailedStats.database_size_mb} MB</strong></p>
+                        <p>Average per SNP: <strong>{(detailedStats.database_size_mb * 1024 / detailedStats.total_snps).toFixed(1)} KB</strong></p>
+                        <p>Estimated final size: <strong>{(detailedStats.database_size_mb / detailedStats.total_snps * 110000).toFixed(0)} MB</strong></p>
+                    </div>
+
+                    <div className="info-box">
+                        <h4>🕐 Timing Analysis</h4>
+                        {detailedStats.time_stats.first_scrape && detailedStats.time_stats.last_scrape && (
+                            <>
+                                <p>Started: <strong>{new Date(detailedStats.time_stats.first_scrape).toLocaleString()}</strong></p>
+                                <p>Last update: <strong>{new Date(detailedStats.time_stats.last_scrape).toLocaleString()}</strong></p>
+                                <p>Time since last update: <strong style={{
+                                    color: ((Date.now() - new Date(detailedStats.time_stats.last_scrape)) / 1000) > 300 ? '#ef4444' : '#4ade80'
+                                }}>{Math.round((Date.now() - new Date(detailedStats.time_stats.last_scrape)) / 60000)} minutes ago</strong></p>
+                            </>
+                        )}
+
+                        {status.status === 'stopped' && (
+                            <p style={{color: '#ef4444', marginTop: '10px'}}>
+                                ⚠️ Scraper appears to be stopped. Check scraper terminal for errors.
+                            </p>
+                        )}
+                    </div>
+                </div>
+            )}
+
+            {/* Backup Management Section */}
+            <div className="backup-section">
+                <div className="backup-header">
+                    <h3>💾 Backup Management</h3>
+                    {backupStatus && (
+                        <div className="backup-status">
+                            <span className={`status-dot ${backupStatus.monitor_running ? 'active' : 'stopped'}`}></span>
+                            <span>Monitor: {backupStatus.monitor_running ? 'Running' : 'Stopped'}</span>
+                        </div>
+                    )}
+                </div>
+
+                <div className="backup-controls">
+                    <button onClick={createBackup}>
+                        💾 Create Backup Now
+                    </button>
+                    <button onClick={toggleBackupMonitor}>
+                        {backupStatus?.monitor_running ? '⏸️ Stop Monitor' : '▶️ Start Monitor'}
+                    </button>
+                    <button onClick={fetchBackupStatus}>
+                        🔄 Refresh
+                    </button>
+                </div>
+
+                <div className="backup-config">
+                    <div className="config-group">
+                        <label>Strategy</label>
+                        <select 
+                            value={backupConfig.strategy} 
+                            onChange={(e) => updateBackupConfig({...backupConfig, strategy: e.target.value})}
+                        >
+                            <option value="off">Off - No automatic backups</option>
+                            <option value="rolling">Rolling - Keep last N backups</option>
+                            <option value="progressive">Progressive - Smart intervals</option>
+                            <option value="hourly">Hourly - Time-based</option>
+                            <option value="all">All - Keep everything</option>
+                        </select>
+                    </div>
+
+                    {(backupConfig.strategy === 'rolling' || backupConfig.strategy === 'all') && (
+                        <div className="config-group">
+                            <label>Interval (SNPs)</label>
+                            <input 
+                                type="number" 
+                                value={backupConfig.interval} 
+                                onChange={(e) => updateBackupConfig({...backupConfig, interval: parseInt(e.target.value)})}
+                                min="100" 
+                                max="10000" 
+                                step="100"
+                            />
+                        </div>
+                    )}
+
+                    {backupConfig.strategy === 'rolling' && (
+                        <div className="config-group">
+                            <label>Keep Count</label>
+                            <input 
+                                type="number" 
+                                value={backupConfig.keep_count} 
+                                onChange={(e) => updateBackupConfig({...backupConfig, keep_count: parseInt(e.target.value)})}
+                                min="1" 
+                                max="50"
+                            />
+                        </div>
+                    )}
+                </div>
+
+                {backupStatus && backupStatus.backups.length > 0 && (
+                    <>
+                        <h4 style={{marginBottom: '10px'}}>Recent Backups</h4>
+                        <div className="backup-list">
+                            {backupStatus.backups.map((backup, idx) => (
+                                <div key={idx} className="backup-item">
+                                    <div className="backup-info">
+                                        <div className="backup-name">{backup.filename}</div>
+                                        <div className="backup-meta">
+                                            {backup.snp_count.toLocaleString()} SNPs • {backup.size_mb} MB • {new Date(backup.created).toLocaleString()}
+                                        </div>
+                                    </div>
+                                    <button 
+                                        className="delete-btn" 
+                                        onClick={() => deleteBackup(backup.filename)}
+                                    >
+                                        Delete
+                                    </button>
+                                </div>
+                            ))}
+                        </div>
+                    </>
+                )}
+
+                {backupStatus && (
+                    <div className="backup-summary">
+                        <div className="backup-summary-item">
+                            <div className="backup-summary-value">{backupStatus.total_backups}</div>
+                            <div className="backup-summary-label">Total Backups</div>
+                        </div>
+                        <div className="backup-summary-item">
+                            <div className="backup-summary-value">{backupStatus.total_size_mb} MB</div>
+                            <div className="backup-summary-label">Total Size</div>
+                        </div>
+                        <div className="backup-summary-item">
+                            <div className="backup-summary-value">
+                                {backupStatus.backups.length > 0 
+                                    ? Math.round(backupStatus.total_size_mb / backupStatus.total_backups * 10) / 10 
+                                    : 0} MB
+                            </div>
+                            <div className="backup-summary-label">Avg Size</div>
+                        </div>
+                    </div>
+                )}
+            </div>
+
+            <div className="log-container">
+                <div className="log-header">Recent Activity (Last 10 Scraped)</div>
+                {status.logs.length === 0 ? (
+                    <div className="log-entry">No activity yet. Start the scraper to begin.</div>
+                ) : (
+                    status.logs.map((log, index) => (
+                        <div key={index} className="log-entry">
+                            [{log.time}] {log.message}
+                        </div>
+                    ))
+                )}
+            </div>
+
+            {status.last_update && (
+                <div className="last-update">
+                    Last update: {new Date(status.last_update).toLocaleTimeString()}
+                </div>
+            )}
+        </div>
+    );
+}
+
+ReactDOM.createRoot(document.getElementById('root')).render(<App />);
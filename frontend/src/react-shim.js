@@ -0,0 +1,6 @@
+// Injected by build.mjs: turns the React/ReactDOM globals used in app.jsx
+// into imports, so the bundle needs nothing from a CDN.
+import * as React from 'react';
+import * as ReactDOM from 'react-dom/client';
+
+export { React, ReactDOM };
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Build and query the SNP / gene / condition link graph.
+
+Every stored page is parsed for [[wiki links]] and template parameters, and
+the edges are kept in the indexed links table, so "all SNPs linked to OXTR"
+is an index lookup instead of a regex scan over every page. Pages written by
+the scraper are re-extracted as they are saved; rows written in bulk (imports)
+are marked dirty and picked up by `update`.
+
+Usage:
+    python link_graph.py build --jobs 4        # first full pass, resumable
+    python link_graph.py update                # re-extract pages marked dirty
+    python link_graph.py to OXTR --snps-only   # what links here
+    python link_graph.py from Rs53576          # what this page links to
+    python link_graph.py missing --kind genotype --enqueue
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import snpdb  # noqa: E402
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def extract_batch(rows):
+    """Worker: (rsid, content, version) rows -> (rsid, edges, version) rows."""
+    return [(rsid, snpdb.extract_links(rsid, content), version) for rsid, content, version in rows]
+
+
+def write_batch(conn, results):
+    """Write extracted edges. Pages rewritten since they were read are skipped."""
+    written = 0
+    with conn:
+        for rsid, edges, version in results:
+            if snpdb.replace_links(conn, rsid, edges, version):
+                written += len(edges)
+    return written
+
+
+def run_pipeline(conn, batches, jobs, on_batch=None):
+    """Extract batches in worker processes and write them from this one.
+
+    At most two batches per worker are in flight, so memory stays bounded
+    however large the database is. Returns (pages, edges) written.
+    """
+    pages = edges = 0
+    if jobs <= 1:
+        for batch, marker in batches:
+            edges += write_batch(conn, extract_batch(batch))
+            pages += len(batch)
+            if on_batch:
+                on_batch(conn, marker, pages)
+        return pages, edges
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for batch, marker in batches:
+            pending.append((pool.submit(extract_batch, batch), len(batch), marker))
+            if len(pending) >= jobs * 2:
+                future, size, done_marker = pending.popleft()
+                edges += write_batch(conn, future.result())
+                pages += size
+                if on_batch:
+                    on_batch(conn, done_marker, pages)
+        while pending:
+            future, size, done_marker = pending.popleft()
+            edges += write_batch(conn, future.result())
+            pages += size
+            if on_batch:
+                on_batch(conn, done_marker, pages)
+    return pages, edges
+
+
+def iter_all_pages(conn, batch_size, start_rowid):
+    """(rows, last_rowid) batches over snps in rowid order."""
+    last_rowid = start_rowid
+    while True:
+        rows = conn.execute(
+            'SELECT rowid, rsid, content, version FROM snps WHERE rowid > ? ORDER BY rowid LIMIT ?',
+            (last_rowid, batch_size)
+        ).fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        yield [row[1:] for row in rows], last_rowid
+
+
+def iter_dirty_pages(conn, batch_size):
+    """(rows, last_rsid) batches over the pages marked dirty."""
+    last_rsid = ''
+    while True:
+        rows = conn.execute('''
+            SELECT d.rsid, s.content, d.version
+            FROM links_dirty d JOIN snps s ON s.rsid = d.rsid
+            WHERE d.rsid > ? ORDER BY d.rsid LIMIT ?
+        ''', (last_rsid, batch_size)).fetchall()
+        if not rows:
+            break
+        last_rsid = rows[-1][0]
+        yield rows, last_rsid
+
+
+def build(conn, jobs, batch_size):
+    """Extract links for every page, resuming from the saved rowid."""
+    if snpdb.get_progress(conn, 'links_backfilled') == '1':
+        return 0, 0
+    start_rowid = int(snpdb.get_progress(conn, 'links_backfill_rowid') or 0)
+    max_rowid = conn.execute('SELECT MAX(rowid) FROM snps').fetchone()[0] or 0
+
+    def checkpoint(conn, last_rowid, pages):
+        with conn:
+            snpdb.set_progress(conn, 'links_backfill_rowid', last_rowid)
+        print(f"\r  Extracting links: rowid {last_rowid:,} / {max_rowid:,}", end='', flush=True)
+
+    result = run_pipeline(conn, iter_all_pages(conn, batch_size, start_rowid), jobs, checkpoint)
+    # Pages written from here on are marked dirty by the triggers
+    with conn:
+        snpdb.set_progress(conn, 'links_backfilled', 1)
+    print()
+    return result
+
+
+def update(conn, jobs, batch_size):
+    """Re-extract links for the pages marked dirty."""
+    def show(conn, marker, pages):
+        print(f"\r  Updated {pages:,} pages...", end='', flush=True)
+
+    result = run_pipeline(conn, iter_dirty_pages(conn, batch_size), jobs, show)
+    if result[0]:
+        print()
+    return result
+
+
+def parse_kinds(names):
+    return [snpdb.LINK_KINDS[name] for name in names] if names else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the SNPedia link graph.")
+    parser.add_argument('--db', default=DB_PATH, help="Database path")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    kinds = sorted(snpdb.LINK_KINDS)
+    for name, help_text in (('build', "Extract links from every page (first run)"),
+                            ('update', "Re-extract links for pages written in bulk")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="Extraction processes")
+        p.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Pages per batch")
+
+    to_parser = sub.add_parser('to', help="Pages that link to a title")
+    to_parser.add_argument('title')
+    to_parser.add_argument('--kind', action='append', choices=kinds, help="Only these edge kinds")
+    to_parser.add_argument('--snps-only', action='store_true', help="Only Rs/I pages as sources")
+
+    from_parser = sub.add_parser('from', help="Titles a page links to")
+    from_parser.add_argument('title')
+    from_parser.add_argument('--kind', action='append', choices=kinds, help="Only these edge kinds")
+
+    missing_parser = sub.add_parser('missing', help="Link targets not in the database")
+    missing_parser.add_argument('--kind', action='append', choices=kinds,
+                                help="Only these edge kinds (default: snp, genotype)")
+    missing_parser.add_argument('--enqueue', action='store_true', help="Queue them for the scraper")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"✗ Database not found: {args.db}")
+        sys.exit(1)
+
+    if args.command in ('build', 'update'):
+        conn = sqlite3.connect(args.db, timeout=30)
+        snpdb.create_tables(conn)
+        start = time.time()
+        try:
+            if args.command == 'build':
+                pages, edges = build(conn, args.jobs, args.batch_size)
+                print(f"✓ Link graph built: {pages:,} pages, {edges:,} edges")
+            pages, edges = update(conn, args.jobs, args.batch_size)
+            print(f"✓ {pages:,} dirty pages re-extracted ({edges:,} edges) in {time.time() - start:.1f}s")
+        except KeyboardInterrupt:
+            print("\n\nInterrupted. Progress saved - run again to resume.")
+        conn.close()
+        return
+
+    conn = snpdb.connect(args.db, readonly=args.command != 'missing' or not args.enqueue)
+    if snpdb.get_progress(conn, 'links_backfilled') != '1':
+        print("✗ Link graph is not built yet - run: python link_graph.py build")
+        sys.exit(1)
+
+    title = snpdb.normalize_title(args.title) if args.command in ('to', 'from') else None
+    if args.command == 'to':
+        rows = snpdb.links_to(conn, title, parse_kinds(args.kind), args.snps_only)
+        for src, kind in rows:
+            print(f"{src}\t{snpdb.LINK_KIND_NAMES[kind]}")
+        print(f"✓ {len(rows):,} pages link to {title}", file=sys.stderr)
+    elif args.command == 'from':
+        rows = snpdb.links_from(conn, title, parse_kinds(args.kind))
+        for kind, dst in rows:
+            print(f"{dst}\t{snpdb.LINK_KIND_NAMES[kind]}")
+        print(f"✓ {title} links to {len(rows):,} pages", file=sys.stderr)
+    else:
+        missing = snpdb.missing_link_targets(
+            conn, parse_kinds(args.kind or ['snp', 'genotype'])
+        )
+        if args.enqueue:
+            with conn:
+                added = snpdb.enqueue_fetch(conn, missing, 'linked')
+            print(f"✓ {len(missing):,} missing targets, {added:,} newly queued for the scraper")
+        else:
+            for dst in missing:
+                print(dst)
+            print(f"✓ {len(missing):,} missing targets", file=sys.stderr)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Bring an existing snpedia.db up to the current schema.
+
+Migrations are numbered (the database records its version in PRAGMA
+user_version). Their schema steps are applied immediately in short
+transactions; backfills of existing rows then run in small rowid-ranged
+transactions with a pause between them, so this can run while the scraper
+is active. Interrupt it at any time and run it again to resume. The one
+exception is the scraped_at index, which is built in a single transaction
+that blocks writers; run this with the scraper stopped the first time.
+
+Usage:
+    python migrate_db.py             # apply migrations and run backfills
+    python migrate_db.py --status    # show what has been applied
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import snpdb  # noqa: E402
+
+
+def print_status(conn):
+    status = snpdb.migration_status(conn)
+    print(f"Schema version {status['schema_version']} of {status['latest_version']}")
+    for m in status['migrations']:
+        mark = '✓' if m['applied'] else '✗'
+        line = f"  {mark} {m['version']}: {m['description']}"
+        if m['backfill'] and m['applied']:
+            if m['backfill_done']:
+                line += f" (backfill '{m['backfill']}' done)"
+            else:
+                line += f" (backfill '{m['backfill']}' at rowid {m['backfill_rowid']:,} / {status['max_rowid']:,})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate snpedia.db to the current schema.")
+    parser.add_argument('--db', default=DB_PATH, help="Database path")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Rows per transaction")
+    parser.add_argument('--pause', type=float, default=0.05, help="Seconds to sleep between batches")
+    parser.add_argument('--status', action='store_true', help="Show migration status and exit")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"✗ Database not found: {args.db}")
+        sys.exit(1)
+
+    print("=== SNPedia Database Migration ===")
+    conn = sqlite3.connect(args.db, timeout=30)
+    if args.status:
+        print_status(conn)
+        conn.close()
+        return
+
+    applied = snpdb.create_tables(conn)
+    if applied:
+        print(f"✓ Applied migrations: {', '.join(str(v) for v in applied)}")
+    print(f"✓ Schema at version {snpdb.schema_version(conn)}")
+
+    def show(name, done, total):
+        print(f"\r  Backfilling {name}: rowid {done:,} / {total:,}", end='', flush=True)
+
+    start = time.time()
+    try:
+        for name in snpdb.pending_backfills(conn):
+            touched = snpdb.run_backfill(conn, name, args.batch_size, args.pause,
+                                         lambda done, total: show(name, done, total))
+            print(f"\n✓ Backfill '{name}' complete ({touched:,} rows)")
+    except KeyboardInterrupt:
+        print("\n\nInterrupted. Progress saved - run again to resume.")
+        conn.close()
+        return
+    conn.close()
+
+    print(f"✓ All backfills complete in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Compile snpedia.db into an immutable, memory-mappable snapshot file.
+
+Read-heavy services don't need SQLite's locking or B-tree walks. A snapshot
+is one file laid out as:
+
+    header | compressed records | sorted keys (uint64) | record offsets (uint64)
+
+Keys are (namespace << 48) | number, the same integer key as snp_keys. The
+reader mmaps the file and binary-searches the key array in place, so any
+number of processes can share one page-cached copy with no load step.
+
+Usage:
+    python snapshot.py build snpedia.snap
+    python snapshot.py get snpedia.snap rs53576
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from datetime import datetime
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import snpdb  # noqa: E402
+
+MAGIC = b'SNPSNAP1'
+# magic, byte order, count, keys offset, offsets offset, meta offset, meta length
+HEADER = struct.Struct('<8sB7xQQQQQ')
+NS_SHIFT = 48
+
+
+def pack_key(ns, num):
+    return (ns << NS_SHIFT) | num
+
+
+def _align(f, boundary=8):
+    pad = -f.tell() % boundary
+    if pad:
+        f.write(b'\0' * pad)
+
+
+def build_snapshot(db_path, out_path, level=6):
+    """Write a snapshot of every Rs/I page. Returns the record count.
+
+    Each record is the zlib-compressed "title\\ncontent", so lookups can
+    report the page title as stored. The file is written to a temp name and
+    renamed into place, so readers never see a partial snapshot.
+    """
+    conn = snpdb.connect(db_path, readonly=True)
+    if snpdb.get_progress(conn, 'snp_keys_backfilled') != '1':
+        conn.close()
+        raise RuntimeError("SNP keys are not built yet - run: python migrate_db.py")
+
+    keys = array('Q')
+    offsets = array('Q')
+    temp_path = out_path + '.tmp'
+
+    with open(temp_path, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        blob_start = f.tell()
+
+        # One read transaction, so the snapshot is a consistent point in time
+        conn.execute('BEGIN')
+        cursor = conn.execute('''
+            SELECT k.ns, k.num, s.rsid, s.content
+            FROM snp_keys k JOIN snps s ON s.rsid = k.rsid
+            ORDER BY k.ns, k.num
+        ''')
+        for ns, num, rsid, content in cursor:
+            keys.append(pack_key(ns, num))
+            offsets.append(f.tell() - blob_start)
+            f.write(zlib.compress(f'{rsid}\n{content or ""}'.encode('utf-8'), level))
+        offsets.append(f.tell() - blob_start)
+        conn.execute('COMMIT')
+        conn.close()
+
+        _align(f)
+        keys_offset = f.tell()
+        keys.tofile(f)
+        offsets_offset = f.tell()
+        offsets.tofile(f)
+
+        meta = json.dumps({
+            'created': datetime.now().isoformat(),
+            'source': os.path.basename(db_path),
+            'count': len(keys),
+            'blob_offset': blob_start,
+        }).encode('utf-8')
+        meta_offset = f.tell()
+        f.write(meta)
+
+        f.seek(0)
+        f.write(HEADER.pack(
+            MAGIC, 0 if sys.byteorder == 'little' else 1, len(keys),
+            keys_offset, offsets_offset, meta_offset, len(meta)
+        ))
+
+    os.replace(temp_path, out_path)
+    return len(keys)
+
+
+class SnapshotReader:
+    """Read-only lookups against a snapshot file.
+
+    The key and offset arrays are views straight into the mapped file, and
+    get_raw() returns the compressed record without copying it.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, byte_order, count, keys_offset, offsets_offset,
+         meta_offset, meta_length) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a snapshot file: {path}")
+        if byte_order != (0 if sys.byteorder == 'little' else 1):
+            self.close()
+            raise ValueError("Snapshot was built on a machine with a different byte order")
+
+        self.count = count
+        self.meta = json.loads(self._mm[meta_offset:meta_offset + meta_length])
+        self._blob_offset = self.meta['blob_offset']
+        self._view = memoryview(self._mm)
+        self._keys = self._view[keys_offset:keys_offset + 8 * count].cast('Q')
+        self._offsets = self._view[offsets_offset:offsets_offset + 8 * (count + 1)].cast('Q')
+
+    def _find(self, rsid):
+        key = snpdb.parse_snp_id(rsid)
+        if key is None:
+            return None
+        packed = pack_key(*key)
+        i = bisect.bisect_left(self._keys, packed)
+        if i < self.count and self._keys[i] == packed:
+            return i
+        return None
+
+    def get_raw(self, rsid):
+        """The zlib-compressed record for rsid as a memoryview, or None."""
+        i = self._find(rsid)
+        if i is None:
+            return None
+        start = self._blob_offset + self._offsets[i]
+        end = self._blob_offset + self._offsets[i + 1]
+        return self._view[start:end]
+
+    def get(self, rsid):
+        """Return (title, content) for rsid, or None if it isn't in the snapshot."""
+        raw = self.get_raw(rsid)
+        if raw is None:
+            return None
+        title, _, content = zlib.decompress(raw).decode('utf-8').partition('\n')
+        return title, content
+
+    def get_many(self, rsids):
+        """Return {rsid: (title, content)} for the rsids that exist."""
+        found = {}
+        for rsid in rsids:
+            record = self.get(rsid)
+            if record is not None:
+                found[rsid] = record
+        return found
+
+    def __contains__(self, rsid):
+        return self._find(rsid) is not None
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        # Views into the map must be released before it can be closed
+        for name in ('_keys', '_offsets', '_view'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a read-only SNPedia snapshot.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = sub.add_parser('build', help="Compile the database into a snapshot file")
+    build_parser.add_argument('output', help="Snapshot file to write")
+    build_parser.add_argument('--db', default=DB_PATH, help="Database path")
+
+    get_parser = sub.add_parser('get', help="Look up SNPs in a snapshot")
+    get_parser.add_argument('snapshot', help="Snapshot file")
+    get_parser.add_argument('rsids', nargs='+', help="Identifiers such as rs53576 or i3000001")
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if not os.path.exists(args.db):
+            print(f"✗ Database not found: {args.db}")
+            sys.exit(1)
+        start = time.time()
+        try:
+            count = build_snapshot(args.db, args.output)
+        except RuntimeError as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+        size_mb = os.path.getsize(args.output) / (1024 * 1024)
+        print(f"✓ Snapshot written: {args.output} ({count:,} SNPs, {size_mb:.1f} MB) in {time.time() - start:.1f}s")
+    else:
+        with SnapshotReader(args.snapshot) as reader:
+            for rsid in args.rsids:
+                record = reader.get(rsid)
+                if record is None:
+                    print(f"✗ {rsid}: not found")
+                else:
+                    title, content = record
+                    print(f"=== {title} ===\n{content}\n")
+
+
+if __name__ == "__main__":
+    main()
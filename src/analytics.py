@@ -0,0 +1,439 @@
+"""
+Columnar cache of the numeric fields parsed out of stored pages.
+
+Questions like "magnitude distribution by chromosome" or "bad-repute
+genotypes per gene" would otherwise need a regex pass over every page's
+wikitext. The cache parses each page once into fixed-width NumPy columns
+(one row per page) and keeps them current incrementally:
+
+  - pages inserted since the last refresh are found by rowid, and
+  - pages rewritten or deleted since then through the snps_changes log
+    (snpdb.changes_since), which the snps triggers append to.
+
+Grouped aggregations are bincounts over those columns and take milliseconds
+over the whole corpus. The columns are saved next to the database
+(snpedia.analytics.npz), so a restart only parses what changed since.
+
+    cache = analytics.AnalyticsCache('snpedia.db')
+    cache.refresh(conn)
+    cache.aggregate('gene', kind='genotype', repute='bad', limit=20)
+
+Needs NumPy: pip install numpy
+"""
+
+import math
+import os
+import re
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import snpdb
+
+CACHE_FORMAT = 2
+
+# Page kinds
+KIND_RS = 0
+KIND_I = 1
+KIND_GENOTYPE = 2
+KIND_OTHER = 3
+KIND_NAMES = ['rs', 'i', 'genotype', 'other']
+KIND_FILTERS = {
+    'snp': (KIND_RS, KIND_I),
+    'genotype': (KIND_GENOTYPE,),
+    'other': (KIND_OTHER,),
+    'all': (KIND_RS, KIND_I, KIND_GENOTYPE, KIND_OTHER),
+}
+
+# Chromosome codes; 0 is unknown
+CHROMOSOMES = [None] + [str(n) for n in range(1, 23)] + ['X', 'Y', 'MT']
+CHROMOSOME_CODES = {name: code for code, name in enumerate(CHROMOSOMES) if name}
+CHROMOSOME_CODES['M'] = CHROMOSOME_CODES['MT']
+
+REPUTES = [None, 'good', 'bad']
+REPUTE_CODES = {'good': 1, 'bad': 2}
+
+# Magnitudes are grouped in half steps, with everything from 10 up together
+MAGNITUDE_STEP = 0.5
+MAGNITUDE_BUCKETS = 20
+MAGNITUDE_LABELS = [None] + [f'{i * MAGNITUDE_STEP:g}' for i in range(MAGNITUDE_BUCKETS)] + [
+    f'{MAGNITUDE_BUCKETS * MAGNITUDE_STEP:g}+'
+]
+
+GROUP_BY = ('chromosome', 'gene', 'magnitude', 'repute', 'kind')
+
+# name, dtype, value for "unknown"
+COLUMNS = (
+    ('rowid', 'int64', 0),
+    ('kind', 'int8', KIND_OTHER),
+    ('snp_key', 'int64', -1),      # Rs/I number * 2 + namespace; a genotype's parent SNP
+    ('chromosome', 'int8', 0),
+    ('position', 'int64', 0),
+    ('gene', 'int32', -1),         # index into genes
+    ('magnitude', 'float32', math.nan),
+    ('repute', 'int8', 0),
+    ('length', 'int32', 0),
+)
+
+# The {{Rsnum}} and {{Genotype}} parameters the cache keeps
+FIELD_RE = re.compile(r'\|\s*(chromosome|position|gene|magnitude|repute)\s*=\s*([^|\n}]*)', re.IGNORECASE)
+
+
+def snp_key(title):
+    """Integer key of an Rs/I id, or -1."""
+    key = snpdb.parse_snp_id(title)
+    return key[1] * 2 + key[0] if key is not None else -1
+
+
+def parse_page(title, content):
+    """(kind, snp_key, chromosome, position, gene, magnitude, repute, length) of a page.
+
+    gene is a name (or None); the other fields are already encoded.
+    """
+    content = content or ''
+    key = snp_key(title)
+    if key >= 0:
+        kind = KIND_RS if key % 2 == snpdb.NS_RS else KIND_I
+    elif snpdb.classify_title(title) == snpdb.LINK_GENOTYPE:
+        kind = KIND_GENOTYPE
+        key = snp_key(title.split('(', 1)[0])
+    else:
+        return KIND_OTHER, -1, 0, 0, None, math.nan, 0, len(content)
+
+    fields = {}
+    for name, value in FIELD_RE.findall(content):
+        fields.setdefault(name.lower(), value.strip())
+
+    chromosome = CHROMOSOME_CODES.get(fields.get('chromosome', '').upper().removeprefix('CHR'), 0)
+    position = fields.get('position', '').replace(',', '')
+    position = int(position) if position.isdigit() else 0
+    gene = re.split(r'[,;/\s]+', fields.get('gene', '').strip('[] '))[0]
+    gene = snpdb.normalize_title(gene) if gene else None
+    try:
+        magnitude = float(fields.get('magnitude') or 'nan')
+    except ValueError:
+        magnitude = math.nan
+    repute = REPUTE_CODES.get(fields.get('repute', '').lower(), 0)
+    return kind, key, chromosome, position, gene, magnitude, repute, len(content)
+
+
+class AnalyticsCache:
+    """Parsed page fields as NumPy columns, refreshed incrementally from snps.
+
+    Columns are over-allocated and appended to in place. Readers work on
+    [:rows] views taken under the lock, so a refresh in another thread
+    never changes the length of an array a query is using.
+    """
+
+    def __init__(self, db_path, cache_path=None):
+        if np is None:
+            raise RuntimeError("Analytics needs NumPy: pip install numpy")
+        self.db_path = db_path
+        self.cache_path = cache_path or os.path.splitext(db_path)[0] + '.analytics.npz'
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.clear()
+        self.load()
+
+    def clear(self):
+        with self.lock:
+            self.columns = {name: np.empty(0, dtype) for name, dtype, _ in COLUMNS}
+            self.rows = 0
+            self.genes = []
+            self.gene_codes = {}
+            self.max_rowid = 0
+            self.last_change = 0
+            self.unsaved = 0
+            self.refreshed_at = None
+            self._parents = None
+
+    # --- Persistence --------------------------------------------------------
+
+    def load(self):
+        """Load the saved columns, if there are any. Returns True if loaded."""
+        try:
+            saved = np.load(self.cache_path, allow_pickle=False)
+        except (OSError, ValueError):
+            return False
+        with saved:
+            if int(saved['format']) != CACHE_FORMAT:
+                return False
+            with self.lock:
+                self.columns = {name: saved[name].astype(dtype) for name, dtype, _ in COLUMNS}
+                self.rows = len(self.columns['rowid'])
+                self.genes = [str(gene) for gene in saved['genes']]
+                self.gene_codes = {gene: code for code, gene in enumerate(self.genes)}
+                self.max_rowid = int(saved['max_rowid'])
+                self.last_change = int(saved['last_change'])
+                self._parents = None
+        return True
+
+    def save(self):
+        """Write the columns next to the database (atomically)."""
+        with self.lock:
+            arrays = {name: self.columns[name][:self.rows] for name, _, _ in COLUMNS}
+            arrays['genes'] = np.array(self.genes, dtype=str)
+            arrays['max_rowid'] = np.array(self.max_rowid)
+            arrays['last_change'] = np.array(self.last_change)
+            arrays['format'] = np.array(CACHE_FORMAT)
+            self.unsaved = 0
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self.cache_path)
+
+    # --- Refresh -----------------------------------------------------------
+
+    def refresh(self, conn, batch_size=5000, verify=False, save_after=10000, progress_callback=None):
+        """Bring the cache up to date with the database. Returns the pages parsed.
+
+        Rewritten and deleted pages come from the snps_changes log. If the
+        log no longer reaches back to the last refresh (or belongs to another
+        file), the cache is rebuilt. verify also checks that the cached rows
+        still exist (after loading from disk, or when the database file was
+        replaced) and rebuilds if not.
+        The cache is saved once save_after pages have been parsed since
+        the last save. progress_callback(rowid, max_rowid) is called per batch.
+        """
+        with self.refresh_lock:
+            # Read before the rows: a change committed in between is
+            # applied again next time, which is harmless
+            changes = snpdb.changes_since(conn, self.last_change)
+            max_rowid = conn.execute('SELECT MAX(rowid) FROM snps').fetchone()[0] or 0
+            if changes is None or max_rowid < self.max_rowid or (verify and not self._matches(conn)):
+                self.clear()
+                changes = snpdb.change_seq(conn), []
+            last_change, changed = changes
+
+            parsed = 0
+            changed = [rowid for rowid in changed if rowid <= self.max_rowid]
+            for i in range(0, len(changed), snpdb.MAX_SQL_VARIABLES):
+                chunk = changed[i:i + snpdb.MAX_SQL_VARIABLES]
+                rows = conn.execute(
+                    f'SELECT rowid, rsid, content FROM snps WHERE rowid IN ({",".join("?" * len(chunk))})',
+                    chunk
+                ).fetchall()
+                self._write(rows, append=False)
+                self._remove(set(chunk) - {row[0] for row in rows})
+                parsed += len(rows)
+            with self.lock:
+                self.last_change = last_change
+
+            last_rowid = self.max_rowid
+            while last_rowid < max_rowid:
+                rows = conn.execute(
+                    'SELECT rowid, rsid, content FROM snps WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                    (last_rowid, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                self._write(rows, append=True)
+                last_rowid = rows[-1][0]
+                parsed += len(rows)
+                if progress_callback:
+                    progress_callback(last_rowid, max_rowid)
+
+            self.refreshed_at = time.time()
+            if self.unsaved and self.unsaved >= save_after:
+                self.save()
+            return parsed
+
+    def _matches(self, conn):
+        count = conn.execute('SELECT COUNT(*) FROM snps WHERE rowid <= ?', (self.max_rowid,)).fetchone()[0]
+        return count == self.rows
+
+    def _gene_code(self, gene):
+        if gene is None:
+            return -1
+        code = self.gene_codes.get(gene)
+        if code is None:
+            code = self.gene_codes[gene] = len(self.genes)
+            self.genes.append(gene)
+        return code
+
+    def _write(self, rows, append):
+        """Parse (rowid, rsid, content) rows into the columns."""
+        records = []
+        for rowid, title, content in rows:
+            kind, key, chromosome, position, gene, magnitude, repute, length = parse_page(title, content)
+            records.append((rowid, kind, key, chromosome, position, self._gene_code(gene),
+                            magnitude, repute, length))
+        if not records:
+            return
+
+        values = list(zip(*records))
+        new = {name: np.array(values[i], dtype=dtype) for i, (name, dtype, _) in enumerate(COLUMNS)}
+        with self.lock:
+            if append:
+                end = self.rows + len(records)
+                if end > len(self.columns['rowid']):
+                    capacity = max(end, 2 * len(self.columns['rowid']), 1024)
+                    for name, dtype, fill in COLUMNS:
+                        grown = np.full(capacity, fill, dtype)
+                        grown[:self.rows] = self.columns[name][:self.rows]
+                        self.columns[name] = grown
+                for name, _, _ in COLUMNS:
+                    self.columns[name][self.rows:end] = new[name]
+                self.rows = end
+                self.max_rowid = max(self.max_rowid, int(new['rowid'][-1]))
+            else:
+                # Rowids are appended in order, so existing rows can be found by bisection
+                rowids = self.columns['rowid'][:self.rows]
+                at = np.searchsorted(rowids, new['rowid'])
+                found = at < self.rows
+                found[found] = rowids[at[found]] == new['rowid'][found]
+                for name, _, _ in COLUMNS:
+                    self.columns[name][at[found]] = new[name][found]
+            self.unsaved += len(records)
+            self._parents = None
+
+    def _remove(self, rowids):
+        """Drop the rows of deleted pages.
+
+        The columns are copied rather than compacted in place, so a query
+        still working on the old [:rows] views isn't shifted under it.
+        """
+        if not rowids:
+            return
+        with self.lock:
+            keep = ~np.isin(self.columns['rowid'][:self.rows], np.fromiter(rowids, 'int64'))
+            if keep.all():
+                return
+            for name, _, _ in COLUMNS:
+                self.columns[name] = self.columns[name][:self.rows][keep]
+            self.unsaved += self.rows - int(keep.sum())
+            self.rows = int(keep.sum())
+            self._parents = None
+
+    # --- Queries -----------------------------------------------------------
+
+    def snapshot(self):
+        """[:rows] views of the columns, plus the gene names."""
+        with self.lock:
+            columns = {name: self.columns[name][:self.rows] for name, _, _ in COLUMNS}
+            return columns, list(self.genes), self._resolve_parents(columns)
+
+    def _resolve_parents(self, columns):
+        """Chromosome and gene per row, taken from the parent SNP for genotypes.
+
+        Computed once per refresh: a sort of the SNP rows' keys and one
+        searchsorted join for every genotype row.
+        """
+        if self._parents is not None and len(self._parents[0]) == self.rows:
+            return self._parents
+        kind, key = columns['kind'], columns['snp_key']
+        chromosome, gene = columns['chromosome'].copy(), columns['gene'].copy()
+
+        snp_rows = np.flatnonzero(kind <= KIND_I)
+        order = snp_rows[np.argsort(key[snp_rows], kind='stable')]
+        sorted_keys = key[order]
+        genotype_rows = np.flatnonzero((kind == KIND_GENOTYPE) & (key >= 0))
+        if len(order) and len(genotype_rows):
+            at = np.minimum(np.searchsorted(sorted_keys, key[genotype_rows]), len(order) - 1)
+            hit = sorted_keys[at] == key[genotype_rows]
+            parent = order[at[hit]]
+            child = genotype_rows[hit]
+            chromosome[child] = np.where(chromosome[child] > 0, chromosome[child], chromosome[parent])
+            gene[child] = np.where(gene[child] >= 0, gene[child], gene[parent])
+
+        self._parents = (chromosome, gene)
+        return self._parents
+
+    def aggregate(self, group_by='chromosome', kind='genotype', min_magnitude=None, repute=None,
+                  chromosome=None, gene=None, limit=None):
+        """Count pages per group, with magnitude and repute statistics.
+
+        Genotype pages are grouped by their SNP's chromosome and gene.
+        Returns {"group_by", "kind", "pages", "groups": [...]}; groups are
+        in natural order, except genes, which are largest first.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY)}")
+        if kind not in KIND_FILTERS:
+            raise ValueError(f"kind must be one of: {', '.join(KIND_FILTERS)}")
+
+        columns, genes, (chromosomes, gene_ids) = self.snapshot()
+        magnitude = columns['magnitude']
+        reputes = columns['repute']
+
+        mask = np.isin(columns['kind'], KIND_FILTERS[kind])
+        if min_magnitude is not None:
+            mask &= magnitude >= min_magnitude
+        if repute is not None:
+            if repute not in REPUTE_CODES:
+                raise ValueError("repute must be good or bad")
+            mask &= reputes == REPUTE_CODES[repute]
+        if chromosome is not None:
+            code = CHROMOSOME_CODES.get(str(chromosome).upper().removeprefix('CHR'))
+            if code is None:
+                raise ValueError(f"Unknown chromosome: {chromosome}")
+            mask &= chromosomes == code
+        if gene is not None:
+            code = genes.index(gene) if gene in genes else -2
+            mask &= gene_ids == code
+
+        if group_by == 'chromosome':
+            codes, labels = chromosomes, CHROMOSOMES
+        elif group_by == 'gene':
+            codes, labels = gene_ids + 1, [None] + genes
+        elif group_by == 'repute':
+            codes, labels = reputes, REPUTES
+        elif group_by == 'kind':
+            codes, labels = columns['kind'], KIND_NAMES
+        else:
+            buckets = np.floor(np.nan_to_num(magnitude, nan=-1.0) / MAGNITUDE_STEP)
+            codes = np.where(np.isnan(magnitude), 0, np.clip(buckets, 0, MAGNITUDE_BUCKETS) + 1)
+            labels = MAGNITUDE_LABELS
+
+        codes = codes[mask].astype(np.intp)
+        size = len(labels)
+        counts = np.bincount(codes, minlength=size)
+        group_reputes = reputes[mask]
+        good = np.bincount(codes[group_reputes == 1], minlength=size)
+        bad = np.bincount(codes[group_reputes == 2], minlength=size)
+
+        group_magnitudes = magnitude[mask]
+        known = ~np.isnan(group_magnitudes)
+        rated = np.bincount(codes[known], minlength=size)
+        total = np.bincount(codes[known], weights=group_magnitudes[known], minlength=size)
+        highest = np.full(size, -np.inf)
+        np.maximum.at(highest, codes[known], group_magnitudes[known])
+
+        present = np.flatnonzero(counts)
+        if group_by == 'gene':
+            present = present[np.argsort(-counts[present], kind='stable')]
+        if limit:
+            present = present[:limit]
+
+        groups = []
+        for code in present.tolist():
+            groups.append({
+                "key": labels[code],
+                "count": int(counts[code]),
+                "good": int(good[code]),
+                "bad": int(bad[code]),
+                "rated": int(rated[code]),
+                "magnitude_mean": round(float(total[code] / rated[code]), 3) if rated[code] else None,
+                "magnitude_max": float(highest[code]) if rated[code] else None,
+            })
+        return {
+            "group_by": group_by,
+            "kind": kind,
+            "pages": int(mask.sum()),
+            "groups": groups,
+        }
+
+    def status(self):
+        with self.lock:
+            return {
+                "rows": self.rows,
+                "max_rowid": self.max_rowid,
+                "genes": len(self.genes),
+                "last_change": self.last_change,
+                "refreshed_at": self.refreshed_at,
+                "memory_mb": round(sum(self.columns[name].nbytes for name, _, _ in COLUMNS) / (1024 * 1024), 1),
+            }
@@ -0,0 +1,292 @@
+"""
+Backup manifest, verification and restore.
+
+Every backup the dashboard creates is recorded in backups/manifest.json
+with its SHA-256, size and row count. Verification re-checks each file in
+a process pool (one backup per worker: checksum, PRAGMA integrity_check,
+row count against the manifest) and records the result next to the entry,
+so a bad copy is found before it is needed:
+
+    results = backups.verify_backups('backups', jobs=4)
+
+A restore copies (or decompresses, for .gz) the backup into a temporary
+file beside the database, validates that copy, and renames it over the
+database under an exclusive lock, so readers see either the old file or
+the complete new one. The replaced file is kept as <db>.pre-restore.
+
+    backups.restore_backup('backups/snpedia_backup_5000_snps_....db', 'snpedia.db')
+
+The swap also takes the writer lock (snpdb.lock_writer) that a CLI scraper
+holds while it runs, and refuses with DatabaseBusy if it can't: that
+scraper's connection would keep writing to the replaced file. The
+dashboard's restore endpoint stops and reopens a hosted scraper itself.
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import snpdb
+
+MANIFEST_NAME = 'manifest.json'
+BACKUP_PATTERNS = ('snpedia_backup_*.db', 'snpedia_backup_*.db.gz')
+CHUNK_SIZE = 1024 * 1024
+
+_manifest_lock = threading.Lock()
+
+
+class BackupError(Exception):
+    """A backup failed validation or couldn't be restored."""
+
+
+class DatabaseBusy(BackupError):
+    """Another writer holds the database, so it can't be replaced now."""
+
+
+def backup_files(backup_dir):
+    """Backup files in backup_dir, oldest first."""
+    found = []
+    for pattern in BACKUP_PATTERNS:
+        found.extend(glob.glob(os.path.join(backup_dir, pattern)))
+    return sorted(found)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_database(path, quick=False):
+    """(integrity result, snps row count or None) of a database file."""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        pragma = 'quick_check' if quick else 'integrity_check'
+        problems = [row[0] for row in conn.execute(f'PRAGMA {pragma}')]
+        integrity = 'ok' if problems == ['ok'] else '; '.join(problems[:5])
+        try:
+            rows = conn.execute('SELECT COUNT(*) FROM snps').fetchone()[0]
+        except sqlite3.DatabaseError:
+            rows = None
+        return integrity, rows
+    except sqlite3.DatabaseError as e:
+        return str(e), None
+    finally:
+        conn.close()
+
+
+def copy_backup(backup_path, dest_path):
+    """Copy a backup to dest_path, decompressing .gz, and fsync it."""
+    opener = gzip.open if backup_path.endswith('.gz') else open
+    with opener(backup_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+
+def inspect_backup(path, quick=False):
+    """Worker: checksum, integrity and row count of one backup file.
+
+    Compressed backups are expanded to a temporary file for the check.
+    """
+    start = time.time()
+    result = {"file": os.path.basename(path), "size": os.path.getsize(path)}
+    try:
+        result["sha256"] = file_sha256(path)
+        if path.endswith('.gz'):
+            tmp_path = f'{path}.verify-{os.getpid()}'
+            try:
+                copy_backup(path, tmp_path)
+                result["integrity"], result["rows"] = check_database(tmp_path, quick)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        else:
+            result["integrity"], result["rows"] = check_database(path, quick)
+    except (OSError, EOFError, gzip.BadGzipFile) as e:
+        result["integrity"], result["rows"] = str(e), None
+    result["seconds"] = round(time.time() - start, 2)
+    return result
+
+
+# --- Manifest -------------------------------------------------------------
+
+def manifest_path(backup_dir):
+    return os.path.join(backup_dir, MANIFEST_NAME)
+
+
+def load_manifest(backup_dir):
+    """{filename: entry} for the backups that still exist."""
+    try:
+        with open(manifest_path(backup_dir), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    return {name: entry for name, entry in manifest.items()
+            if os.path.exists(os.path.join(backup_dir, name))}
+
+
+def update_manifest(backup_dir, entries):
+    """Merge {filename: fields} into the manifest and save it atomically."""
+    with _manifest_lock:
+        manifest = load_manifest(backup_dir)
+        for name, fields in entries.items():
+            manifest.setdefault(name, {}).update(fields)
+        tmp_path = manifest_path(backup_dir) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path(backup_dir))
+    return manifest
+
+
+def record_backup(path):
+    """Add a freshly written backup to the manifest. Returns its entry."""
+    integrity, rows = check_database(path, quick=True)
+    entry = {
+        "sha256": file_sha256(path),
+        "size": os.path.getsize(path),
+        "rows": rows,
+        "created": datetime.now().isoformat(),
+    }
+    if integrity != 'ok':
+        entry.update(status='corrupt', error=integrity, verified_at=entry['created'])
+    update_manifest(os.path.dirname(path), {os.path.basename(path): entry})
+    return entry
+
+
+# --- Verification ---------------------------------------------------------
+
+def judge(entry, inspected):
+    """Compare an inspection with the manifest entry: (status, error)."""
+    if inspected['integrity'] != 'ok':
+        return 'corrupt', inspected['integrity']
+    if entry is None or 'sha256' not in entry:
+        return 'unrecorded', None
+    if entry['sha256'] != inspected['sha256']:
+        return 'corrupt', "checksum differs from the manifest"
+    if entry.get('rows') is not None and entry['rows'] != inspected['rows']:
+        return 'mismatch', f"{inspected['rows']} rows, manifest says {entry['rows']}"
+    return 'ok', None
+
+
+def verify_backups(backup_dir, jobs=None, files=None, quick=False, mp_context=None, progress_callback=None):
+    """Verify backups in a process pool and record the results in the manifest.
+
+    Backups that predate the manifest are recorded from this first
+    verification ('unrecorded'), provided they pass the integrity check.
+    progress_callback(result) is called as each backup finishes.
+    Returns the results, oldest backup first.
+    """
+    paths = files or backup_files(backup_dir)
+    if not paths:
+        return []
+    manifest = load_manifest(backup_dir)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths)))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context) as pool:
+        for inspected in pool.map(inspect_backup, paths, [quick] * len(paths)):
+            entry = manifest.get(inspected['file'])
+            inspected['status'], inspected['error'] = judge(entry, inspected)
+            results.append(inspected)
+            if progress_callback:
+                progress_callback(inspected)
+
+    now = datetime.now().isoformat()
+    updates = {}
+    for result in results:
+        fields = {"status": result['status'], "error": result['error'], "verified_at": now}
+        if result['status'] == 'unrecorded':
+            fields.update(sha256=result['sha256'], size=result['size'], rows=result['rows'])
+        updates[result['file']] = fields
+    update_manifest(backup_dir, updates)
+    return results
+
+
+# --- Restore --------------------------------------------------------------
+
+def restore_backup(backup_path, db_path, keep_old=True):
+    """Validate a backup into a temporary file and swap it in for db_path.
+
+    Raises BackupError if the backup fails its checks or the database is
+    busy; the live database is untouched in that case. Returns a summary.
+    """
+    start = time.time()
+    backup_dir, name = os.path.split(os.path.abspath(backup_path))
+    entry = load_manifest(backup_dir).get(name)
+    if entry and entry.get('sha256') and file_sha256(backup_path) != entry['sha256']:
+        raise BackupError(f"{name}: checksum differs from the manifest")
+
+    # Same directory as the database, so the final rename is atomic
+    tmp_path = f'{db_path}.restore-tmp'
+    try:
+        copy_backup(backup_path, tmp_path)
+        integrity, rows = check_database(tmp_path)
+        if integrity != 'ok':
+            raise BackupError(f"{name}: integrity check failed: {integrity}")
+        if entry and entry.get('rows') is not None and rows != entry['rows']:
+            raise BackupError(f"{name}: {rows} rows, manifest says {entry['rows']}")
+        _swap_in(tmp_path, db_path, keep_old)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "backup": name,
+        "rows": rows,
+        "size": os.path.getsize(db_path),
+        "previous": f'{db_path}.pre-restore' if keep_old and os.path.exists(f'{db_path}.pre-restore') else None,
+        "seconds": round(time.time() - start, 2),
+    }
+
+
+def _swap_in(tmp_path, db_path, keep_old):
+    """Rename tmp_path over db_path while no other connection is writing."""
+    writer = snpdb.lock_writer(db_path)
+    if writer is None:
+        raise DatabaseBusy("Database is in use by a scraper process; stop it first")
+    try:
+        _swap_in_locked(tmp_path, db_path, keep_old)
+    finally:
+        writer.close()
+
+
+def _swap_in_locked(tmp_path, db_path, keep_old):
+    lock = None
+    if os.path.exists(db_path):
+        lock = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        try:
+            # Waits out any open write and leaves no hot journal behind
+            lock.execute('BEGIN EXCLUSIVE')
+        except sqlite3.OperationalError as e:
+            lock.close()
+            raise DatabaseBusy(f"Database is busy: {e}")
+        except sqlite3.DatabaseError:
+            # The file being replaced is itself unreadable; nothing to wait for
+            lock.close()
+            lock = None
+    try:
+        if keep_old and os.path.exists(db_path):
+            old_path = f'{db_path}.pre-restore'
+            if os.path.exists(old_path):
+                os.remove(old_path)
+            try:
+                os.link(db_path, old_path)
+            except OSError:
+                # No hard links on this filesystem
+                shutil.copy2(db_path, old_path)
+        os.replace(tmp_path, db_path)
+    finally:
+        if lock is not None:
+            lock.execute('ROLLBACK')
+            lock.close()
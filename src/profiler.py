@@ -0,0 +1,181 @@
+"""
+On-demand sampling profiler for the long-running processes.
+
+Restarting a multi-day crawl under cProfile loses the state that was slow.
+Instead, a profile can be taken from the running process for a fixed
+window: a background thread wakes every `interval` seconds, records the
+stack of every other thread (sys._current_frames), and at the end writes
+the counts in collapsed-stack form, one line per distinct stack:
+
+    scraper;_scrape_loop (snpedia_scraper.py:290);_fetch_pages (snpedia_scraper.py:185) 412
+
+That is the input format of flamegraph.pl, speedscope and most flame graph
+viewers. Samples are wall-clock, so threads waiting on the network or a
+lock show up as well as ones burning CPU. Profiles are written to
+profiles/ next to the database.
+
+    profiler = SamplingProfiler(output_dir)
+    profiler.start(duration=30, label='dashboard')   # from an endpoint
+    profiler.install_signal(duration=30)             # or: kill -USR1 <pid>
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+MAX_DURATION = 600
+MIN_INTERVAL = 0.001
+
+
+def frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def collapse(frame, thread_name):
+    """'thread;outermost;...;innermost' for one thread's current stack."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ';'.join(reversed(labels))
+
+
+def top_frames(stacks, limit=15):
+    """[{frame, self, total}] ordered by self samples.
+
+    self counts samples with the frame innermost; total counts samples with
+    the frame anywhere on the stack (recursion counted once).
+    """
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')[1:]
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for label in set(frames):
+            total[label] += count
+    return [
+        {"frame": label, "self": own[label], "total": total[label]}
+        for label, _ in own.most_common(limit)
+    ]
+
+
+class SamplingProfiler:
+    """Samples every thread's stack for a fixed window, one window at a time."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.current = None
+        self.last_result = None
+        self.last_error = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, duration=30, interval=0.01, label='profile'):
+        """Start a profile in the background. Returns False if one is running."""
+        duration = min(max(float(duration), 0.1), MAX_DURATION)
+        interval = max(float(interval), MIN_INTERVAL)
+        with self.lock:
+            if self.running:
+                return False
+            self.stop_event.clear()
+            self.current = {"label": label, "started": time.time(), "duration": duration,
+                            "interval": interval, "samples": 0}
+            self.thread = threading.Thread(target=self._run, args=(duration, interval, label),
+                                           name='profiler', daemon=True)
+            self.thread.start()
+        return True
+
+    def stop(self):
+        """End the running profile early; it is still written out."""
+        self.stop_event.set()
+
+    def _run(self, duration, interval, label):
+        own_ident = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        deadline = time.monotonic() + duration
+        try:
+            while not self.stop_event.is_set() and time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                frames = sys._current_frames()
+                for ident, frame in frames.items():
+                    if ident != own_ident:
+                        stacks[collapse(frame, names.get(ident, f'thread-{ident}'))] += 1
+                # Don't keep other threads' frames (and their locals) alive between samples
+                del frames, frame
+                samples += 1
+                self.current["samples"] = samples
+                self.stop_event.wait(interval)
+            self.last_result = self._write(stacks, samples, label)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Profiler error: {e}")
+        finally:
+            self.current = None
+
+    def _write(self, stacks, samples, label):
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = f"{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+        path = os.path.join(self.output_dir, name)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f'{stack} {count}\n')
+        os.replace(tmp_path, path)
+        print(f"✓ Profile written: {path} ({samples} samples)")
+        return {
+            "file": name,
+            "path": path,
+            "samples": samples,
+            "stacks": len(stacks),
+            "top": top_frames(stacks),
+        }
+
+    def profiles(self):
+        """Saved profiles, newest first: [{file, size, created}]."""
+        if not os.path.isdir(self.output_dir):
+            return []
+        found = []
+        for name in os.listdir(self.output_dir):
+            if name.endswith('.folded'):
+                stat = os.stat(os.path.join(self.output_dir, name))
+                found.append({"file": name, "size": stat.st_size,
+                              "created": datetime.fromtimestamp(stat.st_mtime).isoformat()})
+        return sorted(found, key=lambda item: item['created'], reverse=True)
+
+    def status(self):
+        return {
+            "running": self.running,
+            "current": self.current,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+    def install_signal(self, duration=30, interval=0.01, label='profile', signum=None):
+        """Start a profile whenever the process receives signum (default SIGUSR1).
+
+        A second signal while a profile is running ends it early. Returns
+        False where the signal doesn't exist (Windows).
+        """
+        signum = signum or getattr(signal, 'SIGUSR1', None)
+        if signum is None:
+            return False
+
+        def handler(signo, frame):
+            if not self.start(duration, interval, label):
+                self.stop()
+
+        signal.signal(signum, handler)
+        return True
@@ -0,0 +1,747 @@
+"""
+Shared SQLite schema and helpers for the SNPedia database.
+
+Used by the scraper and by the standalone tools in the project root, so the
+table layout is defined in exactly one place: the MIGRATIONS list at the end
+of this module.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, lock_writer() always succeeds
+    fcntl = None
+
+# SQLite's default limit on host parameters is 999 on older builds
+MAX_SQL_VARIABLES = 900
+
+# Namespaces for the integer SNP key. Pages that aren't Rs<n> or I<n>
+# (genes, genotypes, ...) have no numeric key.
+NS_RS = 0
+NS_I = 1
+NAMESPACES = {'rs': NS_RS, 'i': NS_I}
+NAMESPACE_PREFIXES = {NS_RS: 'Rs', NS_I: 'I'}
+
+_SNP_ID_RE = re.compile(r'^(rs|i)(\d+)$', re.IGNORECASE)
+
+# Edge kinds in the links table
+LINK_SNP = 0       # another Rs/I page
+LINK_GENOTYPE = 1  # a genotype page such as Rs53576(A;G)
+LINK_GENE = 2      # a gene named in a template parameter (|Gene=OXTR)
+LINK_TOPIC = 3     # any other wiki link: conditions, medicines, genes in prose
+LINK_KINDS = {'snp': LINK_SNP, 'genotype': LINK_GENOTYPE, 'gene': LINK_GENE, 'topic': LINK_TOPIC}
+LINK_KIND_NAMES = {v: k for k, v in LINK_KINDS.items()}
+
+_WIKILINK_RE = re.compile(r'\[\[([^\[\]|{}]+)(?:\|[^\[\]]*)?\]\]')
+_GENE_PARAM_RE = re.compile(r'\|\s*gene(?:_s)?\s*=\s*([^|}\n]*)', re.IGNORECASE)
+_GENO_PARAM_RE = re.compile(r'\|\s*geno\d+\s*=\s*(\([^)|}\n]*\))', re.IGNORECASE)
+_RSID_PARAM_RE = re.compile(r'\|\s*rsid\s*=\s*(\d+)', re.IGNORECASE)
+_GENOTYPE_TITLE_RE = re.compile(r'^(Rs|I)\d+\([^)]*\)$')
+
+
+def _key_sql(col):
+    """SQL expressions for (namespace, number) of an rsid column.
+
+    Must agree with parse_snp_id(); used by the triggers and the backfill.
+    """
+    ns = (
+        f"CASE WHEN lower(substr({col}, 1, 2)) = 'rs' AND length({col}) > 2 "
+        f"AND substr({col}, 3) NOT GLOB '*[^0-9]*' THEN {NS_RS} "
+        f"WHEN lower(substr({col}, 1, 1)) = 'i' AND length({col}) > 1 "
+        f"AND substr({col}, 2) NOT GLOB '*[^0-9]*' THEN {NS_I} END"
+    )
+    num = f"CAST(substr({col}, CASE WHEN lower(substr({col}, 1, 2)) = 'rs' THEN 3 ELSE 2 END) AS INTEGER)"
+    return ns, num
+
+
+def connect(db_path, readonly=False):
+    """Open the database, optionally read-only."""
+    if readonly:
+        return sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    return sqlite3.connect(db_path)
+
+
+def lock_writer(db_path):
+    """Take the exclusive writer lock for db_path (<db_path>.writer).
+
+    Held by a CLI scraper for its lifetime and by a restore for the swap,
+    so neither runs against a file the other is about to replace. Returns
+    the open lock file (closing it releases the lock), or None if another
+    process holds it. The lock file records the holder's pid.
+    """
+    handle = open(f'{db_path}.writer', 'a+')
+    if fcntl is not None:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+    handle.truncate(0)
+    handle.write(f'{os.getpid()}\n')
+    handle.flush()
+    return handle
+
+
+def get_progress(conn, key):
+    row = conn.execute('SELECT value FROM progress WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_progress(conn, key, value):
+    conn.execute(
+        'INSERT OR REPLACE INTO progress (key, value) VALUES (?, ?)',
+        (key, str(value))
+    )
+
+
+def existing_rsids(conn, rsids):
+    """Return the subset of rsids that already have a row in snps."""
+    rsids = list(rsids)
+    found = set()
+    for i in range(0, len(rsids), MAX_SQL_VARIABLES):
+        chunk = rsids[i:i + MAX_SQL_VARIABLES]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f'SELECT rsid FROM snps WHERE rsid IN ({placeholders})', chunk)
+        found.update(row[0] for row in rows)
+    return found
+
+
+def content_hash(content):
+    """Fixed-size (20 byte) digest of a page's wikitext."""
+    return hashlib.sha1((content or '').encode('utf-8')).digest()
+
+
+# Unchanged rows are skipped by the WHERE clause, so re-fetching an identical
+# page costs an index lookup and no write. Changed rows get their version
+# bumped; a legacy row without a hash is hashed once without a version bump.
+UPSERT_SQL = '''
+    INSERT INTO snps (rsid, content, scraped_at, content_hash, version)
+    VALUES (?, ?, ?, ?, 1)
+    ON CONFLICT(rsid) DO UPDATE SET
+        content = excluded.content,
+        scraped_at = excluded.scraped_at,
+        content_hash = excluded.content_hash,
+        version = CASE WHEN snps.content IS excluded.content
+                       THEN snps.version ELSE snps.version + 1 END
+    WHERE snps.content_hash IS NOT excluded.content_hash
+'''
+
+INSERT_NEW_SQL = '''
+    INSERT INTO snps (rsid, content, scraped_at, content_hash, version)
+    VALUES (?, ?, ?, ?, 1)
+    ON CONFLICT(rsid) DO NOTHING
+'''
+
+
+def save_snp(conn, rsid, content, scraped_at=None):
+    """Insert or update one page. Returns 'inserted', 'updated' or 'unchanged'.
+
+    The caller commits.
+    """
+    digest = content_hash(content)
+    row = conn.execute('SELECT content_hash FROM snps WHERE rsid = ?', (rsid,)).fetchone()
+    if row is not None and row[0] == digest:
+        return 'unchanged'
+    if row is not None and row[0] is None:
+        # Row written before hashes existed: compare once and record the hash
+        stored = conn.execute('SELECT content FROM snps WHERE rsid = ?', (rsid,)).fetchone()[0]
+        if content_hash(stored) == digest:
+            conn.execute('UPDATE snps SET content_hash = ? WHERE rsid = ?', (digest, rsid))
+            return 'unchanged'
+
+    conn.execute(UPSERT_SQL, (rsid, content, scraped_at or datetime.now(), digest))
+    replace_links(conn, rsid, extract_links(rsid, content))
+    return 'inserted' if row is None else 'updated'
+
+
+def save_snps(conn, rows, replace=True):
+    """Write (rsid, content, scraped_at) rows in one statement batch.
+
+    With replace=False existing rows are left alone. Returns the number of
+    rows actually written. The caller commits.
+    """
+    sql = UPSERT_SQL if replace else INSERT_NEW_SQL
+    # rowcount, unlike total_changes, leaves out rows written by triggers
+    cursor = conn.executemany(sql, (
+        (rsid, content, scraped_at or datetime.now(), content_hash(content))
+        for rsid, content, scraped_at in rows
+    ))
+    return cursor.rowcount
+
+
+def parse_snp_id(name):
+    """Parse 'rs53576', 'Rs53576' or 'i3000001' into (namespace, number).
+
+    Returns None for anything that isn't a plain Rs/I identifier.
+    """
+    m = _SNP_ID_RE.match(name.strip())
+    if not m:
+        return None
+    return NAMESPACES[m.group(1).lower()], int(m.group(2))
+
+
+def format_snp_id(ns, num):
+    """Inverse of parse_snp_id, in SNPedia's own capitalisation."""
+    return f'{NAMESPACE_PREFIXES[ns]}{num}'
+
+
+def lookup_keys(conn, keys):
+    """Map (namespace, number) keys to stored rsids with integer index seeks.
+
+    Returns {key: rsid} for the keys that exist.
+    """
+    by_ns = {}
+    for ns, num in keys:
+        by_ns.setdefault(ns, []).append(num)
+
+    found = {}
+    for ns, nums in by_ns.items():
+        for i in range(0, len(nums), MAX_SQL_VARIABLES):
+            chunk = nums[i:i + MAX_SQL_VARIABLES]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f'SELECT num, rsid FROM snp_keys WHERE ns = ? AND num IN ({placeholders})',
+                [ns] + chunk
+            )
+            found.update(((ns, num), rsid) for num, rsid in rows)
+    return found
+
+
+def backfill_snp_keys(conn, batch_size=5000, pause=0.05, progress_callback=None):
+    """Fill snp_keys for rows written before the table existed."""
+    return run_backfill(conn, 'snp_keys', batch_size, pause, progress_callback)
+
+
+def normalize_title(target):
+    """Normalise a wiki link target to the stored title form, or None.
+
+    Follows MediaWiki: spaces become underscores, the first letter is
+    upper-cased and any #section is dropped. Links into other namespaces
+    (File:, Category:, interwiki) are ignored.
+    """
+    target = target.split('#', 1)[0].strip().replace(' ', '_')
+    if not target or ':' in target:
+        return None
+    return target[0].upper() + target[1:]
+
+
+def classify_title(title):
+    """The LINK_* kind for a link to title."""
+    if parse_snp_id(title) is not None:
+        return LINK_SNP
+    if _GENOTYPE_TITLE_RE.match(title):
+        return LINK_GENOTYPE
+    return LINK_TOPIC
+
+
+def extract_links(title, content):
+    """Return the set of (kind, target) edges out of one page.
+
+    Covers [[wiki links]], genes named in {{Rsnum}} parameters, the genotype
+    pages listed by geno1..genoN, and the SNP a {{Genotype}} page belongs to.
+    """
+    edges = set()
+    content = content or ''
+    for target in _WIKILINK_RE.findall(content):
+        target = normalize_title(target)
+        if target:
+            edges.add((classify_title(target), target))
+
+    for value in _GENE_PARAM_RE.findall(content):
+        for gene in re.split(r'[,;/\s]+', value):
+            gene = normalize_title(gene)
+            if gene:
+                edges.add((LINK_GENE, gene))
+
+    if parse_snp_id(title) is not None:
+        for geno in _GENO_PARAM_RE.findall(content):
+            edges.add((LINK_GENOTYPE, title + geno.replace(' ', '')))
+    elif _GENOTYPE_TITLE_RE.match(title):
+        m = _RSID_PARAM_RE.search(content)
+        if m:
+            edges.add((LINK_SNP, f'Rs{m.group(1)}'))
+
+    edges.discard((LINK_SNP, title))
+    edges.discard((LINK_GENOTYPE, title))
+    return edges
+
+
+def replace_links(conn, rsid, edges, version=None):
+    """Replace the stored edges out of rsid and clear its dirty mark.
+
+    With a version (edges extracted from a row read earlier), nothing is
+    written if the page has been rewritten or deleted since that version
+    was read: save_snp() has then stored fresher edges, or the page is
+    still dirty for the next pass. Returns whether the edges were written.
+    The caller commits, in the same transaction as this check.
+    """
+    if version is not None:
+        row = conn.execute('SELECT version FROM snps WHERE rsid = ?', (rsid,)).fetchone()
+        if row is None or row[0] != version:
+            return False
+    conn.execute('DELETE FROM links WHERE src = ?', (rsid,))
+    conn.executemany(
+        'INSERT OR IGNORE INTO links (src, kind, dst) VALUES (?, ?, ?)',
+        ((rsid, kind, dst) for kind, dst in edges)
+    )
+    conn.execute('DELETE FROM links_dirty WHERE rsid = ?', (rsid,))
+    return True
+
+
+def _kind_filter(kinds):
+    if not kinds:
+        return '', []
+    return f" AND kind IN ({','.join('?' * len(kinds))})", list(kinds)
+
+
+def links_from(conn, title, kinds=None):
+    """Edges out of a page as [(kind, target)]."""
+    where, params = _kind_filter(kinds)
+    return conn.execute(
+        f'SELECT kind, dst FROM links WHERE src = ?{where} ORDER BY kind, dst', [title] + params
+    ).fetchall()
+
+
+def links_to(conn, title, kinds=None, snps_only=False):
+    """Pages linking to title as [(source, kind)], via the links_by_dst index.
+
+    snps_only restricts the sources to Rs/I pages.
+    """
+    where, params = _kind_filter(kinds)
+    join = ' JOIN snp_keys k ON k.rsid = links.src' if snps_only else ''
+    return conn.execute(
+        f'SELECT src, kind FROM links{join} WHERE dst = ?{where} ORDER BY src', [title] + params
+    ).fetchall()
+
+
+def missing_link_targets(conn, kinds=None):
+    """Distinct link targets that have no row in snps."""
+    where, params = _kind_filter(kinds)
+    return [row[0] for row in conn.execute(f'''
+        SELECT DISTINCT dst FROM links
+        WHERE NOT EXISTS (SELECT 1 FROM snps WHERE snps.rsid = links.dst){where}
+        ORDER BY dst
+    ''', params)]
+
+
+def enqueue_fetch(conn, titles, reason):
+    """Add titles to the scraper's fetch queue. Returns the number added.
+
+    The caller commits.
+    """
+    before = conn.total_changes
+    now = datetime.now()
+    conn.executemany(
+        'INSERT OR IGNORE INTO fetch_queue (title, reason, queued_at) VALUES (?, ?, ?)',
+        ((title, reason, now) for title in titles)
+    )
+    return conn.total_changes - before
+
+
+def queued_titles(conn, limit):
+    """The oldest titles in the fetch queue."""
+    return [row[0] for row in conn.execute(
+        'SELECT title FROM fetch_queue ORDER BY queued_at, title LIMIT ?', (limit,)
+    )]
+
+
+# --- Schema migrations -------------------------------------------------------
+#
+# The schema version is PRAGMA user_version. Each migration's schema step is
+# a few quick DDL statements run in one short write transaction, so it can be
+# applied while the scraper is running. Anything that has to touch existing
+# rows is a named backfill instead: it walks snps in rowid ranges, one small
+# transaction per range, with its position saved in the progress table as
+# <name>_backfill_rowid and completion as <name>_backfilled = 1.
+#
+# Schema steps must be idempotent, because databases created before
+# versioning already have some of the tables at user_version 0.
+
+Migration = namedtuple('Migration', 'version description apply backfill')
+
+
+def _schema_base(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS snps (
+            rsid TEXT PRIMARY KEY,
+            content TEXT,
+            scraped_at TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS progress (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+
+def _schema_content_hash(conn):
+    # Existing rows start with a NULL hash; the content_hash backfill fills them in
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(snps)')}
+    if 'content_hash' not in columns:
+        conn.execute('ALTER TABLE snps ADD COLUMN content_hash BLOB')
+    if 'version' not in columns:
+        conn.execute('ALTER TABLE snps ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+
+
+def _schema_snp_keys(conn):
+    # Integer key for Rs/I pages: (namespace, number) -> rsid. A separate
+    # WITHOUT ROWID table is clustered on the key, so it doubles as a covering
+    # index, and backfilling it never rewrites the large snps rows.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS snp_keys (
+            ns INTEGER NOT NULL,
+            num INTEGER NOT NULL,
+            rsid TEXT NOT NULL,
+            PRIMARY KEY (ns, num)
+        ) WITHOUT ROWID
+    ''')
+    _snp_key_triggers(conn)
+
+
+def _snp_key_triggers(conn):
+    # Dropped and re-created rather than IF NOT EXISTS, so a database made
+    # with an older definition gets the current one
+    new_ns, new_num = _key_sql('NEW.rsid')
+    old_ns, old_num = _key_sql('OLD.rsid')
+    conn.execute('DROP TRIGGER IF EXISTS snps_key_insert')
+    conn.execute('DROP TRIGGER IF EXISTS snps_key_delete')
+    # An upsert rather than INSERT OR REPLACE: the conflict policy of the
+    # statement that fires a trigger overrides an OR clause inside it
+    conn.execute(f'''
+        CREATE TRIGGER snps_key_insert AFTER INSERT ON snps
+        WHEN ({new_ns}) IS NOT NULL
+        BEGIN
+            INSERT INTO snp_keys (ns, num, rsid) VALUES ({new_ns}, {new_num}, NEW.rsid)
+            ON CONFLICT (ns, num) DO UPDATE SET rsid = excluded.rsid;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER snps_key_delete AFTER DELETE ON snps
+        WHEN ({old_ns}) IS NOT NULL
+        BEGIN
+            DELETE FROM snp_keys WHERE ns = {old_ns} AND num = {old_num} AND rsid = OLD.rsid;
+        END
+    ''')
+
+
+def _schema_links(conn):
+    # Link graph: one row per (page, kind, target), with a reverse index for
+    # "what links here". Extraction needs Python, so the triggers only mark
+    # written pages in links_dirty; save_snp() and link_graph.py re-extract them.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS links (
+            src TEXT NOT NULL,
+            kind INTEGER NOT NULL,
+            dst TEXT NOT NULL,
+            PRIMARY KEY (src, kind, dst)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS links_by_dst ON links (dst, kind)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS links_dirty (
+            rsid TEXT PRIMARY KEY,
+            version INTEGER
+        ) WITHOUT ROWID
+    ''')
+    _links_triggers(conn)
+
+    # Pages the scraper should fetch (or re-fetch) ahead of the listing
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fetch_queue (
+            title TEXT PRIMARY KEY,
+            reason TEXT,
+            queued_at TIMESTAMP
+        )
+    ''')
+
+
+def _links_triggers(conn):
+    # Dropped, re-created and upserting for the same reasons as the snp_keys
+    # triggers; with OR REPLACE, save_snp() rewriting a dirty page failed
+    for name in ('snps_links_insert', 'snps_links_update', 'snps_links_delete'):
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+    conn.execute('''
+        CREATE TRIGGER snps_links_insert AFTER INSERT ON snps
+        BEGIN
+            INSERT INTO links_dirty (rsid, version) VALUES (NEW.rsid, NEW.version)
+            ON CONFLICT (rsid) DO UPDATE SET version = excluded.version;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER snps_links_update AFTER UPDATE OF content ON snps
+        BEGIN
+            INSERT INTO links_dirty (rsid, version) VALUES (NEW.rsid, NEW.version)
+            ON CONFLICT (rsid) DO UPDATE SET version = excluded.version;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER snps_links_delete AFTER DELETE ON snps
+        BEGIN
+            DELETE FROM links WHERE src = OLD.rsid;
+            DELETE FROM links_dirty WHERE rsid = OLD.rsid;
+        END
+    ''')
+
+
+def _schema_triggers(conn):
+    # Databases created before the triggers were upserts keep the old ones
+    # under IF NOT EXISTS; replace them with the current definitions
+    _snp_key_triggers(conn)
+    _links_triggers(conn)
+
+
+def _schema_scraped_at_index(conn):
+    # Newest-first queries (dashboard status) and export --since range over
+    # scraped_at. SQLite builds an index in one pass under the write lock,
+    # which would block the scraper for the whole table, so on a table with
+    # rows it is left to the scraped_at_index backfill (migrate_db.py)
+    if conn.execute('SELECT 1 FROM snps LIMIT 1').fetchone() is None:
+        _build_scraped_at_index(conn)
+
+
+def _build_scraped_at_index(conn):
+    conn.execute('CREATE INDEX IF NOT EXISTS snps_by_scraped_at ON snps (scraped_at)')
+
+
+# Changes kept in snps_changes. A reader that falls further behind than
+# this (or reads a different file) rebuilds instead.
+CHANGE_LOG_SIZE = 100000
+
+
+def _schema_changes(conn):
+    # Rowids of rewritten and deleted pages, in commit order, for readers
+    # that cache derived data (the analytics cache). New pages aren't
+    # logged: they are found by rowid. AUTOINCREMENT keeps seq increasing
+    # after old entries are pruned.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS snps_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            page_rowid INTEGER NOT NULL
+        )
+    ''')
+    for name, event, ref in (('snps_changes_update', 'UPDATE OF content', 'NEW'),
+                             ('snps_changes_delete', 'DELETE', 'OLD')):
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(f'''
+            CREATE TRIGGER {name} AFTER {event} ON snps
+            BEGIN
+                INSERT INTO snps_changes (page_rowid) VALUES ({ref}.rowid);
+                DELETE FROM snps_changes
+                WHERE seq <= (SELECT MAX(seq) FROM snps_changes) - {CHANGE_LOG_SIZE};
+            END
+        ''')
+
+
+def change_seq(conn):
+    """The seq of the latest logged change (0 if none)."""
+    return conn.execute('SELECT MAX(seq) FROM snps_changes').fetchone()[0] or 0
+
+
+def changes_since(conn, seq):
+    """(latest seq, rowids changed after seq), or None if the log no longer reaches back to seq."""
+    first, last = conn.execute('SELECT MIN(seq), MAX(seq) FROM snps_changes').fetchone()
+    last = last or 0
+    if seq > last or (first is not None and seq < first - 1):
+        return None
+    rowids = [row[0] for row in conn.execute(
+        'SELECT DISTINCT page_rowid FROM snps_changes WHERE seq > ? AND seq <= ?', (seq, last)
+    )]
+    return last, rowids
+
+
+def _backfill_content_hash(conn, lower, upper):
+    rows = conn.execute(
+        'SELECT rowid, content FROM snps WHERE rowid > ? AND rowid <= ? AND content_hash IS NULL',
+        (lower, upper)
+    ).fetchall()
+    conn.executemany(
+        'UPDATE snps SET content_hash = ? WHERE rowid = ? AND content_hash IS NULL',
+        ((content_hash(content), rowid) for rowid, content in rows)
+    )
+    return len(rows)
+
+
+def _backfill_snp_keys(conn, lower, upper):
+    ns, num = _key_sql('rsid')
+    before = conn.total_changes
+    conn.execute(f'''
+        INSERT OR IGNORE INTO snp_keys (ns, num, rsid)
+        SELECT {ns}, {num}, rsid FROM snps
+        WHERE rowid > ? AND rowid <= ? AND ({ns}) IS NOT NULL
+    ''', (lower, upper))
+    return conn.total_changes - before
+
+
+def _backfill_links(conn, lower, upper):
+    # link_graph.py build does the same pass with extraction in a process pool
+    rows = conn.execute(
+        'SELECT rsid, content, version FROM snps WHERE rowid > ? AND rowid <= ?', (lower, upper)
+    ).fetchall()
+    for rsid, content, version in rows:
+        replace_links(conn, rsid, extract_links(rsid, content), version)
+    return len(rows)
+
+
+MIGRATIONS = [
+    Migration(1, "snps and progress tables", _schema_base, None),
+    Migration(2, "content_hash and version columns", _schema_content_hash, 'content_hash'),
+    Migration(3, "integer SNP keys (snp_keys)", _schema_snp_keys, 'snp_keys'),
+    Migration(4, "link graph and fetch queue", _schema_links, 'links'),
+    Migration(5, "index on scraped_at", _schema_scraped_at_index, 'scraped_at_index'),
+    Migration(6, "re-create the snp_keys and links_dirty triggers as upserts", _schema_triggers, None),
+    Migration(7, "change log of rewritten and deleted pages", _schema_changes, None),
+]
+SCHEMA_VERSION = MIGRATIONS[-1].version
+BACKFILLS = {
+    'content_hash': _backfill_content_hash,
+    'snp_keys': _backfill_snp_keys,
+    'links': _backfill_links,
+}
+# Backfills that can't be split into rowid ranges. They run in one
+# transaction, so only from run_backfill(), never at startup.
+WHOLE_TABLE_BACKFILLS = {
+    'scraped_at_index': _build_scraped_at_index,
+}
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def create_tables(conn):
+    """Apply any pending schema migrations. Returns the versions applied.
+
+    Only the quick DDL steps run here; row backfills are left to
+    run_backfills() (python migrate_db.py), except on an empty database,
+    where there is nothing to backfill and they are marked done at once.
+    """
+    conn.commit()  # BEGIN IMMEDIATE below can't nest inside an open transaction
+    applied = []
+    for migration in MIGRATIONS:
+        if schema_version(conn) >= migration.version:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Re-check under the write lock in case another process got here first
+            if schema_version(conn) < migration.version:
+                migration.apply(conn)
+                if migration.backfill and conn.execute('SELECT 1 FROM snps LIMIT 1').fetchone() is None:
+                    set_progress(conn, f'{migration.backfill}_backfilled', 1)
+                conn.execute(f'PRAGMA user_version = {migration.version}')
+                applied.append(migration.version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
+
+
+def pending_backfills(conn):
+    """Names of the backfills that haven't finished, in migration order."""
+    return [
+        m.backfill for m in MIGRATIONS
+        if m.backfill and schema_version(conn) >= m.version
+        and get_progress(conn, f'{m.backfill}_backfilled') != '1'
+    ]
+
+
+def run_backfill(conn, name, batch_size=5000, pause=0.05, progress_callback=None):
+    """Run one named backfill over snps in rowid ranges. Returns the rows touched.
+
+    Each range is read and written inside one BEGIN IMMEDIATE transaction,
+    so a page the scraper rewrites concurrently is never overwritten with
+    stale data, and the write lock is held for one range at a time. The
+    position is saved with every range, so an interrupted run resumes.
+    Rows inserted after the backfill started are handled by the triggers
+    and save_snp(), so it only has to reach the max rowid seen at the start.
+    """
+    done_key, rowid_key = f'{name}_backfilled', f'{name}_backfill_rowid'
+    if get_progress(conn, done_key) == '1':
+        return 0
+
+    max_rowid = conn.execute('SELECT MAX(rowid) FROM snps').fetchone()[0] or 0
+    if name in WHOLE_TABLE_BACKFILLS:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            WHOLE_TABLE_BACKFILLS[name](conn)
+            set_progress(conn, done_key, 1)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if progress_callback:
+            progress_callback(max_rowid, max_rowid)
+        return conn.execute('SELECT COUNT(*) FROM snps').fetchone()[0]
+
+    batch = BACKFILLS[name]
+    last_rowid = int(get_progress(conn, rowid_key) or 0)
+    touched = 0
+
+    while last_rowid < max_rowid:
+        upper = last_rowid + batch_size
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            touched += batch(conn, last_rowid, upper)
+            set_progress(conn, rowid_key, upper)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        last_rowid = upper
+        if progress_callback:
+            progress_callback(min(last_rowid, max_rowid), max_rowid)
+        if pause:
+            time.sleep(pause)
+
+    with conn:
+        set_progress(conn, done_key, 1)
+    return touched
+
+
+def run_backfills(conn, batch_size=5000, pause=0.05, progress_callback=None):
+    """Run every pending backfill. progress_callback(name, done, total).
+
+    Returns {name: rows touched}.
+    """
+    results = {}
+    for name in pending_backfills(conn):
+        callback = None
+        if progress_callback:
+            callback = lambda done, total, name=name: progress_callback(name, done, total)
+        results[name] = run_backfill(conn, name, batch_size, pause, callback)
+    return results
+
+
+def migration_status(conn):
+    """Schema version, latest version and per-backfill progress, for display."""
+    progress = dict(conn.execute(
+        "SELECT key, value FROM progress WHERE key LIKE '%_backfill_rowid' OR key LIKE '%_backfilled'"
+    ))
+    version = schema_version(conn)
+    max_rowid = conn.execute('SELECT MAX(rowid) FROM snps').fetchone()[0] or 0
+    return {
+        'schema_version': version,
+        'latest_version': SCHEMA_VERSION,
+        'migrations': [
+            {
+                'version': m.version,
+                'description': m.description,
+                'applied': version >= m.version,
+                'backfill': m.backfill,
+                'backfill_done': (progress.get(f'{m.backfill}_backfilled') == '1') if m.backfill else None,
+                'backfill_rowid': min(int(progress.get(f'{m.backfill}_backfill_rowid') or 0), max_rowid)
+                if m.backfill else None,
+            }
+            for m in MIGRATIONS
+        ],
+        'max_rowid': max_rowid,
+    }
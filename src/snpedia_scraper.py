@@ -1,5 +1,5 @@
+import argparse
 import requests
-import sqlite3
 import time
 import json
 from datetime import datetime
@@ -7,30 +7,58 @@ import os
 import sys
 import threading
 
+import profiler
+import snpdb
+import storage
+
 # --- Path Setup ---
 # Get the absolute path to the project root directory
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 # Define the absolute path for the database
 DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
 ERROR_LOG_PATH = os.path.join(PROJECT_ROOT, 'scraper_errors.log')
+# Queued titles (linked pages, re-fetches) taken per listing page
+QUEUE_BATCH = 50
+# Titles per content request (the API limit for non-bot accounts)
+FETCH_BATCH = 50
+FETCH_RETRIES = 3
+REQUEST_DELAY = 3
+USER_AGENT = 'SNPediaScraper/1.0 (Educational Research; https://github.com/jaykobdetar/SNPedia-Scraper; simyc4982@email.com) Mozilla/5.0 compatible'
+
+# Categories that can be crawled, by short name. Each is listed with its own
+# cursor in the progress table; all of them share one request budget.
+CATEGORIES = {
+    'snp': 'Is_a_snp',
+    'genotype': 'Is_a_genotype',
+    'gene': 'Is_a_gene',
+    'medicine': 'Is_a_medicine',
+}
+DEFAULT_CATEGORIES = ['Is_a_snp']
 
 class SNPediaScraper:
-    def __init__(self, db_path=DEFAULT_DB_PATH, status_callback=None, log_callback=None):
+    def __init__(self, db_path=DEFAULT_DB_PATH, status_callback=None, log_callback=None, state_callback=None,
+                 categories=None, store=None):
         self.db_path = db_path
+        # All reads and writes go through the storage layer (SQLite by default)
+        self.store = store or storage.open_store(db_path)
         self.api_url = "https://bots.snpedia.com/api.php"
-        self.total_snps = 110000  # From README
+        self.categories = list(categories or DEFAULT_CATEGORIES)
         
         # Callbacks for UI updates
         self.status_callback = status_callback
         self.log_callback = log_callback
+        # Called as state_callback(phase, details) whenever the loop changes
+        # what it is doing (listing, fetching, waiting, paused, error, ...)
+        self.state_callback = state_callback
 
         # State management
         self.running = False
         self.paused = False
         self._thread = None
+        self.phase = 'idle'
 
-        self._create_tables()
         self._init_error_log()
+        self.total_snps = self.get_current_progress()[1]
 
     def _init_error_log(self):
         """Initialize or append to error log file."""
@@ -48,29 +76,21 @@ class SNPediaScraper:
             f.write(f"{timestamp} | {rsid} | {error_type} | {error_message}\n")
             f.flush()  # Ensure it's written immediately
 
-    def _create_tables(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS snps (
-                rsid TEXT PRIMARY KEY,
-                content TEXT,
-                scraped_at TIMESTAMP
-            )
-        ''')
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS progress (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        ''')
-        conn.commit()
-        conn.close()
+    @property
+    def stopping(self):
+        """stop() was called, but the loop is still finishing a wait or request."""
+        return not self.running and self._thread is not None and self._thread.is_alive()
 
     def start(self):
+        if self.stopping:
+            # A second loop would fetch alongside the old one, and the old one
+            # clears self.running on its way out, stopping both
+            if self.log_callback: self.log_callback("Scraper is still stopping. Start it again once it has stopped.")
+            return
         if not self.running:
             self.running = True
             self.paused = False
-            self._thread = threading.Thread(target=self._scrape_loop)
+            self._thread = threading.Thread(target=self._scrape_loop, name='scraper')
             self._thread.start()
             if self.log_callback: self.log_callback("Scraper started.")
 
@@ -86,135 +106,281 @@ class SNPediaScraper:
         self.running = False
         if self.log_callback: self.log_callback("Scraper stopping...")
 
+    def _set_phase(self, phase, **details):
+        self.phase = phase
+        if self.state_callback: self.state_callback(phase, details)
+
+    def _wait(self, seconds, reason):
+        """Sleep between requests, reporting the wait to state_callback."""
+        self._set_phase('waiting', seconds=seconds, reason=reason)
+        time.sleep(seconds)
+
     def get_current_progress(self):
-        count = int(self.get_progress('snp_count') or 0)
-        return count, self.total_snps
+        """(pages stored, pages expected) summed over the configured categories."""
+        count = total = 0
+        for item in self.category_progress():
+            count += item['count']
+            if item['total']:
+                total += item['total']
+            elif item['category'] == 'Is_a_snp':
+                total += 110000  # From README
+        return count, max(total, count, 1)
+
+    def restart_categories(self):
+        """Clear the cursors so the next run lists every category from the start.
+
+        Stored pages are skipped without fetching, so a restart only costs
+        the listing requests plus whatever is new.
+        """
+        self.store.delete_progress(
+            self._progress_key(name, category) for category in self.categories for name in ('cursor', 'done')
+        )
 
-    def _scrape_loop(self):
+    def _progress_key(self, name, category):
+        """Progress key for a category's cursor, count, total or done flag.
+
+        Is_a_snp keeps the original single-category keys, so existing
+        databases resume where they left off.
+        """
+        if category == 'Is_a_snp' and name in ('cursor', 'count'):
+            return 'cmcontinue' if name == 'cursor' else 'snp_count'
+        return f'{name}:{category}'
+
+    def category_progress(self):
+        """[{category, count, total, done}] for the configured categories."""
+        progress = self.store.progress()
+        return [
+            {
+                'category': category,
+                'count': int(progress.get(self._progress_key('count', category)) or 0),
+                'total': int(progress.get(self._progress_key('total', category)) or 0) or None,
+                'done': progress.get(self._progress_key('done', category)) == '1',
+            }
+            for category in self.categories
+        ]
+
+    def _fetch_totals(self):
+        """Record each category's page count from the API (one request)."""
+        r = requests.get(self.api_url, params={
+            'action': 'query',
+            'prop': 'categoryinfo',
+            'titles': '|'.join(f'Category:{category}' for category in self.categories),
+            'format': 'json'
+        }, headers={'User-Agent': USER_AGENT})
+        r.raise_for_status()
+        for page in r.json()['query']['pages'].values():
+            category = page['title'].split(':', 1)[1].replace(' ', '_')
+            if category in self.categories and 'categoryinfo' in page:
+                self.save_progress(self._progress_key('total', category), page['categoryinfo']['pages'])
+        self.total_snps = self.get_current_progress()[1]
+
+    def _list_category(self, category, cursor):
+        """One listing page of a category: (titles, next cursor or None)."""
+        self._set_phase('listing', category=category, cmcontinue=cursor)
         params = {
             'action': 'query',
             'list': 'categorymembers',
-            'cmtitle': 'Category:Is_a_snp',
+            'cmtitle': f'Category:{category}',
             'cmlimit': 500,
             'format': 'json'
         }
+        if cursor:
+            params['cmcontinue'] = cursor
+        r = requests.get(self.api_url, params=params, headers={'User-Agent': USER_AGENT})
+        r.raise_for_status()
+        data = r.json()
+        # Fix space-encoded titles to avoid URL issues
+        titles = [page['title'].replace(' ', '_') for page in data['query']['categorymembers']]
+        next_cursor = data['continue']['cmcontinue'] if data.get('continue') else None
+        return titles, next_cursor
+
+    def _fetch_pages(self, titles):
+        """Fetch up to FETCH_BATCH pages in one request.
+
+        Returns {title: content}, with None for pages that don't exist.
+        """
+        # Use API for raw content - compliant and gets clean wiki markup
+        response = requests.get(self.api_url, params={
+            'action': 'query',
+            'prop': 'revisions',
+            'rvprop': 'content',
+            'format': 'json',
+            'titles': '|'.join(titles)
+        }, headers={'User-Agent': USER_AGENT})
+
+        # Try to get JSON data even if status code indicates error
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            response.raise_for_status()
+            raise
+        if 'query' not in data or 'pages' not in data['query']:
+            response.raise_for_status()
+            raise Exception("Invalid response structure")
+
+        # The API answers with canonical titles; map them back to the requested ones
+        requested = {
+            item['to'].replace(' ', '_'): item['from'].replace(' ', '_')
+            for item in data['query'].get('normalized', [])
+        }
+        pages = {}
+        for page in data['query']['pages'].values():
+            title = page['title'].replace(' ', '_')
+            title = requested.get(title, title)
+            revisions = page.get('revisions') or [{}]
+            if 'missing' in page or 'invalid' in page or '*' not in revisions[0]:
+                # A page without content would otherwise fail the whole batch
+                pages[title] = None
+            else:
+                pages[title] = revisions[0]['*']
+        return pages
+
+    def _fetch_with_retry(self, titles):
+        """_fetch_pages with error backoff. Returns None if every attempt failed."""
+        for attempt in range(1, FETCH_RETRIES + 1):
+            try:
+                return self._fetch_pages(titles)
+            except Exception as e:
+                error = e
+                if self.log_callback:
+                    self.log_callback(f"Error fetching {titles[0]} (+{len(titles) - 1} more): {e}. "
+                                      f"Retrying in 30 seconds... ({attempt}/{FETCH_RETRIES})")
+                self._set_phase('error', rsid=titles[0], error=str(e))
+                self._wait(30, 'error backoff')
+                if not self.running:
+                    return None
+
+        # Log the titles for later recovery with error_recover.py
+        error_type = "502_ERROR" if "502" in str(error) else "OTHER_ERROR"
+        for rsid in titles:
+            self._log_error(rsid, error_type, str(error))
+        return None
+
+    def _store_pages(self, pages, owners, counts):
+        """Write one fetched batch in a single transaction.
+
+        owners maps listed titles to their category, whose count is bumped for
+        each new page. Returns (inserted, updated, latest title).
+        """
+        missing = [rsid for rsid, content in pages.items() if content is None]
+        for rsid in missing:
+            if self.log_callback: self.log_callback(f"Page not found for {rsid}. Skipping.")
+        if missing:
+            self.store.dequeue(missing)
+
+        # Identical re-fetches aren't rewritten
+        results = self.store.put_many(
+            (rsid, content) for rsid, content in pages.items() if content is not None
+        )
 
-        last_continue = self.get_progress('cmcontinue')
-        if last_continue:
-            params['cmcontinue'] = last_continue
+        inserted = updated = 0
+        latest = None
+        touched = set()
+        for rsid, result in results.items():
+            if result == 'inserted':
+                inserted += 1
+                latest = rsid
+                category = owners.get(rsid)
+                if category:
+                    counts[category] += 1
+                    touched.add(category)
+            elif result == 'updated':
+                updated += 1
+        for category in touched:
+            self.save_progress(self._progress_key('count', category), counts[category])
+        return inserted, updated, latest
+
+    def _wait_while_paused(self):
+        while self.paused and self.running:
+            if self.phase != 'paused': self._set_phase('paused')
+            time.sleep(1)
 
-        snp_count = int(self.get_progress('snp_count') or 0)
+    def _scrape_loop(self):
+        # Categories still being listed, with their cursors
+        cursors = {
+            category: self.get_progress(self._progress_key('cursor', category))
+            for category in self.categories
+            if self.get_progress(self._progress_key('done', category)) != '1'
+        }
+        counts = {
+            category: int(self.get_progress(self._progress_key('count', category)) or 0)
+            for category in self.categories
+        }
 
+        try:
+            self._fetch_totals()
+            self._wait(REQUEST_DELAY, 'rate limit')
+        except Exception as e:
+            if self.log_callback: self.log_callback(f"Couldn't read category sizes: {e}")
+
+        turn = 0
         while self.running:
             if self.paused:
-                time.sleep(1)
+                self._wait_while_paused()
                 continue
 
             try:
-                r = requests.get(self.api_url, params=params)
-                r.raise_for_status()
-                data = r.json()
+                # Queued pages (linked from stored pages, or marked for
+                # re-fetch) go first and are fetched even if already stored
+                queued = self.queued_titles(QUEUE_BATCH)
+                active = [category for category in self.categories if category in cursors]
+                if not active and not queued:
+                    self.running = False
+                    break
 
-                for page in data['query']['categorymembers']:
+                # Categories take turns, so they all share one request budget
+                category = next_cursor = None
+                members = []
+                if active:
+                    category = active[turn % len(active)]
+                    turn += 1
+                    members, next_cursor = self._list_category(category, cursors[category])
+                    self._wait(REQUEST_DELAY, 'rate limit')
+
+                # One query per listing page instead of one per title. After a
+                # bootstrap import most titles are already present.
+                scraped = self.already_scraped_many(members)
+                queued_set = set(queued)
+                titles = queued + [t for t in members if t not in scraped and t not in queued_set]
+                owners = {title: category for title in members}
+                if scraped and self.status_callback:
+                    self.status_callback(sum(counts.values()), self.total_snps,
+                                         f"Skipped {len(scraped)} stored pages")
+
+                for i in range(0, len(titles), FETCH_BATCH):
+                    self._wait_while_paused()
                     if not self.running:
                         break
-                    
-                    while self.paused:
-                        if not self.running: break
-                        time.sleep(1)
-
-                    rsid = page['title']
-                    rsid = rsid.replace(' ', '_')  # Fix space-encoded rsids to avoid URL issues
-                    
-                    if self.already_scraped(rsid):
-                        if self.status_callback: self.status_callback(snp_count, self.total_snps, f"Skipped {rsid}")
+
+                    batch = titles[i:i + FETCH_BATCH]
+                    self._set_phase('fetching', rsid=batch[0], pages=len(batch), category=category)
+                    pages = self._fetch_with_retry(batch)
+                    if pages is None:
+                        # They're in the error log for error_recover.py. Left in the
+                        # queue, they would be retried forever once the listings are done.
+                        if self.running:
+                            self.store.dequeue([rsid for rsid in batch if rsid in queued_set])
                         continue
-                    
-                    # Try to fetch the content
-                    try:
-                        # Use API for raw content - compliant and gets clean wiki markup
-                        params_content = {
-                            'action': 'query',
-                            'prop': 'revisions',
-                            'rvprop': 'content',
-                            'format': 'json',
-                            'titles': rsid
-                        }
-                        content_response = requests.get(self.api_url, params=params_content, headers={
-                            ''User-Agent': 'SNPediaScraper/1.0 (Educational Research; https://github.com/jaykobdetar/SNPedia-Scraper; simyc4982@email.com) Mozilla/5.0 compatible'
-                        })
-                        
-                        # Try to get JSON data even if status code indicates error
-                        try:
-                            data_content = content_response.json()
-                            
-                            # Check if we got valid data
-                            if 'query' in data_content and 'pages' in data_content['query']:
-                                page_id = list(data_content['query']['pages'].keys())[0]
-                                if page_id == '-1':  # Page doesn't exist
-                                    if self.log_callback: self.log_callback(f"Page not found for {rsid}. Skipping.")
-                                    continue
-                                    
-                                content = data_content['query']['pages'][page_id]['revisions'][0]['*']
-                                
-                                # Save the content
-                                conn = sqlite3.connect(self.db_path)
-                                conn.execute(
-                                    'INSERT INTO snps (rsid, content, scraped_at) VALUES (?, ?, ?)',
-                                    (rsid, content, datetime.now())
-                                )
-                                conn.commit()
-                                conn.close()
-
-                                snp_count += 1
-                                if self.status_callback: self.status_callback(snp_count, self.total_snps, rsid)
-                                if self.log_callback and snp_count % 10 == 0: self.log_callback(f"Scraped {snp_count} SNPs. Latest: {rsid}")
-
-                                if snp_count % 10 == 0:
-                                    self.save_progress('snp_count', str(snp_count))
-                            else:
-                                # JSON is valid but doesn't contain expected data
-                                raise Exception("Invalid response structure")
-                                
-                        except (json.JSONDecodeError, KeyError) as e:
-                            # If we can't parse JSON or access expected keys, check status
-                            content_response.raise_for_status()
-                            raise e
-
-                    except Exception as e:
-                        # Check if we actually saved this SNP despite the error
-                        if self.already_scraped(rsid):
-                            if self.log_callback: 
-                                self.log_callback(f"Got error but {rsid} was saved successfully. Continuing...")
-                            snp_count += 1
-                            if self.status_callback: 
-                                self.status_callback(snp_count, self.total_snps, rsid)
-                            # No delay needed - it worked!
-                        else:
-                            # Real error - SNP wasn't saved
-                            if self.log_callback: 
-                                self.log_callback(f"Error fetching {rsid}: {e}. Retrying in 30 seconds...")
-                            
-                            # Log the error for later recovery
-                            if "502" in str(e):
-                                self._log_error(rsid, "502_ERROR", str(e))
-                            else:
-                                self._log_error(rsid, "OTHER_ERROR", str(e))
-                            
-                            time.sleep(30)
-                            continue  # Skip the normal delay and retry immediately
-
-                    time.sleep(3)
-
-                if 'continue' in data and data['continue']:
-                    params['cmcontinue'] = data['continue']['cmcontinue']
-                    self.save_progress('cmcontinue', params['cmcontinue'])
+
+                    inserted, updated, latest = self._store_pages(pages, owners, counts)
+                    total_count = sum(counts.values())
+                    if self.status_callback and latest:
+                        self.status_callback(total_count, self.total_snps, latest)
+                    if self.log_callback and (inserted or updated):
+                        self.log_callback(f"Saved {inserted} new and {updated} updated pages "
+                                          f"({total_count} total). Latest: {latest or batch[-1]}")
+                    self._wait(REQUEST_DELAY, 'rate limit')
+
+                # A listing page only counts as done once all its titles were fetched
+                if not self.running or category is None:
+                    continue
+                if next_cursor:
+                    cursors[category] = next_cursor
+                    self.save_progress(self._progress_key('cursor', category), next_cursor)
                 else:
-                    self.running = False # End of the list
-                    if self.log_callback: self.log_callback("Scraping complete: Reached end of SNP list.")
-                    break
-                
-                time.sleep(3)
+                    del cursors[category]
+                    self.save_progress(self._progress_key('done', category), 1)
+                    if self.log_callback: self.log_callback(f"Reached end of Category:{category}.")
 
             except KeyboardInterrupt:
                 self.stop()
@@ -222,33 +388,29 @@ class SNPediaScraper:
                 break
             except Exception as e:
                 if self.log_callback: self.log_callback(f"Error: {e}. Retrying in 30 seconds...")
-                time.sleep(30)
-        
+                self._set_phase('error', error=str(e))
+                self._wait(30, 'error backoff')
+
+        if not cursors and self.log_callback:
+            self.log_callback("Scraping complete: Reached end of every category.")
         self.running = False
+        self._set_phase('stopped')
         if self.log_callback: self.log_callback("Scraper stopped.")
 
     def already_scraped(self, rsid):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.execute('SELECT 1 FROM snps WHERE rsid = ?', (rsid,))
-        exists = cursor.fetchone() is not None
-        conn.close()
-        return exists
+        return bool(self.store.contains_many([rsid]))
+
+    def already_scraped_many(self, rsids):
+        return self.store.contains_many(rsids)
+
+    def queued_titles(self, limit):
+        return self.store.queued_titles(limit)
 
     def save_progress(self, key, value):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute(
-            'INSERT OR REPLACE INTO progress (key, value) VALUES (?, ?)',
-            (key, str(value))
-        )
-        conn.commit()
-        conn.close()
+        self.store.set_progress(key, value)
 
     def get_progress(self, key):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.execute('SELECT value FROM progress WHERE key = ?', (key,))
-        row = cursor.fetchone()
-        conn.close()
-        return row[0] if row else None
+        return self.store.get_progress(key)
 
 
 if __name__ == "__main__":
@@ -265,15 +427,48 @@ if __name__ == "__main__":
         sys.stdout.write(f'\n{datetime.now().strftime("%H:%M:%S")} - {message}\n')
         sys.stdout.flush()
 
+    parser = argparse.ArgumentParser(description="Crawl SNPedia into snpedia.db.")
+    parser.add_argument('--category', action='append', choices=sorted(CATEGORIES),
+                        help="Category to crawl; repeat for several (default: snp)")
+    parser.add_argument('--all-categories', action='store_true', help="Crawl every known category")
+    parser.add_argument('--store', default=DEFAULT_DB_PATH,
+                        help="Where to store pages: a SQLite file (default) or an LMDB directory (*.lmdb)")
+    parser.add_argument('--restart', action='store_true',
+                        help="List the categories from the start again (stored pages are skipped)")
+    parser.add_argument('--profile-seconds', type=float, default=30,
+                        help="Length of the profile taken on SIGUSR1 (default: 30)")
+    args = parser.parse_args()
+
+    if args.all_categories:
+        categories = list(CATEGORIES.values())
+    else:
+        categories = [CATEGORIES[name] for name in args.category or []] or DEFAULT_CATEGORIES
+
+    # Held until exit, so a dashboard restore can't swap the file out from under us
+    writer_lock = snpdb.lock_writer(args.store.removeprefix('lmdb:'))
+    if writer_lock is None:
+        print(f"✗ Another scraper or a restore is using {args.store}")
+        sys.exit(1)
+
     print("=== SNPedia Scraper (CLI) ===")
-    print("This will take ~90 hours to complete.")
+    print(f"Pages are fetched {FETCH_BATCH} per request, {REQUEST_DELAY}s apart.")
     print("Press Ctrl+C anytime to pause (progress is saved).")
+    # Profiles go to profiles/ next to the store
+    profiles_dir = os.path.join(os.path.dirname(os.path.abspath(args.store.removeprefix('lmdb:'))), 'profiles')
+    sampler = profiler.SamplingProfiler(profiles_dir)
+    if sampler.install_signal(args.profile_seconds, label='scraper'):
+        print(f"Send SIGUSR1 (kill -USR1 {os.getpid()}) to profile for {args.profile_seconds:g}s.")
     print("="*30)
 
     scraper = SNPediaScraper(
+        db_path=args.store,
         status_callback=console_status_callback, 
-        log_callback=console_log_callback
+        log_callback=console_log_callback,
+        categories=categories
     )
+    if args.restart:
+        scraper.restart_categories()
+    print(f"Categories: {', '.join(scraper.categories)}")
     
     # Initial progress display
     initial_count, total_snps = scraper.get_current_progress()
@@ -0,0 +1,340 @@
+"""
+Storage backends for scraped pages.
+
+The scraper, error_recover.py and the dashboard read and write pages through
+a Store rather than their own SQL, so batching and connection handling live
+in one place and the backing store can be swapped out for benchmarking:
+
+    store = storage.open_store('snpedia.db')      # SQLite (default)
+    store = storage.open_store('snpedia.lmdb')    # LMDB, needs: pip install lmdb
+
+Every store offers put_many, contains_many, get_many and iter_since over
+pages, plus the progress key/value table and the scraper's fetch queue.
+Features built on SQL (snp_keys, the link graph, the dashboard's statistics)
+are only available with the SQLite backend.
+"""
+
+import json
+import os
+import sqlite3
+import struct
+import threading
+from datetime import datetime
+
+import snpdb
+
+
+class Store:
+    """Interface shared by the storage backends."""
+
+    backend = None
+
+    def put_many(self, rows, progress=None):
+        """Write (title, content) or (title, content, scraped_at) rows in one transaction.
+
+        progress is an optional {key: value} dict saved in the same
+        transaction. Written titles are removed from the fetch queue.
+        Returns {title: 'inserted' | 'updated' | 'unchanged'}.
+        """
+        raise NotImplementedError
+
+    def contains_many(self, titles):
+        """The subset of titles that are stored."""
+        raise NotImplementedError
+
+    def get_many(self, titles):
+        """{title: content} for the titles that are stored."""
+        raise NotImplementedError
+
+    def iter_since(self, marker=0, batch_size=1000):
+        """Yield (marker, title, content, scraped_at) for pages added after marker.
+
+        Markers increase in insertion order, so the last one seen can be
+        passed back in to resume.
+        """
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def get_progress(self, key):
+        raise NotImplementedError
+
+    def set_progress(self, key, value):
+        raise NotImplementedError
+
+    def delete_progress(self, keys):
+        raise NotImplementedError
+
+    def progress(self):
+        """The whole progress table as a dict."""
+        raise NotImplementedError
+
+    def queued_titles(self, limit):
+        """The oldest titles in the fetch queue."""
+        raise NotImplementedError
+
+    def enqueue(self, titles, reason):
+        """Add titles to the fetch queue. Returns the number added."""
+        raise NotImplementedError
+
+    def dequeue(self, titles):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _row(row):
+    return row if len(row) == 3 else (row[0], row[1], None)
+
+
+class SQLiteStore(Store):
+    """The snpedia.db SQLite file.
+
+    One connection per store, shared between threads behind a lock (the
+    hosted dashboard reads progress while the scraper thread writes).
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path, readonly=False, timeout=30):
+        self.path = path
+        if readonly:
+            self.conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True,
+                                        timeout=timeout, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+            snpdb.create_tables(self.conn)
+        self.lock = threading.Lock()
+
+    def put_many(self, rows, progress=None):
+        results = {}
+        with self.lock, self.conn:
+            for title, content, scraped_at in map(_row, rows):
+                results[title] = snpdb.save_snp(self.conn, title, content, scraped_at)
+            if results:
+                self._dequeue(results)
+            for key, value in (progress or {}).items():
+                snpdb.set_progress(self.conn, key, value)
+        return results
+
+    def contains_many(self, titles):
+        with self.lock:
+            return snpdb.existing_rsids(self.conn, titles)
+
+    def get_many(self, titles):
+        titles = list(titles)
+        found = {}
+        with self.lock:
+            for i in range(0, len(titles), snpdb.MAX_SQL_VARIABLES):
+                chunk = titles[i:i + snpdb.MAX_SQL_VARIABLES]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(self.conn.execute(
+                    f'SELECT rsid, content FROM snps WHERE rsid IN ({placeholders})', chunk
+                ))
+        return found
+
+    def iter_since(self, marker=0, batch_size=1000):
+        # Keyset paging on rowid: each batch is an index seek, and nothing is
+        # held open between batches
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    'SELECT rowid, rsid, content, scraped_at FROM snps WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                    (marker, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            marker = rows[-1][0]
+            yield from rows
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM snps').fetchone()[0]
+
+    def get_progress(self, key):
+        with self.lock:
+            return snpdb.get_progress(self.conn, key)
+
+    def set_progress(self, key, value):
+        with self.lock, self.conn:
+            snpdb.set_progress(self.conn, key, value)
+
+    def delete_progress(self, keys):
+        with self.lock, self.conn:
+            self.conn.executemany('DELETE FROM progress WHERE key = ?', ((key,) for key in keys))
+
+    def progress(self):
+        with self.lock:
+            return dict(self.conn.execute('SELECT key, value FROM progress'))
+
+    def queued_titles(self, limit):
+        with self.lock:
+            return snpdb.queued_titles(self.conn, limit)
+
+    def enqueue(self, titles, reason):
+        with self.lock, self.conn:
+            return snpdb.enqueue_fetch(self.conn, titles, reason)
+
+    def _dequeue(self, titles):
+        self.conn.executemany('DELETE FROM fetch_queue WHERE title = ?', ((t,) for t in titles))
+
+    def dequeue(self, titles):
+        with self.lock, self.conn:
+            self._dequeue(titles)
+
+    def close(self):
+        self.conn.close()
+
+
+class LMDBStore(Store):
+    """An LMDB environment directory.
+
+    Sub-databases: pages (title -> JSON record), seq (insertion sequence ->
+    title, for iter_since), progress and queue. Writers are serialised by
+    LMDB itself; readers never block.
+    """
+
+    backend = 'lmdb'
+    SEQ = struct.Struct('>Q')  # big-endian, so keys sort numerically
+
+    def __init__(self, path, readonly=False, map_size=8 * 1024 ** 3):
+        try:
+            import lmdb
+        except ImportError:
+            raise RuntimeError("The LMDB backend needs the lmdb package: pip install lmdb")
+        self.path = path
+        self.env = lmdb.open(path, map_size=map_size, max_dbs=4, readonly=readonly, subdir=True)
+        self.pages = self.env.open_db(b'pages', create=not readonly)
+        self.seq = self.env.open_db(b'seq', create=not readonly)
+        self.meta = self.env.open_db(b'progress', create=not readonly)
+        self.queue = self.env.open_db(b'queue', create=not readonly)
+
+    @staticmethod
+    def _key(title):
+        return title.encode('utf-8')
+
+    def _next_seq(self, txn):
+        with txn.cursor(db=self.seq) as cursor:
+            if cursor.last():
+                return self.SEQ.unpack(cursor.key())[0] + 1
+        return 1
+
+    def put_many(self, rows, progress=None):
+        results = {}
+        with self.env.begin(write=True) as txn:
+            next_seq = self._next_seq(txn)
+            for title, content, scraped_at in map(_row, rows):
+                key = self._key(title)
+                digest = snpdb.content_hash(content).hex()
+                existing = txn.get(key, db=self.pages)
+                record = json.loads(existing) if existing else None
+                if record and record['hash'] == digest:
+                    results[title] = 'unchanged'
+                    txn.delete(key, db=self.queue)
+                    continue
+                if record:
+                    seq, version = record['seq'], record['version'] + 1
+                    results[title] = 'updated'
+                else:
+                    seq, version = next_seq, 1
+                    next_seq += 1
+                    txn.put(self.SEQ.pack(seq), key, db=self.seq)
+                    results[title] = 'inserted'
+                txn.put(key, json.dumps({
+                    'content': content,
+                    'scraped_at': str(scraped_at or datetime.now()),
+                    'hash': digest,
+                    'version': version,
+                    'seq': seq,
+                }).encode('utf-8'), db=self.pages)
+                txn.delete(key, db=self.queue)
+            for name, value in (progress or {}).items():
+                txn.put(self._key(name), str(value).encode('utf-8'), db=self.meta)
+        return results
+
+    def contains_many(self, titles):
+        with self.env.begin() as txn:
+            return {title for title in titles if txn.get(self._key(title), db=self.pages) is not None}
+
+    def get_many(self, titles):
+        found = {}
+        with self.env.begin() as txn:
+            for title in titles:
+                value = txn.get(self._key(title), db=self.pages)
+                if value is not None:
+                    found[title] = json.loads(value)['content']
+        return found
+
+    def iter_since(self, marker=0, batch_size=1000):
+        while True:
+            batch = []
+            with self.env.begin() as txn, txn.cursor(db=self.seq) as cursor:
+                if not cursor.set_range(self.SEQ.pack(marker + 1)):
+                    return
+                for seq_key, title in cursor:
+                    record = json.loads(txn.get(title, db=self.pages))
+                    batch.append((self.SEQ.unpack(seq_key)[0], title.decode('utf-8'),
+                                  record['content'], record['scraped_at']))
+                    if len(batch) >= batch_size:
+                        break
+            if not batch:
+                return
+            marker = batch[-1][0]
+            yield from batch
+
+    def count(self):
+        with self.env.begin() as txn:
+            return txn.stat(self.pages)['entries']
+
+    def get_progress(self, key):
+        with self.env.begin() as txn:
+            value = txn.get(self._key(key), db=self.meta)
+        return value.decode('utf-8') if value is not None else None
+
+    def set_progress(self, key, value):
+        with self.env.begin(write=True) as txn:
+            txn.put(self._key(key), str(value).encode('utf-8'), db=self.meta)
+
+    def delete_progress(self, keys):
+        with self.env.begin(write=True) as txn:
+            for key in keys:
+                txn.delete(self._key(key), db=self.meta)
+
+    def progress(self):
+        with self.env.begin() as txn, txn.cursor(db=self.meta) as cursor:
+            return {key.decode('utf-8'): value.decode('utf-8') for key, value in cursor}
+
+    def queued_titles(self, limit):
+        with self.env.begin() as txn, txn.cursor(db=self.queue) as cursor:
+            queued = sorted((value, key.decode('utf-8')) for key, value in cursor)
+        return [title for _, title in queued[:limit]]
+
+    def enqueue(self, titles, reason):
+        now = str(datetime.now()).encode('utf-8')
+        with self.env.begin(write=True) as txn:
+            return sum(txn.put(self._key(title), now, db=self.queue, overwrite=False) for title in titles)
+
+    def dequeue(self, titles):
+        with self.env.begin(write=True) as txn:
+            for title in titles:
+                txn.delete(self._key(title), db=self.queue)
+
+    def close(self):
+        self.env.close()
+
+
+def open_store(path, readonly=False):
+    """Open the store at path. Directories and *.lmdb paths are LMDB."""
+    if path.startswith('lmdb:'):
+        return LMDBStore(path[len('lmdb:'):], readonly)
+    if path.endswith('.lmdb') or os.path.isdir(path):
+        return LMDBStore(path, readonly)
+    return SQLiteStore(path, readonly)
@@ -0,0 +1,87 @@
+"""Incremental refresh of the analytics cache in src/analytics.py."""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+pytest.importorskip('numpy')
+
+import analytics  # noqa: E402
+import snpdb  # noqa: E402
+
+
+def snp_page(gene, chromosome='1'):
+    return f'{{{{Rsnum |gene={gene} |chromosome={chromosome} |position=100}}}}'
+
+
+@pytest.fixture
+def db(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'snpedia.db')
+    snpdb.create_tables(conn)
+    snpdb.save_snps(conn, [(f'Rs{i}', snp_page('OXTR'), None) for i in range(1, 6)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def cache(db, tmp_path):
+    cache = analytics.AnalyticsCache(str(tmp_path / 'snpedia.db'))
+    cache.refresh(db)
+    return cache
+
+
+def genes(cache):
+    groups = cache.aggregate('gene', kind='snp')['groups']
+    return {group['key']: group['count'] for group in groups}
+
+
+def test_new_pages_are_appended(db, cache):
+    snpdb.save_snps(db, [('Rs6', snp_page('APOE'), None)])
+    db.commit()
+    assert cache.refresh(db) == 1
+    assert genes(cache) == {'OXTR': 5, 'APOE': 1}
+
+
+def test_deleted_page_in_the_middle_is_dropped(db, cache):
+    # changeset.py removes pages like this; only the highest rowid used to be noticed
+    db.execute("DELETE FROM snps WHERE rsid = 'Rs3'")
+    db.commit()
+    cache.refresh(db)
+    assert cache.rows == 4
+    assert genes(cache) == {'OXTR': 4}
+
+
+def test_rewrite_with_an_older_scraped_at_is_picked_up(db, cache):
+    # changeset apply keeps the publisher's timestamp
+    snpdb.save_snps(db, [('Rs2', snp_page('APOE'), '2001-01-01 00:00:00')])
+    db.commit()
+    assert cache.refresh(db) == 1
+    assert genes(cache) == {'OXTR': 4, 'APOE': 1}
+
+
+def test_changes_are_applied_after_a_reload_from_disk(db, cache, tmp_path):
+    cache.save()
+    db.execute("DELETE FROM snps WHERE rsid = 'Rs1'")
+    snpdb.save_snps(db, [('Rs5', snp_page('APOE'), None)])
+    db.commit()
+
+    reloaded = analytics.AnalyticsCache(str(tmp_path / 'snpedia.db'))
+    assert reloaded.rows == 5
+    reloaded.refresh(db)
+    assert genes(reloaded) == {'OXTR': 3, 'APOE': 1}
+
+
+def test_cache_behind_the_change_log_is_rebuilt(db, cache):
+    snpdb.save_snps(db, [('Rs4', snp_page('APOE'), None)])
+    db.execute("DELETE FROM snps WHERE rsid = 'Rs5'")
+    # As if the log had been pruned past this cache's last refresh
+    db.execute('DELETE FROM snps_changes WHERE seq < (SELECT MAX(seq) FROM snps_changes)')
+    db.commit()
+    assert snpdb.changes_since(db, cache.last_change) is None
+    assert cache.refresh(db) == 4
+    assert genes(cache) == {'OXTR': 3, 'APOE': 1}
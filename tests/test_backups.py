@@ -0,0 +1,90 @@
+"""Backup verification and restore in src/backups.py."""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import backups  # noqa: E402
+import snpdb  # noqa: E402
+
+
+def make_db(path, pages):
+    conn = sqlite3.connect(path)
+    snpdb.create_tables(conn)
+    snpdb.save_snps(conn, [(f'Rs{i}', f'page {i}', None) for i in range(1, pages + 1)])
+    conn.commit()
+    conn.close()
+
+
+def rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM snps').fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def backup(tmp_path):
+    backup_dir = tmp_path / 'backups'
+    backup_dir.mkdir()
+    path = str(backup_dir / 'snpedia_backup_3_snps_20250701_120000.db')
+    make_db(path, 3)
+    backups.record_backup(path)
+    return path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'snpedia.db')
+    make_db(path, 5)
+    return path
+
+
+def test_restore_swaps_in_the_backup_and_keeps_the_old_file(backup, db_path):
+    result = backups.restore_backup(backup, db_path)
+    assert result['rows'] == 3
+    assert rows(db_path) == 3
+    assert rows(result['previous']) == 5
+
+
+def test_corrupt_backup_leaves_the_database_untouched(backup, db_path):
+    with open(backup, 'r+b') as f:
+        f.seek(200)
+        f.write(b'\xff' * 64)
+    with pytest.raises(backups.BackupError, match='checksum'):
+        backups.restore_backup(backup, db_path)
+    assert rows(db_path) == 5
+    assert not os.path.exists(f'{db_path}.restore-tmp')
+
+
+def test_restore_is_refused_while_a_scraper_holds_the_writer_lock(backup, db_path):
+    # A CLI scraper's connection would keep writing to the replaced file
+    writer = snpdb.lock_writer(db_path)
+    try:
+        with pytest.raises(backups.DatabaseBusy):
+            backups.restore_backup(backup, db_path)
+        assert rows(db_path) == 5
+    finally:
+        writer.close()
+    backups.restore_backup(backup, db_path)
+    assert rows(db_path) == 3
+
+
+def test_verify_records_results_in_the_manifest(backup):
+    backup_dir = os.path.dirname(backup)
+    unrecorded = os.path.join(backup_dir, 'snpedia_backup_2_snps_20250702_120000.db')
+    make_db(unrecorded, 2)
+
+    results = backups.verify_backups(backup_dir, jobs=1)
+    assert [(r['file'], r['status']) for r in results] == [
+        ('snpedia_backup_2_snps_20250702_120000.db', 'unrecorded'),
+        ('snpedia_backup_3_snps_20250701_120000.db', 'ok'),
+    ]
+    manifest = backups.load_manifest(backup_dir)
+    assert manifest[os.path.basename(unrecorded)]['rows'] == 2
+    assert manifest[os.path.basename(backup)]['status'] == 'ok'
@@ -0,0 +1,67 @@
+"""Publishing and applying changesets with changeset.py."""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import changeset  # noqa: E402
+import snpdb  # noqa: E402
+
+
+def make_db(path, pages):
+    conn = sqlite3.connect(path)
+    snpdb.create_tables(conn)
+    snpdb.save_snps(conn, [(rsid, content, '2025-07-01 12:00:00') for rsid, content in pages.items()])
+    conn.commit()
+    conn.close()
+
+
+def pages(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute('SELECT rsid, content FROM snps'))
+    finally:
+        conn.close()
+
+
+BASE = {'Rs1': 'one', 'Rs2': 'two', 'Rs3': 'three'}
+TARGET = {'Rs1': 'one', 'Rs2': 'two, edited', 'Rs4': 'four'}
+
+
+@pytest.fixture
+def published(tmp_path):
+    old, new = str(tmp_path / 'old.db'), str(tmp_path / 'new.db')
+    make_db(old, BASE)
+    make_db(new, TARGET)
+    path = str(tmp_path / 'changes.jsonl.gz')
+    header = changeset.write_changeset(old, new, path)
+    assert header['counts'] == {'add': 1, 'change': 1, 'remove': 1}
+    return path
+
+
+def test_apply_brings_the_base_to_the_target_and_can_be_repeated(published, tmp_path):
+    db_path = str(tmp_path / 'downstream.db')
+    make_db(db_path, BASE)
+    changeset.apply_changeset(published, db_path)
+    assert pages(db_path) == TARGET
+    changeset.apply_changeset(published, db_path)
+    assert pages(db_path) == TARGET
+
+
+def test_locally_edited_row_is_a_conflict_and_nothing_is_applied(published, tmp_path):
+    db_path = str(tmp_path / 'downstream.db')
+    make_db(db_path, {**BASE, 'Rs2': 'two, edited locally'})
+    with pytest.raises(changeset.ChangesetConflict, match='Rs2'):
+        changeset.apply_changeset(published, db_path)
+    assert pages(db_path) == {**BASE, 'Rs2': 'two, edited locally'}
+
+
+def test_force_applies_over_conflicts(published, tmp_path):
+    db_path = str(tmp_path / 'downstream.db')
+    make_db(db_path, {**BASE, 'Rs2': 'two, edited locally', 'Rs9': 'local only'})
+    changeset.apply_changeset(published, db_path, force=True)
+    assert pages(db_path) == {**TARGET, 'Rs9': 'local only'}
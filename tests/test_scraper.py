@@ -0,0 +1,84 @@
+"""The scraper loop in src/snpedia_scraper.py, with the API calls replaced."""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import snpdb  # noqa: E402
+import snpedia_scraper  # noqa: E402
+
+LISTINGS = {
+    ('Is_a_snp', None): (['Rs1', 'Rs2'], 'snp-2'),
+    ('Is_a_snp', 'snp-2'): (['Rs3'], None),
+    ('Is_a_genotype', None): (['Rs1(A;A)'], None),
+}
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(snpedia_scraper, 'ERROR_LOG_PATH', str(tmp_path / 'scraper_errors.log'))
+    path = str(tmp_path / 'snpedia.db')
+    conn = sqlite3.connect(path)
+    snpdb.create_tables(conn)
+    snpdb.save_snps(conn, [('Rs2', 'already stored', None)])
+    snpdb.enqueue_fetch(conn, ['Rs99', 'Rs404'], 'link')
+    conn.commit()
+    conn.close()
+    return path
+
+
+def make_scraper(db_path, fetch):
+    scraper = snpedia_scraper.SNPediaScraper(db_path=db_path, categories=['Is_a_snp', 'Is_a_genotype'])
+    scraper._wait = lambda seconds, reason: None
+    scraper._fetch_totals = lambda: None
+    scraper._list_category = lambda category, cursor: LISTINGS[category, cursor]
+    scraper._fetch_pages = fetch
+    return scraper
+
+
+def run(scraper):
+    scraper.running = True
+    scraper._scrape_loop()
+    scraper.store.close()
+
+
+def test_queue_goes_first_and_every_category_is_finished(db_path):
+    requests = []
+
+    def fetch(titles):
+        requests.append(list(titles))
+        return {title: None if title == 'Rs404' else f'page {title}' for title in titles}
+
+    run(make_scraper(db_path, fetch))
+
+    assert set(requests[0][:2]) == {'Rs99', 'Rs404'}
+    fetched = [title for batch in requests for title in batch]
+    assert 'Rs2' not in fetched
+    conn = sqlite3.connect(db_path)
+    assert {row[0] for row in conn.execute('SELECT rsid FROM snps')} == {'Rs1', 'Rs2', 'Rs3', 'Rs99', 'Rs1(A;A)'}
+    assert snpdb.queued_titles(conn, 10) == []
+    progress = dict(conn.execute('SELECT key, value FROM progress'))
+    assert progress['snp_count'] == '2'
+    assert progress['count:Is_a_genotype'] == '1'
+    assert progress['done:Is_a_snp'] == progress['done:Is_a_genotype'] == '1'
+    conn.close()
+
+
+def test_failed_queued_fetch_is_logged_and_dequeued(db_path):
+    def fetch(titles):
+        if 'Rs99' in titles:
+            raise RuntimeError('502 Bad Gateway')
+        return {title: f'page {title}' for title in titles}
+
+    run(make_scraper(db_path, fetch))
+
+    conn = sqlite3.connect(db_path)
+    assert snpdb.queued_titles(conn, 10) == []
+    assert conn.execute("SELECT 1 FROM snps WHERE rsid = 'Rs99'").fetchone() is None
+    conn.close()
+    with open(snpedia_scraper.ERROR_LOG_PATH) as f:
+        assert 'Rs99 | 502_ERROR' in f.read()
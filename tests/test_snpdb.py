@@ -0,0 +1,100 @@
+"""Regression tests for the shared schema and helpers in src/snpdb.py."""
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import snpdb  # noqa: E402
+
+
+def make_db():
+    conn = sqlite3.connect(':memory:')
+    snpdb.create_tables(conn)
+    return conn
+
+
+def dirty(conn):
+    return conn.execute('SELECT rsid, version FROM links_dirty ORDER BY rsid').fetchall()
+
+
+def test_rewriting_a_dirty_page_keeps_one_dirty_mark():
+    # The links_dirty triggers used INSERT OR REPLACE, which the upsert firing
+    # them overrode, so the second write raised IntegrityError
+    conn = make_db()
+    snpdb.save_snps(conn, [('Rs1', 'first', None), ('Rs2', 'other', None)])
+    snpdb.save_snps(conn, [('Rs1', 'second', None)])
+    assert dirty(conn) == [('Rs1', 2), ('Rs2', 1)]
+
+
+def test_save_snp_over_a_dirty_page_clears_its_mark():
+    conn = make_db()
+    snpdb.save_snps(conn, [('Rs1', 'first', None)])
+    assert snpdb.save_snp(conn, 'Rs1', 'see [[Rs2]]') == 'updated'
+    assert dirty(conn) == []
+    assert snpdb.links_from(conn, 'Rs1')
+
+
+def test_migration_replaces_triggers_from_older_databases():
+    # CREATE TRIGGER IF NOT EXISTS never replaced the INSERT OR REPLACE
+    # triggers a database was created with before they became upserts
+    conn = make_db()
+    new_ns, new_num = snpdb._key_sql('NEW.rsid')
+    conn.executescript(f'''
+        DROP TRIGGER snps_key_insert;
+        CREATE TRIGGER snps_key_insert AFTER INSERT ON snps WHEN ({new_ns}) IS NOT NULL BEGIN
+            INSERT OR REPLACE INTO snp_keys (ns, num, rsid) VALUES ({new_ns}, {new_num}, NEW.rsid);
+        END;
+        DROP TRIGGER snps_links_update;
+        CREATE TRIGGER snps_links_update AFTER UPDATE OF content ON snps BEGIN
+            INSERT OR REPLACE INTO links_dirty (rsid, version) VALUES (NEW.rsid, NEW.version);
+        END;
+        PRAGMA user_version = 5;
+    ''')
+    assert 6 in snpdb.create_tables(conn)
+
+    snpdb.save_snps(conn, [('Rs1', 'first', None)])
+    snpdb.save_snps(conn, [('Rs1', 'second', None)])
+    # An outer OR clause no longer turns the key upsert into a failure
+    conn.execute("INSERT OR ABORT INTO snps (rsid, content) VALUES ('rs1', 'lower case')")
+    assert dirty(conn) == [('Rs1', 2), ('rs1', 1)]
+    assert conn.execute('SELECT rsid FROM snp_keys').fetchall() == [('rs1',)]
+
+
+def index_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_scraped_at_index_is_left_to_the_backfill_on_a_populated_table():
+    # Building it at startup would hold the write lock for a full table pass
+    conn = make_db()
+    snpdb.save_snps(conn, [('Rs1', 'first', None)])
+    conn.executescript('''
+        DROP INDEX snps_by_scraped_at;
+        DELETE FROM progress WHERE key LIKE 'scraped_at_index%';
+        PRAGMA user_version = 4;
+    ''')
+    snpdb.create_tables(conn)
+    assert 'snps_by_scraped_at' not in index_names(conn)
+    assert snpdb.pending_backfills(conn) == ['scraped_at_index']
+
+    assert snpdb.run_backfills(conn) == {'scraped_at_index': 1}
+    assert 'snps_by_scraped_at' in index_names(conn)
+    assert snpdb.pending_backfills(conn) == []
+
+
+def test_stale_link_extraction_does_not_overwrite_a_rewritten_page():
+    # link_graph.py extracts in worker processes from rows read earlier
+    conn = make_db()
+    snpdb.save_snps(conn, [('Rs1', 'see [[Rs2]]', None), ('Rs3', 'see [[Rs2]]', None)])
+    rows = conn.execute('SELECT rsid, content, version FROM snps ORDER BY rsid').fetchall()
+    stale = [(rsid, snpdb.extract_links(rsid, content), version) for rsid, content, version in rows]
+
+    snpdb.save_snp(conn, 'Rs1', 'see [[Rs4]]')              # fresh links, mark cleared
+    snpdb.save_snps(conn, [('Rs3', 'see [[Rs5]]', None)])   # bulk write, marked dirty
+    written = [snpdb.replace_links(conn, rsid, edges, version) for rsid, edges, version in stale]
+
+    assert written == [False, False]
+    assert snpdb.links_from(conn, 'Rs1') == [(snpdb.LINK_SNP, 'Rs4')]
+    assert dirty(conn) == [('Rs3', 2)]
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Check that every member of the crawled categories made it into the database.
+
+A listing-only snapshot of each category (500 titles per request, so a
+couple of hundred requests for Is_a_snp instead of a re-crawl) is diffed
+against the stored titles with set operations. Reports:
+
+  missing    listed but not stored (skipped, errored or lost pages)
+  extra      stored pages of the category's kind that are no longer listed
+  stubs      stored pages with empty or template-less content under 100 bytes
+  redirects  stored #REDIRECT pages, whose target may not be stored
+
+With --enqueue, missing pages, stubs and unstored redirect targets are added
+to the scraper's fetch queue, which it works through ahead of the listing.
+Queued stubs are recorded in the store's progress table (stub_queued:<title>)
+and are only queued once: a stub that is still a stub after its re-fetch is
+short upstream, and re-queueing it would never converge.
+Snapshots are saved under listings/ next to the database and reused for a
+day; an interrupted listing resumes where it stopped.
+
+Usage:
+    python verify_coverage.py                        # Is_a_snp, report only
+    python verify_coverage.py --category genotype --enqueue
+    python verify_coverage.py --all-categories --relist --show 20
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import requests
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, 'snpedia.db')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import snpdb  # noqa: E402
+import storage  # noqa: E402
+from snpedia_scraper import CATEGORIES, REQUEST_DELAY, USER_AGENT  # noqa: E402
+
+API_URL = "https://bots.snpedia.com/api.php"
+STUB_BYTES = 100
+STUB_QUEUED_PREFIX = 'stub_queued:'
+REDIRECT_RE = re.compile(r'^\s*#redirect\s*\[\[([^\]|#]+)', re.IGNORECASE)
+
+# Which stored titles are expected to be in a category's listing. Pages of
+# other categories (genes, medicines) can't be told apart by title, so only
+# missing pages are reported for them.
+CATEGORY_KINDS = {
+    'Is_a_snp': lambda title: snpdb.parse_snp_id(title) is not None,
+    'Is_a_genotype': lambda title: snpdb.classify_title(title) == snpdb.LINK_GENOTYPE,
+}
+
+
+def listing_path(db_path, category):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), 'listings', f'{category}.txt')
+
+
+def read_listing(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')}
+
+
+def fetch_listing(category, path):
+    """List a category into path, resuming a partial listing. Returns the titles."""
+    partial, cursor_path = path + '.partial', path + '.cursor'
+    cursor = None
+    if os.path.exists(partial) and os.path.exists(cursor_path):
+        with open(cursor_path, 'r') as f:
+            cursor = f.read().strip() or None
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(partial, 'w', encoding='utf-8') as f:
+            f.write(f'# Category:{category} listed {datetime.now()}\n')
+
+    requests_made = 0
+    while True:
+        params = {
+            'action': 'query',
+            'list': 'categorymembers',
+            'cmtitle': f'Category:{category}',
+            'cmprop': 'title',
+            'cmlimit': 500,
+            'format': 'json'
+        }
+        if cursor:
+            params['cmcontinue'] = cursor
+        r = requests.get(API_URL, params=params, headers={'User-Agent': USER_AGENT}, timeout=60)
+        r.raise_for_status()
+        data = r.json()
+        titles = [page['title'].replace(' ', '_') for page in data['query']['categorymembers']]
+        cursor = data['continue']['cmcontinue'] if data.get('continue') else None
+
+        # Titles first, then the cursor: a crash in between re-lists one page, which the set absorbs
+        with open(partial, 'a', encoding='utf-8') as f:
+            f.writelines(f'{title}\n' for title in titles)
+        with open(cursor_path, 'w') as f:
+            f.write(cursor or '')
+        requests_made += 1
+        print(f"\r  Listing {category}: {requests_made} requests this run", end='', flush=True)
+        if not cursor:
+            break
+        time.sleep(REQUEST_DELAY)
+
+    print()
+    os.replace(partial, path)
+    os.remove(cursor_path)
+    return read_listing(path)
+
+
+def load_listing(db_path, category, max_age_hours, relist):
+    """The category's snapshot, re-listed if it is missing, old or forced."""
+    path = listing_path(db_path, category)
+    if relist and os.path.exists(path + '.cursor'):
+        os.remove(path + '.cursor')
+    fresh = os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age_hours * 3600
+    if fresh and not relist:
+        print(f"✓ Using listing snapshot {os.path.relpath(path)}")
+        return read_listing(path)
+    return fetch_listing(category, path)
+
+
+def scan_store(store, batch_size=5000):
+    """One pass over stored pages: (titles, stubs, {redirect title: target})."""
+    titles, stubs, redirects = set(), set(), {}
+    for _, title, content, _ in store.iter_since(0, batch_size):
+        titles.add(title)
+        content = content or ''
+        match = REDIRECT_RE.match(content)
+        if match:
+            redirects[title] = snpdb.normalize_title(match.group(1))
+        elif not content.strip() or (len(content) < STUB_BYTES and '{{' not in content):
+            stubs.add(title)
+        if len(titles) % 50000 == 0:
+            print(f"\r  Scanned {len(titles):,} stored pages...", end='', flush=True)
+    print(f"\r  Scanned {len(titles):,} stored pages    ")
+    return titles, stubs, redirects
+
+
+def queued_stubs(store):
+    """Stubs queued by an earlier --enqueue (still queued or already re-fetched)."""
+    return {key[len(STUB_QUEUED_PREFIX):] for key in store.progress() if key.startswith(STUB_QUEUED_PREFIX)}
+
+
+def show(label, titles, limit):
+    titles = sorted(titles)
+    mark = '✓' if not titles else '✗'
+    print(f"  {mark} {label}: {len(titles):,}")
+    for title in titles[:limit]:
+        print(f"      {title}")
+    if 0 < limit < len(titles):
+        print(f"      ... {len(titles) - limit:,} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify crawl coverage against the category listings.")
+    parser.add_argument('--store', default=DB_PATH, help="Page store (SQLite file or LMDB directory)")
+    parser.add_argument('--category', action='append', choices=sorted(CATEGORIES),
+                        help="Category to verify (repeatable, default: snp)")
+    parser.add_argument('--all-categories', action='store_true', help="Verify every known category")
+    parser.add_argument('--relist', action='store_true', help="Re-list even if a fresh snapshot exists")
+    parser.add_argument('--max-age', type=float, default=24, help="Hours a listing snapshot is reused")
+    parser.add_argument('--enqueue', action='store_true', help="Queue the needed re-fetches for the scraper")
+    parser.add_argument('--show', type=int, default=10, help="Titles to print per finding")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.store.removeprefix('lmdb:')):
+        print(f"✗ Store not found: {args.store}")
+        sys.exit(1)
+
+    if args.all_categories:
+        categories = list(CATEGORIES.values())
+    else:
+        categories = [CATEGORIES[name] for name in args.category or ['snp']]
+
+    print("=== SNPedia Coverage Check ===")
+    listings = {}
+    try:
+        for category in categories:
+            listings[category] = load_listing(args.store, category, args.max_age, args.relist)
+            print(f"✓ Category:{category}: {len(listings[category]):,} members")
+    except KeyboardInterrupt:
+        print("\n\nInterrupted. Listing progress saved - run again to resume.")
+        return
+    except (requests.RequestException, KeyError, ValueError) as e:
+        print(f"\n✗ Listing failed: {e} - run again to resume.")
+        sys.exit(1)
+
+    with storage.open_store(args.store, readonly=not args.enqueue) as store:
+        stored, stubs, redirects = scan_store(store)
+
+        refetch = {}
+        for category, listed in listings.items():
+            missing = listed - stored
+            print(f"\nCategory:{category}")
+            show("missing", missing, args.show)
+            if category in CATEGORY_KINDS:
+                belongs = CATEGORY_KINDS[category]
+                show("extra (stored, not listed)", {t for t in stored - listed if belongs(t)}, args.show)
+            refetch.update(dict.fromkeys(missing, 'missing'))
+
+        print("\nAll stored pages")
+        requeued = stubs & queued_stubs(store)
+        show("stubs", stubs - requeued, args.show)
+        show("stubs already queued once (short upstream)", requeued, args.show)
+        show("redirects", redirects, args.show)
+        unstored_targets = {target for target in redirects.values() if target and target not in stored}
+        show("redirect targets not stored", unstored_targets, args.show)
+        for title in stubs - requeued:
+            refetch.setdefault(title, 'stub')
+        for title in unstored_targets:
+            refetch.setdefault(title, 'redirect')
+
+        print()
+        if not refetch:
+            print("✓ Coverage complete - nothing to re-fetch")
+        elif args.enqueue:
+            added = 0
+            for reason in ('missing', 'stub', 'redirect'):
+                added += store.enqueue([t for t, r in refetch.items() if r == reason], reason)
+            now = datetime.now()
+            for title in stubs - requeued:
+                store.set_progress(STUB_QUEUED_PREFIX + title, now)
+            print(f"✓ {len(refetch):,} pages need fetching, {added:,} newly queued for the scraper")
+        else:
+            print(f"✗ {len(refetch):,} pages need fetching - run with --enqueue to queue them")
+
+
+if __name__ == "__main__":
+    main()